@@ -0,0 +1,46 @@
+# Schedule the daily auto-absence job on the attendance handler
+# EventBridge invokes the function with {"autoAbsence": true} every day at 23:59
+# (UTC+7); the handler closes open sessions and creates absent records for
+# active employees who did not check in
+
+$REGION = "ap-southeast-1"
+$FUNCTION_NAME = "insighthr-attendance-handler"
+$RULE_NAME = "insighthr-attendance-auto-absence"
+$SCHEDULE = "cron(59 16 * * ? *)"
+
+Write-Host "=== Scheduling Daily Auto-Absence ===" -ForegroundColor Cyan
+
+$lambdaArn = aws lambda get-function --function-name $FUNCTION_NAME --region $REGION --query "Configuration.FunctionArn" --output text
+
+$ruleArn = aws events put-rule `
+    --name $RULE_NAME `
+    --schedule-expression $SCHEDULE `
+    --region $REGION `
+    --query "RuleArn" --output text
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "✗ Failed to create rule" -ForegroundColor Red
+    exit 1
+}
+Write-Host "✓ Rule $RULE_NAME ($SCHEDULE)" -ForegroundColor Green
+
+aws lambda add-permission `
+    --function-name $FUNCTION_NAME `
+    --statement-id "$RULE_NAME-invoke" `
+    --action lambda:InvokeFunction `
+    --principal events.amazonaws.com `
+    --source-arn $ruleArn `
+    --region $REGION 2>&1 | Out-Null
+
+$targets = '[{"Id":"attendance-handler","Arn":"' + $lambdaArn + '","Input":"{\"autoAbsence\": true}"}]'
+$targetsFile = [System.IO.Path]::GetTempFileName()
+Set-Content -Path $targetsFile -Value $targets
+
+aws events put-targets --rule $RULE_NAME --targets "file://$targetsFile" --region $REGION | Out-Null
+Remove-Item $targetsFile -Force
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Target set to $FUNCTION_NAME" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to set target" -ForegroundColor Red
+}
@@ -0,0 +1,46 @@
+# Schedule the quarterly 360 aggregation on the attendance handler
+# EventBridge invokes the function with {"quarterlyAggregation": true} at 23:59
+# (UTC+7) on the last day of each quarter; the handler averages each employee's
+# daily points360 for the quarter into PerformanceScores feedback_360
+
+$REGION = "ap-southeast-1"
+$FUNCTION_NAME = "insighthr-attendance-handler"
+$RULE_NAME = "insighthr-attendance-quarterly-aggregator"
+$SCHEDULE = "cron(59 16 L 3,6,9,12 ? *)"
+
+Write-Host "=== Scheduling Quarterly 360 Aggregation ===" -ForegroundColor Cyan
+
+$lambdaArn = aws lambda get-function --function-name $FUNCTION_NAME --region $REGION --query "Configuration.FunctionArn" --output text
+
+$ruleArn = aws events put-rule `
+    --name $RULE_NAME `
+    --schedule-expression $SCHEDULE `
+    --region $REGION `
+    --query "RuleArn" --output text
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "✗ Failed to create rule" -ForegroundColor Red
+    exit 1
+}
+Write-Host "✓ Rule $RULE_NAME ($SCHEDULE)" -ForegroundColor Green
+
+aws lambda add-permission `
+    --function-name $FUNCTION_NAME `
+    --statement-id "$RULE_NAME-invoke" `
+    --action lambda:InvokeFunction `
+    --principal events.amazonaws.com `
+    --source-arn $ruleArn `
+    --region $REGION 2>&1 | Out-Null
+
+$targets = '[{"Id":"attendance-handler","Arn":"' + $lambdaArn + '","Input":"{\"quarterlyAggregation\": true}"}]'
+$targetsFile = [System.IO.Path]::GetTempFileName()
+Set-Content -Path $targetsFile -Value $targets
+
+aws events put-targets --rule $RULE_NAME --targets "file://$targetsFile" --region $REGION | Out-Null
+Remove-Item $targetsFile -Force
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Target set to $FUNCTION_NAME" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to set target" -ForegroundColor Red
+}
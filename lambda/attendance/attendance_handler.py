@@ -1,9 +1,21 @@
 import json
 import boto3
 import os
-from datetime import datetime, time, timezone, timedelta
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from identity import get_user_by_email
+from pagination import DEFAULT_PAGE_SIZE, PaginationError, parse_page_params, fetch_page, fetch_key_page, iter_items, encode_token
+from batch import batch_get_items, batch_put_items
+from aggregates import apply_score_changes
+from scoring_trigger import mark_scoring_inputs_changed
+from attendance_points import POINTS_ENGINE, calculate_points, check_in_status
+from roster import EmployeeRoster
 
 # Application timezone: UTC+7 (Bangkok/Jakarta)
 APP_TIMEZONE = timezone(timedelta(hours=7))
@@ -14,17 +26,33 @@ lambda_client = boto3.client('lambda')
 ATTENDANCE_TABLE = os.environ.get('ATTENDANCE_TABLE', 'insighthr-attendance-history-dev')
 EMPLOYEES_TABLE = os.environ.get('EMPLOYEES_TABLE', 'insighthr-employees-dev')
 USERS_TABLE = os.environ.get('USERS_TABLE', 'insighthr-users-dev')
+PERFORMANCE_SCORES_TABLE = os.environ.get('PERFORMANCE_SCORES_TABLE', 'insighthr-performance-scores-dev')
 AWS_REGION = os.environ.get('AWS_REGION', 'ap-southeast-1')
 
 attendance_table = dynamodb.Table(ATTENDANCE_TABLE)
 employees_table = dynamodb.Table(EMPLOYEES_TABLE)
 users_table = dynamodb.Table(USERS_TABLE)
+deserializer = TypeDeserializer()
+_thread_state = threading.local()
+
+# Kiosk endpoints resolve employees from a warm snapshot instead of a get_item per tap
+employee_roster = EmployeeRoster(employees_table)
 
 
 def lambda_handler(event, context):
-    """Main Lambda handler for attendance operations"""
+    """Main Lambda handler for attendance operations
+    
+    Scheduled events from EventBridge run a job instead of an API route:
+    {"autoAbsence": true} the daily absence marking and
+    {"quarterlyAggregation": true} the quarterly 360 aggregation.
+    """
     print(f"Event: {json.dumps(event)}")
     
+    if event.get('autoAbsence'):
+        return run_auto_absence(event.get('date'))
+    if event.get('quarterlyAggregation'):
+        return run_quarterly_aggregation(event.get('periods') or event.get('period'), event.get('departments'))
+    
     http_method = event.get('httpMethod', '')
     path = event.get('path', '')
     path_parameters = event.get('pathParameters') or {}
@@ -67,7 +95,11 @@ def lambda_handler(event, context):
 
 
 def handle_check_in(event):
-    """Handle public check-in (no auth required)"""
+    """Handle public check-in (no auth required)
+    
+    One conditional put: the record is only written if today's record has no
+    check-in yet, so concurrent taps cannot both succeed.
+    """
     try:
         body = json.loads(event.get('body', '{}'))
         employee_id = body.get('employeeId')
@@ -75,23 +107,14 @@ def handle_check_in(event):
         if not employee_id:
             return response(400, {'error': 'employeeId is required'})
         
-        # Verify employee exists
-        employee = get_employee(employee_id)
+        # Verify employee exists (roster snapshot, get_item only on a miss)
+        employee = employee_roster.get(employee_id)
         if not employee:
             return response(404, {'error': 'Employee not found'})
         
-        # Check for existing check-in today (use app timezone)
+        # Create check-in record (use app timezone)
         now = datetime.now(APP_TIMEZONE)
         today = now.strftime('%Y-%m-%d')
-        existing = get_attendance_record(employee_id, today)
-        
-        if existing and existing.get('checkIn'):
-            return response(400, {
-                'error': 'Already checked in today',
-                'checkIn': existing.get('checkIn')
-            })
-        
-        # Create check-in record
         check_in_time = now.strftime('%H:%M')
         
         # Determine status based on check-in time
@@ -113,7 +136,19 @@ def handle_check_in(event):
             'updatedAt': now.isoformat()
         }
         
-        attendance_table.put_item(Item=record)
+        try:
+            attendance_table.put_item(
+                Item=record,
+                ConditionExpression='attribute_not_exists(checkIn)',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+        except ClientError as e:
+            if not is_condition_failure(e):
+                raise
+            return response(400, {
+                'error': 'Already checked in today',
+                'checkIn': condition_failure_item(e).get('checkIn')
+            })
         
         return response(200, {
             'success': True,
@@ -132,7 +167,13 @@ def handle_check_in(event):
 
 
 def handle_check_out(event):
-    """Handle public check-out (no auth required)"""
+    """Handle public check-out (no auth required)
+    
+    Points depend on the stored check-in, so today's record is read once
+    (strongly consistent) and updated with a condition that it still has that
+    check-in and no check-out. A concurrent check-out fails the condition
+    instead of overwriting the first one.
+    """
     try:
         body = json.loads(event.get('body', '{}'))
         employee_id = body.get('employeeId')
@@ -140,46 +181,57 @@ def handle_check_out(event):
         if not employee_id:
             return response(400, {'error': 'employeeId is required'})
         
-        # Verify employee exists
-        employee = get_employee(employee_id)
+        # Verify employee exists (roster snapshot, get_item only on a miss)
+        employee = employee_roster.get(employee_id)
         if not employee:
             return response(404, {'error': 'Employee not found'})
         
         # Check for existing check-in today (use app timezone)
         now = datetime.now(APP_TIMEZONE)
         today = now.strftime('%Y-%m-%d')
-        existing = get_attendance_record(employee_id, today)
-        
-        if not existing or not existing.get('checkIn'):
-            return response(400, {'error': 'No check-in found for today'})
-        
-        if existing.get('checkOut'):
-            return response(400, {
-                'error': 'Already checked out today',
-                'checkOut': existing.get('checkOut')
-            })
-        
-        # Update with check-out time
         check_out_time = now.strftime('%H:%M')
-        check_in_time = existing.get('checkIn')
-        
-        # Determine final status and calculate points
-        status, points360 = calculate_final_status_and_points(check_in_time, check_out_time)
+        existing = get_attendance_record(employee_id, today, consistent=True)
         
-        # Update record
-        attendance_table.update_item(
-            Key={'employeeId': employee_id, 'date': today},
-            UpdateExpression='SET checkOut = :co, #status = :status, points360 = :points, updatedAt = :updated',
-            ExpressionAttributeNames={
-                '#status': 'status'
-            },
-            ExpressionAttributeValues={
-                ':co': check_out_time,
-                ':status': status,
-                ':points': Decimal(str(points360)),
-                ':updated': now.isoformat()
-            }
-        )
+        # A failed condition hands back the current record; re-check it once
+        for _ in range(2):
+            if not existing or not existing.get('checkIn'):
+                return response(400, {'error': 'No check-in found for today'})
+            
+            if existing.get('checkOut'):
+                return response(400, {
+                    'error': 'Already checked out today',
+                    'checkOut': existing.get('checkOut')
+                })
+            
+            # Determine final status and calculate points
+            check_in_time = existing.get('checkIn')
+            status, points360 = calculate_final_status_and_points(check_in_time, check_out_time)
+            
+            try:
+                attendance_table.update_item(
+                    Key={'employeeId': employee_id, 'date': today},
+                    UpdateExpression='SET checkOut = :co, #status = :status, points360 = :points, updatedAt = :updated',
+                    ConditionExpression='checkIn = :ci AND attribute_not_exists(checkOut)',
+                    ExpressionAttributeNames={
+                        '#status': 'status'
+                    },
+                    ExpressionAttributeValues={
+                        ':co': check_out_time,
+                        ':ci': check_in_time,
+                        ':status': status,
+                        ':points': Decimal(str(points360)),
+                        ':updated': now.isoformat()
+                    },
+                    ReturnValuesOnConditionCheckFailure='ALL_OLD'
+                )
+                break
+            except ClientError as e:
+                if not is_condition_failure(e):
+                    raise
+                existing = condition_failure_item(e)
+        else:
+            # The kiosk only handles 200/400/404, so a record that keeps changing is a 400
+            return response(400, {'error': 'Attendance record changed during check-out, please try again'})
         
         return response(200, {
             'success': True,
@@ -205,8 +257,8 @@ def handle_check_status(path_parameters):
         if not employee_id:
             return response(400, {'error': 'employeeId is required'})
         
-        # Verify employee exists
-        employee = get_employee(employee_id)
+        # Verify employee exists (roster snapshot, get_item only on a miss)
+        employee = employee_roster.get(employee_id)
         if not employee:
             return response(404, {'error': 'Employee not found'})
         
@@ -242,49 +294,41 @@ def handle_list_attendance(query_params, user_role, user_department):
         employee_id = query_params.get('employeeId')
         status_filter = query_params.get('status')
         
+        # Single-day filter is shorthand for startDate = endDate = date
+        single_date = query_params.get('date')
+        if single_date:
+            start_date = start_date or single_date
+            end_date = end_date or single_date
+        
         # Role-based filtering
         if user_role == 'Manager' and not department:
             department = user_department
         elif user_role == 'Employee':
             return response(403, {'error': 'Employees cannot access attendance management'})
         
-        # Build filter expression
-        filter_expressions = []
-        expression_values = {}
-        expression_names = {}
-        
-        if department:
-            filter_expressions.append('department = :dept')
-            expression_values[':dept'] = department
-        
-        if status_filter:
-            filter_expressions.append('#status = :status')
-            expression_names['#status'] = 'status'
-            expression_values[':status'] = status_filter
-        
-        # Scan with filters
-        scan_kwargs = {}
-        if filter_expressions:
-            scan_kwargs['FilterExpression'] = ' AND '.join(filter_expressions)
-            scan_kwargs['ExpressionAttributeValues'] = expression_values
-            if expression_names:
-                scan_kwargs['ExpressionAttributeNames'] = expression_names
-        
-        result = attendance_table.scan(**scan_kwargs)
-        items = result.get('Items', [])
+        try:
+            limit, cursor = parse_page_params(query_params)
+        except PaginationError as e:
+            return response(400, {'error': str(e)})
+        
+        items, next_cursor = query_attendance(
+            department=department,
+            start_date=start_date,
+            end_date=end_date,
+            employee_id=employee_id,
+            status=status_filter,
+            limit=limit,
+            cursor=cursor
+        )
         
         # Convert Decimal to float for JSON serialization
         items = convert_decimals(items)
         
-        # Apply date range filter (post-scan)
-        if start_date:
-            items = [item for item in items if item.get('date', '') >= start_date]
-        if end_date:
-            items = [item for item in items if item.get('date', '') <= end_date]
-        if employee_id:
-            items = [item for item in items if item.get('employeeId') == employee_id]
-        
-        return response(200, {'records': items, 'count': len(items)})
+        return response(200, {
+            'records': items,
+            'count': len(items),
+            'nextToken': encode_token(next_cursor)
+        })
         
     except Exception as e:
         print(f"List attendance error: {str(e)}")
@@ -508,7 +552,13 @@ def handle_delete_attendance(path_params, user_role):
 
 
 def handle_bulk_import(event, user_role, user_department):
-    """Bulk import attendance records (Admin/Manager only)"""
+    """Bulk import attendance records (Admin/Manager only)
+    
+    Pipeline: resolve every referenced employee with BatchGetItem, validate
+    and score all rows in memory (one points batch), then write the records
+    with BatchWriteItem. Returns per-row errors for rows that were rejected
+    or could not be written.
+    """
     try:
         if user_role not in ['Admin', 'Manager']:
             return response(403, {'error': 'Only Admin and Manager can bulk import attendance'})
@@ -519,92 +569,93 @@ def handle_bulk_import(event, user_role, user_department):
         if not records:
             return response(400, {'error': 'No records provided'})
         
-        imported = 0
-        failed = 0
-        errors = []
+        timestamp = datetime.now(APP_TIMEZONE).isoformat()
+        employees = get_employees_batch({
+            record_data.get('employeeId') for record_data in records if record_data.get('employeeId')
+        })
+        scored = POINTS_ENGINE.score_records(
+            (record_data.get('checkIn'), record_data.get('checkOut')) for record_data in records
+        )
         
+        errors = []
+        pending = []
         for idx, record_data in enumerate(records):
-            try:
-                employee_id = record_data.get('employeeId')
-                date = record_data.get('date')
-                
-                if not employee_id or not date:
-                    errors.append({
-                        'row': idx + 1,
-                        'employeeId': employee_id or 'N/A',
-                        'error': 'Missing employeeId or date'
-                    })
-                    failed += 1
-                    continue
-                
-                # Verify employee
-                employee = get_employee(employee_id)
-                if not employee:
-                    errors.append({
-                        'row': idx + 1,
-                        'employeeId': employee_id,
-                        'error': 'Employee not found'
-                    })
-                    failed += 1
-                    continue
-                
-                # Manager can only import for their department
-                if user_role == 'Manager' and employee.get('department') != user_department:
-                    errors.append({
-                        'row': idx + 1,
-                        'employeeId': employee_id,
-                        'error': 'Can only import for your department'
-                    })
-                    failed += 1
-                    continue
-                
-                # Create record
-                check_in = record_data.get('checkIn')
-                check_out = record_data.get('checkOut')
-                status = record_data.get('status', 'work')
-                reason = record_data.get('reason', '')
-                paid_leave = record_data.get('paidLeave', False)
-                
-                points360 = 0
-                if check_in and check_out:
-                    status, points360 = calculate_final_status_and_points(check_in, check_out)
-                elif paid_leave:
-                    status = 'off'
-                
-                record = {
+            employee_id = record_data.get('employeeId')
+            date = record_data.get('date')
+            
+            if not employee_id or not date:
+                errors.append({
+                    'row': idx + 1,
+                    'employeeId': employee_id or 'N/A',
+                    'error': 'Missing employeeId or date'
+                })
+                continue
+            
+            employee = employees.get(employee_id)
+            if not employee:
+                errors.append({
+                    'row': idx + 1,
                     'employeeId': employee_id,
-                    'date': date,
-                    'position': employee.get('position', ''),
-                    'department': employee.get('department', ''),
-                    'status': status,
-                    'points360': Decimal(str(points360)),
-                    'paidLeave': paid_leave,
-                    'createdAt': datetime.now(APP_TIMEZONE).isoformat(),
-                    'updatedAt': datetime.now(APP_TIMEZONE).isoformat()
-                }
-                
-                if check_in:
-                    record['checkIn'] = check_in
-                if check_out:
-                    record['checkOut'] = check_out
-                if reason:
-                    record['reason'] = reason
-                
-                attendance_table.put_item(Item=record)
-                imported += 1
-                
-            except Exception as e:
+                    'error': 'Employee not found'
+                })
+                continue
+            
+            # Manager can only import for their department
+            if user_role == 'Manager' and employee.get('department') != user_department:
                 errors.append({
                     'row': idx + 1,
-                    'employeeId': record_data.get('employeeId', 'N/A'),
-                    'error': str(e)
+                    'employeeId': employee_id,
+                    'error': 'Can only import for your department'
                 })
-                failed += 1
+                continue
+            
+            # Create record
+            check_in = record_data.get('checkIn')
+            check_out = record_data.get('checkOut')
+            status = record_data.get('status', 'work')
+            reason = record_data.get('reason', '')
+            paid_leave = record_data.get('paidLeave', False)
+            
+            points360 = 0
+            if check_in and check_out:
+                status, points360 = scored[idx] or ('work', 0)
+            elif paid_leave:
+                status = 'off'
+            
+            record = {
+                'employeeId': employee_id,
+                'date': date,
+                'position': employee.get('position', ''),
+                'department': employee.get('department', ''),
+                'status': status,
+                'points360': Decimal(str(points360)),
+                'paidLeave': paid_leave,
+                'createdAt': timestamp,
+                'updatedAt': timestamp
+            }
+            
+            if check_in:
+                record['checkIn'] = check_in
+            if check_out:
+                record['checkOut'] = check_out
+            if reason:
+                record['reason'] = reason
+            
+            pending.append((idx, record))
+        
+        # Rows sharing a key are collapsed to the last one, so a failed key fails all of its rows
+        failures = batch_put_items(dynamodb, ATTENDANCE_TABLE, [record for _, record in pending], ('employeeId', 'date'))
+        failed_keys = {(record['employeeId'], record['date']): error for record, error in failures}
+        for idx, record in pending:
+            error = failed_keys.get((record['employeeId'], record['date']))
+            if error:
+                errors.append({'row': idx + 1, 'employeeId': record['employeeId'], 'error': error})
+        errors.sort(key=lambda error: error['row'])
         
         return response(200, {
             'success': True,
-            'imported': imported,
-            'failed': failed,
+            'imported': len(records) - len(errors),
+            'failed': len(errors),
             'errors': errors if errors else None
         })
         
@@ -615,6 +666,460 @@ def handle_bulk_import(event, user_role, user_department):
         return response(500, {'error': str(e)})
 
 
+# Query planning
+
+# Longest date range served by one date-index query per day; wider ranges
+# without a department or employee filter fall back to a scan
+MAX_DATE_FANOUT_DAYS = int(os.environ.get('MAX_DATE_FANOUT_DAYS', '31'))
+
+
+def plan_attendance_query(department=None, start_date=None, end_date=None, employee_id=None):
+    """Choose the cheapest access path for the supplied filters.
+    
+    Returns one of:
+    - 'employee': base table query on employeeId (+ date range on the sort key)
+    - 'department': department-date-index query (+ date range on the sort key)
+    - 'date': one date-index query per day between startDate and endDate
+    - 'scan': filtered scan, only when no key condition applies
+    """
+    if employee_id:
+        return 'employee'
+    if department:
+        return 'department'
+    if start_date and end_date:
+        days = date_range_days(start_date, end_date)
+        if days is not None and 0 < days <= MAX_DATE_FANOUT_DAYS:
+            return 'date'
+    return 'scan'
+
+
+def query_attendance(department=None, start_date=None, end_date=None, employee_id=None, status=None,
+                     limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Fetch one page of attendance records using the access path picked by plan_attendance_query.
+    
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    plan = plan_attendance_query(department, start_date, end_date, employee_id)
+    print(f"Attendance query plan: {plan} (department={department}, startDate={start_date}, "
+          f"endDate={end_date}, employeeId={employee_id}, status={status})")
+    
+    # Filters that are not part of the chosen key condition
+    filter_condition = None
+    if status:
+        filter_condition = Attr('status').eq(status)
+    if department and plan != 'department':
+        dept_condition = Attr('department').eq(department)
+        filter_condition = dept_condition if filter_condition is None else filter_condition & dept_condition
+    
+    if plan == 'employee':
+        key_condition = Key('employeeId').eq(employee_id)
+        date_condition = date_key_condition(start_date, end_date)
+        if date_condition is not None:
+            key_condition = key_condition & date_condition
+        return fetch_key_page(attendance_table.query, with_filter({
+            'KeyConditionExpression': key_condition
+        }, filter_condition), limit, cursor)
+    
+    if plan == 'department':
+        key_condition = Key('department').eq(department)
+        date_condition = date_key_condition(start_date, end_date)
+        if date_condition is not None:
+            key_condition = key_condition & date_condition
+        return fetch_key_page(attendance_table.query, with_filter({
+            'IndexName': 'department-date-index',
+            'KeyConditionExpression': key_condition
+        }, filter_condition), limit, cursor)
+    
+    if plan == 'date':
+        # Cursor carries the day being read plus the key within that day
+        cursor = cursor or {}
+        resume_day = cursor.get('d')
+        start_key = cursor.get('k')
+        items = []
+        for day in iter_dates(resume_day or start_date, end_date):
+            page, last_key = fetch_page(attendance_table.query, with_filter({
+                'IndexName': 'date-index',
+                'KeyConditionExpression': Key('date').eq(day)
+            }, filter_condition), limit - len(items), start_key)
+            items.extend(page)
+            start_key = None
+            if last_key:
+                return items, {'d': day, 'k': last_key}
+            if len(items) >= limit:
+                next_day = next_date(day)
+                return items, ({'d': next_day} if next_day <= end_date else None)
+        return items, None
+    
+    # No usable key condition - paginated scan with the date range pushed into the filter
+    if start_date and end_date:
+        range_condition = Attr('date').between(start_date, end_date)
+    elif start_date:
+        range_condition = Attr('date').gte(start_date)
+    elif end_date:
+        range_condition = Attr('date').lte(end_date)
+    else:
+        range_condition = None
+    if range_condition is not None:
+        filter_condition = range_condition if filter_condition is None else filter_condition & range_condition
+    return fetch_key_page(attendance_table.scan, with_filter({}, filter_condition), limit, cursor)
+
+
+def date_key_condition(start_date, end_date):
+    """Build a sort key condition on date from an optional range"""
+    if start_date and end_date:
+        return Key('date').between(start_date, end_date)
+    if start_date:
+        return Key('date').gte(start_date)
+    if end_date:
+        return Key('date').lte(end_date)
+    return None
+
+
+def with_filter(kwargs, filter_condition):
+    """Attach a FilterExpression to query/scan kwargs when one is set"""
+    if filter_condition is not None:
+        kwargs['FilterExpression'] = filter_condition
+    return kwargs
+
+
+def date_range_days(start_date, end_date):
+    """Number of days in an inclusive YYYY-MM-DD range, or None if unparsable"""
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        return (end - start).days + 1
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_dates(start_date, end_date):
+    """Yield each YYYY-MM-DD date in an inclusive range"""
+    current = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    while current <= end:
+        yield current.strftime('%Y-%m-%d')
+        current += timedelta(days=1)
+
+
+def next_date(day):
+    """Return the YYYY-MM-DD date following day"""
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+# Auto-absence
+
+# Days (Monday = 0) on which missing check-ins become absent records;
+# open sessions are closed every day
+AUTO_ABSENCE_WEEKDAYS = {int(day) for day in os.environ.get('AUTO_ABSENCE_WEEKDAYS', '0,1,2,3,4').split(',') if day.strip()}
+# Concurrent conditional writes per run
+AUTO_ABSENCE_WORKERS = int(os.environ.get('AUTO_ABSENCE_WORKERS', '16'))
+
+
+def list_active_employees():
+    """Active employees from one projected scan: {employeeId: (department, position)}"""
+    employees = {}
+    for item in iter_items(employees_table.scan, {
+        'ProjectionExpression': 'employeeId, department, #pos, #status',
+        'ExpressionAttributeNames': {'#pos': 'position', '#status': 'status'}
+    }):
+        if item.get('status', 'active') == 'active':
+            employees[item['employeeId']] = (item.get('department', ''), item.get('position', ''))
+    return employees
+
+
+def run_auto_absence(date=None):
+    """Mark the day's missing attendance as absent with 0 points.
+    
+    One date-index query reads every record for the day and one projected scan
+    lists active employees. Open sessions (check-in without check-out) are
+    closed as absent, and employees with no record get an absent record on
+    working days.
+    
+    The index is eventually consistent and kiosks keep writing while the job
+    runs, so every write is conditional: a closure only applies while the
+    record still has the same check-in and status and no check-out, and an
+    absent record is only created if no record exists. A check-out, check-in
+    or admin edit that lands first wins and the row is counted as skipped.
+    The writes run on a small thread pool, each worker with its own table handle.
+    
+    Records that are already absent, closed or on paid leave are left alone,
+    so rerunning the job (after a timeout or for a past date) only writes
+    what is still missing.
+    
+    date defaults to today in the app timezone, or to yesterday before noon,
+    so a trigger that slips past midnight still closes the right day.
+    """
+    now = datetime.now(APP_TIMEZONE)
+    if not date:
+        date = (now - timedelta(hours=12)).strftime('%Y-%m-%d') if now.hour < 12 else now.strftime('%Y-%m-%d')
+    timestamp = now.isoformat()
+    
+    records = {}
+    for item in iter_items(attendance_table.query, {
+        'IndexName': 'date-index',
+        'KeyConditionExpression': Key('date').eq(date)
+    }):
+        records[item['employeeId']] = item
+    
+    open_sessions = [
+        record for record in records.values()
+        if record.get('checkIn') and not record.get('checkOut') and record.get('status') != 'absent'
+        and not record.get('paidLeave')
+    ]
+    
+    employees = list_active_employees()
+    missing = []
+    if datetime.strptime(date, '%Y-%m-%d').weekday() in AUTO_ABSENCE_WEEKDAYS:
+        missing = sorted(employees.keys() - records.keys())
+    
+    with ThreadPoolExecutor(max_workers=AUTO_ABSENCE_WORKERS) as pool:
+        closures = list(pool.map(lambda record: close_open_session(record, timestamp), open_sessions))
+        absences = list(pool.map(
+            lambda employee_id: create_absence(employee_id, date, employees[employee_id], timestamp), missing
+        ))
+    outcomes = closures + absences
+    
+    summary = {
+        'date': date,
+        'employees': len(employees),
+        'records': len(records),
+        'closed': closures.count('written'),
+        'markedAbsent': absences.count('written'),
+        'skipped': outcomes.count('skipped'),
+        'failed': outcomes.count('failed')
+    }
+    print(f"Auto-absence: {json.dumps(summary)}")
+    return summary
+
+
+def thread_table(table_name):
+    """Table handle for the current worker thread (boto3 resources are not thread-safe)"""
+    tables = getattr(_thread_state, 'tables', None)
+    if tables is None:
+        _thread_state.resource = boto3.session.Session().resource('dynamodb')
+        tables = _thread_state.tables = {}
+    table = tables.get(table_name)
+    if table is None:
+        table = tables[table_name] = _thread_state.resource.Table(table_name)
+    return table
+
+
+def close_open_session(record, timestamp):
+    """Close an open session as absent unless it changed since it was read"""
+    values = {
+        ':absent': 'absent',
+        ':zero': Decimal('0'),
+        ':reason': record.get('reason') or 'Auto-marked absent: no check-out',
+        ':updated': timestamp,
+        ':ci': record['checkIn']
+    }
+    condition = 'checkIn = :ci AND attribute_not_exists(checkOut)'
+    if record.get('status') is None:
+        condition += ' AND attribute_not_exists(#status)'
+    else:
+        condition += ' AND #status = :status'
+        values[':status'] = record['status']
+    try:
+        thread_table(ATTENDANCE_TABLE).update_item(
+            Key={'employeeId': record['employeeId'], 'date': record['date']},
+            UpdateExpression='SET #status = :absent, points360 = :zero, reason = :reason, updatedAt = :updated',
+            ConditionExpression=condition,
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues=values
+        )
+        return 'written'
+    except ClientError as e:
+        if is_condition_failure(e):
+            return 'skipped'
+        print(f"Failed to close session for {record['employeeId']} on {record['date']}: {str(e)}")
+        return 'failed'
+
+
+def create_absence(employee_id, date, employee, timestamp):
+    """Write an absent record unless one was created since the index was read"""
+    department, position = employee
+    try:
+        thread_table(ATTENDANCE_TABLE).put_item(
+            Item={
+                'employeeId': employee_id,
+                'date': date,
+                'position': position,
+                'department': department,
+                'status': 'absent',
+                'points360': Decimal('0'),
+                'paidLeave': False,
+                'reason': 'Auto-marked absent: no check-in',
+                'createdAt': timestamp,
+                'updatedAt': timestamp
+            },
+            ConditionExpression='attribute_not_exists(employeeId)'
+        )
+        return 'written'
+    except ClientError as e:
+        if is_condition_failure(e):
+            return 'skipped'
+        print(f"Failed to mark {employee_id} absent on {date}: {str(e)}")
+        return 'failed'
+
+
+# Quarterly 360 aggregation
+
+# Paid-leave days are credited as a full day (see "360 Points Calculation" in the README)
+PAID_LEAVE_POINTS = Decimal(os.environ.get('PAID_LEAVE_POINTS', '80'))
+FEEDBACK_360_MAX = Decimal('100')
+QUARTER_PATTERN = re.compile(r'^(\d{4})-Q?([1-4])$')
+
+
+def quarter_of(day):
+    """'2025-05-14' -> '2025-Q2'"""
+    return f"{day[:4]}-Q{(int(day[5:7]) - 1) // 3 + 1}"
+
+
+def quarter_range(period):
+    """First and last YYYY-MM-DD of a '2025-Q2' (or '2025-2') period"""
+    match = QUARTER_PATTERN.match(str(period or ''))
+    if not match:
+        raise ValueError(f"Invalid quarter: {period}")
+    year, quarter = int(match.group(1)), int(match.group(2))
+    start = datetime(year, (quarter - 1) * 3 + 1, 1)
+    end = datetime(year + quarter // 4, quarter * 3 % 12 + 1, 1) - timedelta(days=1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+def list_departments():
+    """Distinct departments from one projected scan of the Employees table"""
+    departments = set()
+    for item in iter_items(employees_table.scan, {'ProjectionExpression': 'department'}):
+        if item.get('department'):
+            departments.add(item['department'])
+    return sorted(departments)
+
+
+def accumulate_quarter_points(departments, start_date, end_date):
+    """Running 360 point sums per employee and quarter.
+    
+    Reads each department's date range in one paginated department-date-index
+    query, so the cost is one query per department however many employees and
+    days it covers. Returns {(employeeId, 'YYYY-QN'): [total_points, days]}.
+    """
+    totals = {}
+    for department in departments:
+        for item in iter_items(attendance_table.query, {
+            'IndexName': 'department-date-index',
+            'KeyConditionExpression': Key('department').eq(department) & Key('date').between(start_date, end_date),
+            'ProjectionExpression': 'employeeId, #date, points360, paidLeave',
+            'ExpressionAttributeNames': {'#date': 'date'}
+        }):
+            if item.get('paidLeave'):
+                points = PAID_LEAVE_POINTS
+            else:
+                points = Decimal(str(item.get('points360', 0)))
+            key = (item['employeeId'], quarter_of(item['date']))
+            total = totals.get(key)
+            if total is None:
+                totals[key] = [points, 1]
+            else:
+                total[0] += points
+                total[1] += 1
+    return totals
+
+
+def feedback_360_from(total_points, days):
+    """Average daily 360 points, capped to the 0-100 score scale"""
+    return min(round(total_points / days, 2), FEEDBACK_360_MAX)
+
+
+def update_feedback_360(totals):
+    """Write quarterly averages into PerformanceScores.kpiScores.feedback_360.
+    
+    Existing score items are fetched with BatchGetItem under both period
+    spellings ('2025-Q2' and '2025-2'), updated in memory and written back with
+    BatchWriteItem. Employees without a score item for the quarter are only
+    counted; a score is never created from attendance alone.
+    """
+    keys = []
+    for employee_id, quarter in totals:
+        year, number = quarter.split('-Q')
+        keys.append({'employeeId': employee_id, 'period': quarter})
+        keys.append({'employeeId': employee_id, 'period': f"{year}-{number}"})
+    
+    now = datetime.utcnow().isoformat()
+    changes = []
+    unchanged = 0
+    matched = set()
+    for existing in batch_get_items(dynamodb, PERFORMANCE_SCORES_TABLE, keys):
+        match = QUARTER_PATTERN.match(existing['period'])
+        key = (existing['employeeId'], f"{match.group(1)}-Q{match.group(2)}")
+        matched.add(key)
+        feedback = feedback_360_from(*totals[key])
+        
+        kpi_scores = dict(existing.get('kpiScores', {}))
+        if kpi_scores.get('feedback_360') == feedback:
+            unchanged += 1
+            continue
+        kpi_scores['feedback_360'] = feedback
+        
+        updated = dict(existing)
+        updated['kpiScores'] = kpi_scores
+        updated['overallScore'] = (
+            kpi_scores.get('KPI', Decimal('0')) + kpi_scores.get('completed_task', Decimal('0')) + feedback
+        ) / 3
+        updated['updatedAt'] = now
+        changes.append((existing, updated))
+    
+    failures = batch_put_items(dynamodb, PERFORMANCE_SCORES_TABLE, [new for _, new in changes],
+                               ('employeeId', 'period'))
+    failed_keys = {(item['employeeId'], item['period']) for item, _ in failures}
+    for item, error in failures[:20]:
+        print(f"Failed to update feedback_360 for {item['employeeId']}/{item['period']}: {error}")
+    
+    written = [(old, new) for old, new in changes if (new['employeeId'], new['period']) not in failed_keys]
+    if written:
+        apply_score_changes(dynamodb, written)
+        mark_scoring_inputs_changed(dynamodb, 'attendance_quarterly_aggregation')
+    
+    return {
+        'updated': len(written),
+        'unchanged': unchanged,
+        'failed': len(failed_keys),
+        'missingScores': len(set(totals) - matched)
+    }
+
+
+def run_quarterly_aggregation(periods=None, departments=None):
+    """Average each employee's daily points360 per quarter into feedback_360.
+    
+    periods: a quarter or list of quarters ('2025-Q2'); defaults to the current
+    quarter in the app timezone, so the end-of-quarter schedule closes it and
+    earlier runs keep a quarter-to-date value. Several quarters are read in a
+    single pass per department. departments defaults to every department in
+    the Employees table.
+    """
+    if not periods:
+        periods = [quarter_of(datetime.now(APP_TIMEZONE).strftime('%Y-%m-%d'))]
+    elif isinstance(periods, str):
+        periods = [periods]
+    ranges = [quarter_range(period) for period in periods]
+    quarters = {quarter_of(start) for start, _ in ranges}
+    start_date = min(start for start, _ in ranges)
+    end_date = max(end for _, end in ranges)
+    departments = departments or list_departments()
+    
+    totals = accumulate_quarter_points(departments, start_date, end_date)
+    # Drop quarters that fall between non-adjacent requested periods
+    totals = {key: total for key, total in totals.items() if key[1] in quarters}
+    
+    summary = {
+        'periods': sorted(quarters),
+        'departments': len(departments),
+        'employees': len({employee_id for employee_id, _ in totals}),
+        'records': sum(days for _, days in totals.values())
+    }
+    summary.update(update_feedback_360(totals))
+    print(f"Quarterly 360 aggregation: {json.dumps(summary)}")
+    return summary
+
+
 # Helper functions
 
 def get_employee(employee_id):
@@ -627,11 +1132,24 @@ def get_employee(employee_id):
         return None
 
 
-def get_attendance_record(employee_id, date):
+def get_employees_batch(employee_ids):
+    """Resolve many employees with chunked BatchGetItem: {employeeId: employee}"""
+    items = batch_get_items(
+        dynamodb,
+        EMPLOYEES_TABLE,
+        [{'employeeId': employee_id} for employee_id in employee_ids],
+        projection='employeeId, #n, department, #pos',
+        expression_names={'#n': 'name', '#pos': 'position'}
+    )
+    return {item['employeeId']: item for item in items}
+
+
+def get_attendance_record(employee_id, date, consistent=False):
     """Get attendance record"""
     try:
         result = attendance_table.get_item(
-            Key={'employeeId': employee_id, 'date': date}
+            Key={'employeeId': employee_id, 'date': date},
+            ConsistentRead=consistent
         )
         return result.get('Item')
     except Exception as e:
@@ -639,74 +1157,30 @@ def get_attendance_record(employee_id, date):
         return None
 
 
+def is_condition_failure(error):
+    """True for a ClientError raised by a failed ConditionExpression"""
+    return error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+def condition_failure_item(error):
+    """Current item returned with a failed condition (ReturnValuesOnConditionCheckFailure=ALL_OLD)"""
+    item = error.response.get('Item') or {}
+    return {key: deserializer.deserialize(value) for key, value in item.items()}
+
+
 def determine_check_in_status(check_in_time):
     """Determine status based on check-in time"""
     try:
-        hour, minute = map(int, check_in_time.split(':'))
-        check_in = time(hour, minute)
-        
-        if check_in < time(6, 0):
-            return 'early_bird'
-        elif check_in > time(9, 0):
-            return 'late'
-        else:
-            return 'work'
-    except:
+        return check_in_status(check_in_time)
+    except (TypeError, ValueError):
         return 'work'
 
 
 def calculate_final_status_and_points(check_in_time, check_out_time):
     """Calculate final status and 360 points based on check-in and check-out times"""
     try:
-        # Parse times
-        ci_hour, ci_minute = map(int, check_in_time.split(':'))
-        co_hour, co_minute = map(int, check_out_time.split(':'))
-        
-        check_in = time(ci_hour, ci_minute)
-        check_out = time(co_hour, co_minute)
-        
-        # Calculate hours worked
-        ci_minutes = ci_hour * 60 + ci_minute
-        co_minutes = co_hour * 60 + co_minute
-        total_minutes = co_minutes - ci_minutes
-        hours_worked = total_minutes / 60.0
-        
-        # Base points: 10 points per hour
-        base_points_per_hour = 10
-        points = 0
-        status = 'work'
-        
-        # Early bird bonus (before 6:00 AM, 1.25x until 8:00 AM)
-        if check_in < time(6, 0):
-            early_end = min(time(8, 0), check_out)
-            early_minutes = (early_end.hour * 60 + early_end.minute) - (6 * 60)
-            if early_minutes > 0:
-                early_hours = early_minutes / 60.0
-                points += early_hours * base_points_per_hour * 1.25
-                status = 'early_bird'
-        
-        # Regular work hours (6:00 AM - 5:00 PM)
-        regular_start = max(check_in, time(6, 0))
-        regular_end = min(check_out, time(17, 0))
-        if regular_end > regular_start:
-            regular_minutes = (regular_end.hour * 60 + regular_end.minute) - (regular_start.hour * 60 + regular_start.minute)
-            regular_hours = regular_minutes / 60.0
-            points += regular_hours * base_points_per_hour
-        
-        # Overtime bonus (after 5:00 PM, 1.5x)
-        if check_out > time(17, 0):
-            ot_minutes = (co_hour * 60 + co_minute) - (17 * 60)
-            ot_hours = ot_minutes / 60.0
-            points += ot_hours * base_points_per_hour * 1.5
-            status = 'OT'
-        
-        # Late penalty
-        if check_in > time(9, 0) and status == 'work':
-            status = 'late'
-        
-        return status, round(points, 2)
-        
-    except Exception as e:
+        return calculate_points(check_in_time, check_out_time)
+    except (TypeError, ValueError) as e:
         print(f"Error calculating points: {str(e)}")
         return 'work', 0
 
@@ -723,15 +1197,9 @@ def extract_user_email(event):
 def get_user_info(email):
     """Get user role and department from Users table"""
     try:
-        # Query by email using GSI
-        result = users_table.query(
-            IndexName='email-index',
-            KeyConditionExpression=Key('email').eq(email)
-        )
-        
-        items = result.get('Items', [])
-        if items:
-            user = items[0]
+        # Query by email using GSI (cached per container)
+        user = get_user_by_email(users_table, email)
+        if user:
             return user.get('role', 'Employee'), user.get('department', '')
         
         return 'Employee', ''
@@ -6,6 +6,11 @@ $roleArn = "arn:aws:iam::151507815244:role/insighthr-lambda-execution-role-dev"
 
 Write-Host "Deploying $functionName Lambda function..." -ForegroundColor Cyan
 
+# Package handler with shared modules
+Write-Host "Packaging Lambda function..." -ForegroundColor Yellow
+Compress-Archive -Path lambda/attendance/attendance_handler.py, lambda/shared/*.py `
+    -DestinationPath lambda/attendance/attendance_handler.zip -Force
+
 # Check if function exists
 $functionExists = aws lambda get-function --function-name $functionName --region $region 2>$null
 if ($LASTEXITCODE -eq 0) {
@@ -22,7 +27,7 @@ if ($LASTEXITCODE -eq 0) {
         
         # Update environment variables
         Write-Host "Updating environment variables..." -ForegroundColor Yellow
-        $envVars = 'Variables={ATTENDANCE_TABLE=insighthr-attendance-history-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev}'
+        $envVars = 'Variables={ATTENDANCE_TABLE=insighthr-attendance-history-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev,PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,PERFORMANCE_AGGREGATES_TABLE=insighthr-performance-aggregates-dev,SCORING_STATE_TABLE=insighthr-scoring-state-dev}'
         aws lambda update-function-configuration `
             --function-name $functionName `
             --environment $envVars `
@@ -38,7 +43,7 @@ if ($LASTEXITCODE -eq 0) {
     Write-Host "Function does not exist. Creating new function..." -ForegroundColor Yellow
     
     # Create function
-    $envVars = 'Variables={ATTENDANCE_TABLE=insighthr-attendance-history-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev}'
+    $envVars = 'Variables={ATTENDANCE_TABLE=insighthr-attendance-history-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev,PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,PERFORMANCE_AGGREGATES_TABLE=insighthr-performance-aggregates-dev,SCORING_STATE_TABLE=insighthr-scoring-state-dev}'
     aws lambda create-function `
         --function-name $functionName `
         --runtime python3.11 `
@@ -48,7 +48,7 @@ Write-Host "Installing dependencies..." -ForegroundColor Cyan
 pip install PyJWT -t ./package 2>$null
 
 # Create zip file
-Compress-Archive -Path password_reset_handler.py -DestinationPath password-reset-handler.zip -Force
+Compress-Archive -Path password_reset_handler.py, ..\shared\*.py -DestinationPath password-reset-handler.zip -Force
 if (Test-Path "./package") {
     Compress-Archive -Path ./package/* -DestinationPath password-reset-handler.zip -Update
     Remove-Item -Recurse -Force ./package
@@ -6,6 +6,7 @@ import secrets
 from datetime import datetime
 from botocore.exceptions import ClientError
 import jwt
+from identity import get_user_by_id, get_user_by_email
 
 # Initialize AWS clients
 cognito_client = boto3.client('cognito-idp')
@@ -39,12 +40,11 @@ def extract_user_from_token(event):
         if not user_id:
             return None, 'Invalid token: missing user ID'
         
-        # Get user from DynamoDB to get role
-        response = users_table.get_item(Key={'userId': user_id})
-        if 'Item' not in response:
+        # Get user from DynamoDB to get role (cached per container)
+        user = get_user_by_id(users_table, user_id)
+        if not user:
             return None, 'User not found in database'
         
-        user = response['Item']
         return user, None
         
     except Exception as e:
@@ -106,15 +106,11 @@ def handle_request_reset(event):
         
         # Check if user exists
         try:
-            response = users_table.scan(
-                FilterExpression='email = :email',
-                ExpressionAttributeValues={':email': email}
-            )
+            user = get_user_by_email(users_table, email)
             
-            if not response.get('Items'):
+            if not user:
                 return error_response(404, 'User not found')
             
-            user = response['Items'][0]
             user_id = user['userId']
             
         except Exception as e:
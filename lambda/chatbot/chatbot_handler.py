@@ -1,9 +1,24 @@
+import hashlib
+import heapq
 import json
 import boto3
 import os
 import logging
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from identity import TTLCache, USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS, get_user_by_email, get_employee_record
+from batch import batch_get_items
+from pagination import iter_items
+from scoring_trigger import get_scoring_state
+from aggregates import PERFORMANCE_AGGREGATES_TABLE, summarize_aggregate
+from prompt_guard import find_prompt_injection
 
 # Configure logging
 logger = logging.getLogger()
@@ -12,6 +27,7 @@ logger.setLevel(logging.INFO)
 # Initialize AWS clients
 bedrock_runtime = boto3.client('bedrock-runtime', region_name=os.environ.get('BEDROCK_REGION', 'ap-southeast-1'))
 dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-1')
+lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'ap-southeast-1'))
 
 # Environment variables - All InsightHR DynamoDB tables
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
@@ -24,6 +40,44 @@ DATA_TABLES_TABLE = os.environ.get('DATA_TABLES_TABLE', 'insighthr-data-tables-d
 NOTIFICATION_RULES_TABLE = os.environ.get('NOTIFICATION_RULES_TABLE', 'insighthr-notification-rules-dev')
 NOTIFICATION_HISTORY_TABLE = os.environ.get('NOTIFICATION_HISTORY_TABLE', 'insighthr-notification-history-dev')
 PASSWORD_RESET_REQUESTS_TABLE = os.environ.get('PASSWORD_RESET_REQUESTS_TABLE', 'insighthr-password-reset-requests-dev')
+CHAT_STREAMS_TABLE = os.environ.get('CHAT_STREAMS_TABLE', 'insighthr-chat-streams-dev')
+CHAT_CONVERSATIONS_TABLE = os.environ.get('CHAT_CONVERSATIONS_TABLE', 'insighthr-chat-conversations-dev')
+CHAT_RESPONSE_CACHE_TABLE = os.environ.get('CHAT_RESPONSE_CACHE_TABLE', 'insighthr-chat-response-cache-dev')
+
+# Upper bound on records read per query when building context
+CONTEXT_MAX_RECORDS = int(os.environ.get('CONTEXT_MAX_RECORDS', '500'))
+# Approximate prompt tokens spent on data records (~4 characters per token)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONTEXT_TOKEN_BUDGET', '6000'))
+# Streaming replies: chunks are flushed to the stream item at most this often
+CHAT_STREAM_FLUSH_MS = int(os.environ.get('CHAT_STREAM_FLUSH_MS', '250'))
+CHAT_STREAM_TTL_SECONDS = int(os.environ.get('CHAT_STREAM_TTL_SECONDS', '3600'))
+# A pending or streaming item not updated for this long is reported as failed (keep above the function timeout)
+CHAT_STREAM_STALE_SECONDS = int(os.environ.get('CHAT_STREAM_STALE_SECONDS', '90'))
+# 'true' streams in-process instead of re-invoking this function (local runs/tests)
+CHAT_STREAM_INLINE = os.environ.get('CHAT_STREAM_INLINE', 'false').lower() == 'true'
+# Conversation history: recent messages verbatim, older ones folded into a server-side summary
+HISTORY_WINDOW_MESSAGES = int(os.environ.get('HISTORY_WINDOW_MESSAGES', '6'))
+HISTORY_SUMMARY_BATCH = int(os.environ.get('HISTORY_SUMMARY_BATCH', '4'))
+HISTORY_TOKEN_BUDGET = int(os.environ.get('HISTORY_TOKEN_BUDGET', '1500'))
+HISTORY_SUMMARY_MAX_WORDS = int(os.environ.get('HISTORY_SUMMARY_MAX_WORDS', '150'))
+CHAT_CONVERSATION_TTL_SECONDS = int(os.environ.get('CHAT_CONVERSATION_TTL_SECONDS', str(7 * 24 * 3600)))
+# Response cache: repeated questions within the TTL skip retrieval and Bedrock
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '900'))
+RESPONSE_CACHE_MAX_SIZE = int(os.environ.get('RESPONSE_CACHE_MAX_SIZE', '256'))
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'InsightHR/Chatbot')
+# Context sources are fetched concurrently; a source slower than this is left out
+CONTEXT_FETCH_TIMEOUT_SECONDS = float(os.environ.get('CONTEXT_FETCH_TIMEOUT_SECONDS', '3'))
+CONTEXT_FETCH_WORKERS = int(os.environ.get('CONTEXT_FETCH_WORKERS', '8'))
+# Server-side analytics injected into the prompt
+ANALYTICS_TOP_N = int(os.environ.get('ANALYTICS_TOP_N', '10'))
+ANALYTICS_MAX_ROWS = int(os.environ.get('ANALYTICS_MAX_ROWS', '40'))
+ANALYTICS_PERIODS = int(os.environ.get('ANALYTICS_PERIODS', '4'))
+# Record format in the prompt: 'table' (compact, header once) or 'verbose'
+CONTEXT_ENCODER = os.environ.get('CONTEXT_ENCODER', 'table')
+# Department codes recognized in questions: these plus every department in the aggregates table
+KNOWN_DEPARTMENTS = [d.strip() for d in os.environ.get('KNOWN_DEPARTMENTS', 'DEV,QA,DAT,SEC,AI').split(',') if d.strip()]
+DEPARTMENT_CACHE_TTL_SECONDS = int(os.environ.get('DEPARTMENT_CACHE_TTL_SECONDS', '900'))
 
 # Initialize DynamoDB tables
 employees_table = dynamodb.Table(EMPLOYEES_TABLE)
@@ -35,6 +89,26 @@ data_tables_table = dynamodb.Table(DATA_TABLES_TABLE)
 notification_rules_table = dynamodb.Table(NOTIFICATION_RULES_TABLE)
 notification_history_table = dynamodb.Table(NOTIFICATION_HISTORY_TABLE)
 password_reset_requests_table = dynamodb.Table(PASSWORD_RESET_REQUESTS_TABLE)
+chat_streams_table = dynamodb.Table(CHAT_STREAMS_TABLE)
+chat_conversations_table = dynamodb.Table(CHAT_CONVERSATIONS_TABLE)
+response_cache_table = dynamodb.Table(CHAT_RESPONSE_CACHE_TABLE)
+
+
+# Worker pool for context fetches, reused across warm invocations
+fetch_pool = ThreadPoolExecutor(max_workers=CONTEXT_FETCH_WORKERS, thread_name_prefix='context')
+_thread_state = threading.local()
+
+# Joined Users + Employees profile per caller email, kept across warm invocations
+profile_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+# Cached replies per cache key, in front of the shared response cache table
+local_response_cache = TTLCache(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+response_cache_stats = {'hit': 0, 'miss': 0, 'bypass': 0}
+# Department codes read from the aggregates table, kept across warm invocations
+department_cache = TTLCache(1, DEPARTMENT_CACHE_TTL_SECONDS)
+
+# Fallback replies are never cached
+NO_RESPONSE_REPLY = "I apologize, but I couldn't generate a response. Please try again."
+ERROR_REPLY = "I encountered an error while processing your request. Please try again later."
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -45,16 +119,42 @@ class DecimalEncoder(json.JSONEncoder):
         return super(DecimalEncoder, self).default(obj)
 
 
+def cors_headers():
+    """Return CORS headers for API Gateway responses"""
+    return {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+        'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+    }
+
+
+def response(status_code, body):
+    """Create API Gateway response with CORS headers"""
+    return {
+        'statusCode': status_code,
+        'headers': cors_headers(),
+        'body': json.dumps(body, cls=DecimalEncoder)
+    }
+
+
 def get_user_info(email):
-    """Get complete user information from Users table by email"""
+    """Get complete user information from Users table by email
+    
+    The joined user + employee profile is cached per container for
+    USER_CACHE_TTL_SECONDS, so a warm container resolves the caller with no
+    DynamoDB reads; a cold lookup costs one email-index query plus at most
+    one Employees get_item, regardless of table size.
+    """
+    cached = profile_cache.get(email)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        response = users_table.scan(
-            FilterExpression='email = :email',
-            ExpressionAttributeValues={':email': email}
-        )
+        # Query by email using GSI
+        user = get_user_by_email(users_table, email)
         
-        if response['Items']:
-            user = response['Items'][0]
+        if user:
             role = user.get('role', 'Employee')
             employee_id = user.get('employeeId')
             user_name = user.get('name', 'Unknown')
@@ -66,15 +166,14 @@ def get_user_info(email):
             
             if employee_id:
                 try:
-                    emp_response = employees_table.get_item(Key={'employeeId': employee_id})
-                    if 'Item' in emp_response:
-                        employee_details = emp_response['Item']
+                    employee_details = get_employee_record(employees_table, employee_id)
+                    if employee_details:
                         department = employee_details.get('department')
                         employee_role = employee_details.get('role')
                 except Exception as e:
                     logger.warning(f"Could not fetch employee details: {e}")
             
-            return {
+            profile = {
                 'role': role,
                 'department': department,
                 'employee_id': employee_id,
@@ -83,6 +182,10 @@ def get_user_info(email):
                 'employee_role': employee_role,
                 'employee_details': employee_details
             }
+            # Only complete profiles are cached; unknown users are retried next message
+            if not employee_id or employee_details:
+                profile_cache.set(email, profile)
+            return dict(profile)
         
         return {
             'role': 'Employee',
@@ -106,119 +209,763 @@ def get_user_info(email):
         }
 
 
-def get_employees_data(role, department=None):
-    """Fetch employee data based on role and department
+# ---------------------------------------------------------------------------
+# Context retrieval
+#
+# Instead of scanning whole tables, the question is parsed for entity hints
+# (employee IDs, departments, periods) and only matching records are fetched
+# with key/GSI queries. Records are then ranked and trimmed to
+# CONTEXT_TOKEN_BUDGET, so per-message reads and prompt size stay bounded.
+# ---------------------------------------------------------------------------
+
+EMPLOYEE_ID_PATTERN = re.compile(r'\b([A-Za-z]{2,4})([-_])(\d{3,6})\b')
+YEAR_QUARTER_PATTERN = re.compile(r'\b(20\d{2})[-\s]?Q([1-4])\b', re.IGNORECASE)   # 2025-Q1, 2025 Q1
+QUARTER_YEAR_PATTERN = re.compile(r'\bQ([1-4])[-\s/,]*(20\d{2})\b', re.IGNORECASE)  # Q1 2025
+NUMERIC_PERIOD_PATTERN = re.compile(r'\b(20\d{2})-([1-4])\b')                       # 2025-1
+QUARTER_PATTERN = re.compile(r'\b(?:Q([1-4])|quarter\s+([1-4]))\b', re.IGNORECASE)
+YEAR_PATTERN = re.compile(r'\b(20\d{2})\b')
+STORED_PERIOD_PATTERN = re.compile(r'^(\d{4})-Q?([1-4])$')
+DEPARTMENT_ALIASES = {
+    'development': 'DEV', 'developer': 'DEV', 'developers': 'DEV',
+    'quality assurance': 'QA', 'testers': 'QA',
+    'data analytics': 'DAT', 'data team': 'DAT',
+    'security': 'SEC',
+    'artificial intelligence': 'AI', 'machine learning': 'AI'
+}
+DESCENDING_HINTS = re.compile(r'\b(top|best|highest|high performers?|strongest)\b', re.IGNORECASE)
+ASCENDING_HINTS = re.compile(r'\b(bottom|worst|lowest|underperform\w*|weakest|low performers?)\b', re.IGNORECASE)
+
+
+def known_departments():
+    """Department codes: KNOWN_DEPARTMENTS plus the partition keys of the aggregates table
+    
+    The aggregates table holds one item per (department, period), so a keys-only
+    scan is small. The result is cached per container; if the scan fails the
+    configured list is used and the scan is retried on the next call.
+    """
+    departments = department_cache.get('departments')
+    if departments is not None:
+        return departments
+    try:
+        items = iter_items(thread_table(PERFORMANCE_AGGREGATES_TABLE).scan, {'ProjectionExpression': 'department'})
+        found = {item['department'] for item in items if item.get('department')}
+    except Exception as e:
+        logger.warning(f"Could not list departments from the aggregates table: {e}")
+        return KNOWN_DEPARTMENTS
+    departments = KNOWN_DEPARTMENTS + sorted(found - set(KNOWN_DEPARTMENTS))
+    department_cache.set('departments', departments)
+    return departments
+
+
+def parse_entity_hints(user_message):
+    """Extract employee IDs, departments, periods and ranking intent from a question"""
+    text = user_message or ''
+    known = known_departments()
+    
+    employee_ids = []
+    for prefix, separator, number in EMPLOYEE_ID_PATTERN.findall(text):
+        # Employee IDs are prefixed with their department code (DEV-01013, AI_00001); any
+        # prefix is accepted, so IDs of departments not listed anywhere are still looked up
+        employee_id = f"{prefix.upper()}{separator}{number}"
+        if employee_id not in employee_ids:
+            employee_ids.append(employee_id)
+    
+    # Department names are matched with the employee IDs removed, so "DEV-01013" alone
+    # does not pull in the whole DEV department
+    departments = []
+    remainder = EMPLOYEE_ID_PATTERN.sub(' ', text)
+    lowered = remainder.lower()
+    for code in known:
+        # Two-letter codes (QA, AI) must be upper case to avoid matching ordinary words
+        flags = 0 if len(code) <= 2 else re.IGNORECASE
+        if re.search(rf'\b{re.escape(code)}\b', remainder, flags) and code not in departments:
+            departments.append(code)
+    for alias, code in DEPARTMENT_ALIASES.items():
+        if alias in lowered and code in known and code not in departments:
+            departments.append(code)
+
+    periods = []
+    for year, quarter in YEAR_QUARTER_PATTERN.findall(text) + NUMERIC_PERIOD_PATTERN.findall(text):
+        periods.append((year, quarter))
+    for quarter, year in QUARTER_YEAR_PATTERN.findall(text):
+        periods.append((year, quarter))
+    if not periods:
+        years = YEAR_PATTERN.findall(text)
+        quarters = [q1 or q2 for q1, q2 in QUARTER_PATTERN.findall(text)]
+        if quarters:
+            periods = [(year, quarter) for year in (years or [None]) for quarter in quarters]
+        else:
+            periods = [(year, None) for year in years]
+    periods = list(dict.fromkeys(periods))
+    
+    order = None
+    if DESCENDING_HINTS.search(text):
+        order = 'desc'
+    elif ASCENDING_HINTS.search(text):
+        order = 'asc'
+    
+    return {
+        'employee_ids': employee_ids,
+        'departments': departments,
+        'periods': periods,
+        'order': order
+    }
+
+
+def period_matches(period, period_hints):
+    """True if a stored period ("2025-1" or "2025-Q1") matches any (year, quarter) hint"""
+    if not period_hints:
+        return True
+    match = STORED_PERIOD_PATTERN.match(str(period or ''))
+    if not match:
+        return False
+    year, quarter = match.groups()
+    return any(
+        (hint_year is None or hint_year == year) and (hint_quarter is None or hint_quarter == quarter)
+        for hint_year, hint_quarter in period_hints
+    )
+
+
+def hinted_year(period_hints):
+    """The single year all period hints agree on (usable as a sort-key prefix), else None"""
+    years = {year for year, _ in period_hints}
+    if len(years) == 1:
+        return years.pop()
+    return None
+
+
+def period_key_condition(partition_condition, period_hints):
+    """Narrow a key condition to a year prefix when the hints pin one down"""
+    year = hinted_year(period_hints)
+    if year:
+        return partition_condition & Key('period').begins_with(year)
+    return partition_condition
+
+
+def get_employees_data(role, department=None, hints=None):
+    """Fetch employee records relevant to the question, scoped by role
     
     Company Policy:
     - Admin: Can view all employees
     - Manager: Can view employees in their department only
     - Employee: Cannot view employee list (returns empty)
     """
+    hints = hints or parse_entity_hints('')
     try:
-        if role == 'Admin':
-            # Admin sees all employees
-            response = employees_table.scan()
-            logger.info(f"Admin accessing all employees: {len(response.get('Items', []))} records")
-            return response.get('Items', [])
-        elif role == 'Manager':
-            if not department:
-                logger.warning("Manager role without department - cannot fetch employees")
-                return []
-            # Manager sees only their department
-            response = employees_table.scan(
-                FilterExpression='department = :dept',
-                ExpressionAttributeValues={':dept': department}
-            )
-            logger.info(f"Manager accessing {department} department employees: {len(response.get('Items', []))} records")
-            return response.get('Items', [])
-        else:
+        if role == 'Employee':
             # Employee role cannot view employee list
             logger.info("Employee role - no access to employee list")
             return []
+        if role == 'Manager' and not department:
+            logger.warning("Manager role without department - cannot fetch employees")
+            return []
+        
+        employees = []
+        if hints['employee_ids']:
+            employees.extend(batch_get_items(
+                thread_dynamodb(), EMPLOYEES_TABLE,
+                [{'employeeId': employee_id} for employee_id in hints['employee_ids']]
+            ))
+        
+        if role == 'Manager':
+            # Managers only ever see their own department
+            departments = [department] if not hints['employee_ids'] or hints['departments'] else []
+        else:
+            departments = hints['departments']
+        
+        for dept in departments:
+            employees.extend(iter_items(thread_table(EMPLOYEES_TABLE).query, {
+                'IndexName': 'department-index',
+                'KeyConditionExpression': Key('department').eq(dept)
+            }, max_items=CONTEXT_MAX_RECORDS))
+        
+        if role == 'Admin' and not hints['employee_ids'] and not departments:
+            # No entity in the question - bounded sample of the whole company
+            employees.extend(iter_items(thread_table(EMPLOYEES_TABLE).scan, {}, max_items=CONTEXT_MAX_RECORDS))
+        
+        if role == 'Manager':
+            employees = [emp for emp in employees if emp.get('department') == department]
+        
+        employees = list({emp.get('employeeId'): emp for emp in employees}.values())
+        logger.info(f"{role} retrieved {len(employees)} employee records")
+        return employees
     except Exception as e:
+        # fetch_parallel reports the source as unavailable
         logger.error(f"Error fetching employees: {e}")
-        return []
+        raise
 
 
-def get_performance_data(role, department=None, employee_id=None):
-    """Fetch performance data based on role and department"""
+def get_performance_data(role, department=None, employee_id=None, hints=None):
+    """Fetch performance records relevant to the question, scoped by role
+    
+    Returns (scores, complete). complete is False when any query hit
+    CONTEXT_MAX_RECORDS, i.e. the scores are a sample of the caller's scope.
+    """
+    hints = hints or parse_entity_hints('')
+    period_hints = hints['periods']
+    performance_scores_table = thread_table(PERFORMANCE_SCORES_TABLE)
     try:
-        if role == 'Admin':
-            # Admin sees all performance data
-            response = performance_scores_table.scan()
-        elif role == 'Manager' and department:
-            # Manager sees only their department's performance
-            response = performance_scores_table.scan(
-                FilterExpression='department = :dept',
-                ExpressionAttributeValues={':dept': department}
-            )
-        elif role == 'Employee' and employee_id:
+        queries = []
+        if role == 'Employee':
             # Employee sees only their own performance
-            response = performance_scores_table.query(
-                KeyConditionExpression='employeeId = :empId',
-                ExpressionAttributeValues={':empId': employee_id}
-            )
+            if not employee_id:
+                return [], True
+            employee_ids, departments = [employee_id], []
+        elif role == 'Manager':
+            if not department:
+                return [], True
+            # Manager sees only their department's performance
+            employee_ids = hints['employee_ids']
+            departments = [department] if not employee_ids or hints['departments'] else []
+        elif role == 'Admin':
+            employee_ids, departments = hints['employee_ids'], hints['departments']
         else:
-            return []
+            return [], True
         
-        return response.get('Items', [])
+        for emp_id in employee_ids:
+            queries.append((performance_scores_table.query, {
+                'KeyConditionExpression': period_key_condition(Key('employeeId').eq(emp_id), period_hints)
+            }))
+        for dept in departments:
+            queries.append((performance_scores_table.query, {
+                'IndexName': 'department-period-index',
+                'KeyConditionExpression': period_key_condition(Key('department').eq(dept), period_hints)
+            }))
+        if role == 'Admin' and not queries:
+            if hinted_year(period_hints):
+                # Period-only question - one GSI query per department for that year
+                for dept in known_departments():
+                    queries.append((performance_scores_table.query, {
+                        'IndexName': 'department-period-index',
+                        'KeyConditionExpression': period_key_condition(Key('department').eq(dept), period_hints)
+                    }))
+            else:
+                # No entity in the question - bounded sample of the whole company
+                queries.append((performance_scores_table.scan, {}))
+        
+        scores = []
+        complete = True
+        for operation, kwargs in queries:
+            # One record past the cap tells whether the query was cut short
+            items = list(iter_items(operation, kwargs, max_items=CONTEXT_MAX_RECORDS + 1))
+            if len(items) > CONTEXT_MAX_RECORDS:
+                complete = False
+            scores.extend(items[:CONTEXT_MAX_RECORDS])
+        
+        scores = [score for score in scores if period_matches(score.get('period'), period_hints)]
+        if role == 'Manager':
+            scores = [score for score in scores if score.get('department') == department]
+        
+        scores = list({(score.get('employeeId'), score.get('period')): score for score in scores}.values())
+        logger.info(f"{role} retrieved {len(scores)} performance records{'' if complete else ' (capped)'}")
+        return scores, complete
     except Exception as e:
         logger.error(f"Error fetching performance data: {e}")
-        return []
+        raise
 
 
-def build_context(user_info):
-    """Build context from DynamoDB for Bedrock prompt"""
+def thread_dynamodb():
+    """DynamoDB resource for the current thread (boto3 resources are not thread-safe)"""
+    resource = getattr(_thread_state, 'dynamodb', None)
+    if resource is None:
+        resource = boto3.session.Session().resource(
+            'dynamodb',
+            region_name='ap-southeast-1',
+            config=Config(
+                connect_timeout=CONTEXT_FETCH_TIMEOUT_SECONDS,
+                read_timeout=CONTEXT_FETCH_TIMEOUT_SECONDS,
+                retries={'max_attempts': 2}
+            )
+        )
+        _thread_state.dynamodb = resource
+        _thread_state.tables = {}
+    return resource
+
+
+def thread_table(table_name):
+    """Table handle bound to the current thread's DynamoDB resource"""
+    resource = thread_dynamodb()
+    table = _thread_state.tables.get(table_name)
+    if table is None:
+        table = _thread_state.tables[table_name] = resource.Table(table_name)
+    return table
+
+
+def fetch_parallel(fetches, timeout=None):
+    """
+    Run independent fetches concurrently on fetch_pool.
+    
+    `fetches` maps a source name to (function, args, default). Each source
+    gets `timeout` seconds (default CONTEXT_FETCH_TIMEOUT_SECONDS) from the
+    moment all are submitted; a source that raises or runs late yields its
+    default instead. Returns (results, unavailable_source_names).
+    """
+    timeout = CONTEXT_FETCH_TIMEOUT_SECONDS if timeout is None else timeout
+    started = time.monotonic()
+    futures = {name: fetch_pool.submit(function, *args) for name, (function, args, _) in fetches.items()}
+    
+    results = {}
+    unavailable = []
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(started + timeout - time.monotonic(), 0))
+        except FutureTimeoutError:
+            logger.warning(f"Context source {name} timed out after {timeout}s; continuing without it")
+            results[name] = fetches[name][2]
+            unavailable.append(name)
+        except Exception as e:
+            logger.error(f"Context source {name} failed: {e}")
+            results[name] = fetches[name][2]
+            unavailable.append(name)
+    logger.info(f"Fetched context sources {list(fetches)} in {int((time.monotonic() - started) * 1000)} ms")
+    return results, unavailable
+
+
+def build_context(user_info, user_message='', frontend_context=None, conversation_id=None):
+    """Build context from DynamoDB for Bedrock prompt (targeted retrieval, not full scans)
+    
+    Independent sources are fetched in parallel, so the build takes as long
+    as the slowest one. Sources the frontend already supplies are skipped;
+    sources that time out are left out and listed under 'unavailable'.
+    Sources cut off at CONTEXT_MAX_RECORDS are listed under 'capped'.
+    """
     role = user_info['role']
     department = user_info['department']
     employee_id = user_info['employee_id']
+    hints = parse_entity_hints(user_message)
+    logger.info(f"Context hints: {hints}")
+    frontend_context = frontend_context or {}
     
-    context = {
-        'employees': get_employees_data(role, department),
-        'performance_scores': get_performance_data(role, department, employee_id),
+    fetches = {
+        'department_aggregates': (get_department_aggregates, (role, department, hints), [])
+    }
+    if 'employees' not in frontend_context:
+        fetches['employees'] = (get_employees_data, (role, department, hints), [])
+    if 'performance_scores' not in frontend_context and 'performanceScores' not in frontend_context:
+        fetches['performance_scores'] = (get_performance_data, (role, department, employee_id, hints), ([], True))
+    if conversation_id:
+        fetches['conversation'] = (get_conversation, (conversation_id, user_info.get('email')), None)
+    results, unavailable = fetch_parallel(fetches)
+    performance_scores, scores_complete = results.get('performance_scores', ([], True))
+    
+    return {
+        'employees': results.get('employees', []),
+        'performance_scores': performance_scores,
+        'department_aggregates': results['department_aggregates'],
+        'conversation': results.get('conversation'),
+        'unavailable': unavailable,
+        'capped': [] if scores_complete else ['performance_scores'],
         'user_info': user_info,
         'role': role,
-        'department': department
+        'department': department,
+        'hints': hints
     }
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def relevance(record, hints):
+    """Relevance of a record to the question's entity hints (higher is better)"""
+    score = 0
+    if record.get('employeeId') in hints['employee_ids']:
+        score += 4
+    if record.get('department') in hints['departments']:
+        score += 2
+    if hints['periods'] and 'period' in record and period_matches(record.get('period'), hints['periods']):
+        score += 2
+    return score
+
+
+def rank_records(records, hints):
+    """Order records by relevance, then by the requested score order, then most recent period"""
+    records = sorted(records, key=lambda r: str(r.get('period', '')), reverse=True)
+    if hints.get('order'):
+        records = sorted(
+            records,
+            key=lambda r: float(r.get('overallScore') or 0),
+            reverse=hints['order'] == 'desc'
+        )
+    return sorted(records, key=lambda r: relevance(r, hints), reverse=True)
+
+
+def budget_records(records, render, token_budget):
+    """Keep records in order until token_budget is spent; returns (kept, tokens_used)"""
+    kept = []
+    used = 0
+    for record in records:
+        cost = estimate_tokens(render(record))
+        if used + cost > token_budget:
+            break
+        kept.append(record)
+        used += cost
+    return kept, used
+
+
+def budget_context(context, encoder=None):
+    """
+    Rank each record section and trim it to its share of CONTEXT_TOKEN_BUDGET,
+    measured in the encoder's output. Unused budget carries over to the next
+    section. Records the number of matching records per section under
+    context['matched'].
+    """
+    encoder = encoder or get_context_encoder()
+    hints = context.get('hints') or parse_entity_hints('')
+    matched = {}
+    carry = 0
+    for name, _, columns, share in CONTEXT_SECTIONS:
+        records = context.get(name) or []
+        if not isinstance(records, list):
+            records = []
+        matched[name] = len(records)
+        allowance = int(CONTEXT_TOKEN_BUDGET * share) + carry
+        ranked = rank_records(records, hints)
+        # Columns constant across all candidates stay constant in any kept prefix
+        header, row_columns = encoder.layout(ranked, columns)
+        header_cost = estimate_tokens(header) if records else 0
+        kept, used = budget_records(
+            ranked,
+            lambda record: encoder.row(record, row_columns),
+            allowance - header_cost
+        )
+        context[name] = kept
+        carry = max(allowance - header_cost - used, 0) if kept else allowance
+    context['matched'] = matched
+    return context
+
+
+# ---------------------------------------------------------------------------
+# Analytics
+#
+# Averages, rankings, trends and attendance rates are computed here over the
+# retrieved data (before budget_context trims the raw records) and injected as
+# small tables, so numeric answers don't depend on the model reading a
+# truncated sample. Department/period statistics come from the materialized
+# aggregates table and cover every score; everything else is a single pass
+# over the retrieved records, and is left out when the scores were capped at
+# CONTEXT_MAX_RECORDS, since a ranking of a sample would look complete.
+# ---------------------------------------------------------------------------
+
+def canonical_period(period):
+    """'2025-1' and '2025-Q1' both become '2025-Q1'"""
+    match = STORED_PERIOD_PATTERN.match(str(period or ''))
+    return f"{match.group(1)}-Q{match.group(2)}" if match else period
+
+
+def group_stats(records, keys, value_field='overallScore'):
+    """Single-pass count/mean/min/max of value_field per group of `keys`"""
+    groups = {}
+    for record in records:
+        value = record.get(value_field)
+        if value is None or value == '':
+            continue
+        value = float(value)
+        key = tuple(canonical_period(record.get(k)) if k == 'period' else record.get(k) for k in keys)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, value, value, value]
+        else:
+            group[0] += 1
+            group[1] += value
+            group[2] = min(group[2], value)
+            group[3] = max(group[3], value)
+    return [
+        dict(zip(keys, key), count=count, mean=round(total / count, 2), min=low, max=high)
+        for key, (count, total, low, high) in sorted(groups.items(), key=lambda g: tuple(str(k) for k in g[0]))
+    ]
+
+
+def with_period_change(rows, group_field):
+    """Add `change` (mean minus the group's previous period mean) to rows sorted by group, period"""
+    previous = {}
+    for row in rows:
+        prior = previous.get(row[group_field])
+        row['change'] = round(row['mean'] - prior, 2) if prior is not None else None
+        previous[row[group_field]] = row['mean']
+    return rows
+
+
+def get_department_aggregates(role, department, hints):
+    """Department/period statistics from the aggregates table, within the caller's scope"""
+    if role == 'Manager':
+        departments = [department] if department else []
+    elif role == 'Admin':
+        departments = hints['departments'] or known_departments()
+    else:
+        return []
     
-    # Convert to JSON-serializable format
-    context_json = json.dumps(context, cls=DecimalEncoder)
-    return json.loads(context_json)
+    rows = []
+    try:
+        for dept in departments:
+            items = iter_items(thread_table(PERFORMANCE_AGGREGATES_TABLE).query, {
+                'KeyConditionExpression': period_key_condition(Key('department').eq(dept), hints['periods']),
+                'ScanIndexForward': False
+            }, max_items=None if hints['periods'] else ANALYTICS_PERIODS)
+            for item in items:
+                if not period_matches(item.get('period'), hints['periods']):
+                    continue
+                summary = summarize_aggregate(item)
+                rows.append({
+                    'department': summary['department'],
+                    'period': canonical_period(summary['period']),
+                    'count': summary['count'],
+                    'mean': summary['mean'],
+                    'min': summary['min'],
+                    'max': summary['max'],
+                    'p50': summary['percentiles']['p50']
+                })
+    except Exception as e:
+        logger.warning(f"Could not read performance aggregates: {e}")
+        return []
+    rows.sort(key=lambda row: (row['department'], row['period']))
+    return rows
 
 
-def detect_prompt_injection(user_message):
-    """Detect potential prompt injection attempts in user input"""
-    injection_patterns = [
-        'forget', 'ignore previous', 'ignore all previous', 'ignore the above',
-        'you are now', 'pretend', 'new instructions', 'new instruction',
-        'system:', 'assistant:', 'disregard', 'override',
-        'act as', 'roleplay', 'role play', 'simulate',
-        'ignore your', 'forget your', 'new role', 'change your role',
-        'you must', 'you will', 'you should now', 'from now on',
-        'previous instructions', 'above instructions', 'initial prompt'
+def score_rankings(scores, hints):
+    """Top (or bottom) ANALYTICS_TOP_N employees for the most recent period in scope"""
+    periods = {canonical_period(score.get('period')) for score in scores if score.get('overallScore') is not None}
+    if not periods:
+        return []
+    period = max(periods)
+    candidates = [
+        score for score in scores
+        if canonical_period(score.get('period')) == period and score.get('overallScore') is not None
     ]
+    pick = heapq.nsmallest if hints.get('order') == 'asc' else heapq.nlargest
+    ranked = pick(ANALYTICS_TOP_N, candidates, key=lambda score: float(score['overallScore']))
+    return [
+        {'rank': position, 'employeeId': score.get('employeeId'), 'department': score.get('department'),
+         'period': period, 'overallScore': score.get('overallScore')}
+        for position, score in enumerate(ranked, 1)
+    ]
+
+
+def employee_trends(scores):
+    """First vs latest score per employee (only when few enough employees are in scope)"""
+    series = {}
+    for score in scores:
+        if score.get('overallScore') is not None:
+            series.setdefault(score.get('employeeId'), []).append(
+                (canonical_period(score.get('period')), float(score['overallScore']))
+            )
+    if len(series) > ANALYTICS_MAX_ROWS:
+        return []
+    rows = []
+    for employee_id, points in sorted(series.items()):
+        points.sort()
+        rows.append({
+            'employeeId': employee_id,
+            'periods': len(points),
+            'from': points[0][0],
+            'to': points[-1][0],
+            'first': points[0][1],
+            'latest': points[-1][1],
+            'change': round(points[-1][1] - points[0][1], 2)
+        })
+    return rows
+
+
+def attendance_rates(records):
+    """Share of days per status, per employee (or per department when there are many employees)"""
+    records = [record for record in records if isinstance(record, dict)]
+    employees = {record.get('employeeId') for record in records}
+    group_field = 'employeeId' if len(employees) <= ANALYTICS_MAX_ROWS else 'department'
+    counts = {}
+    statuses = set()
+    for record in records:
+        status = record.get('status') or 'unknown'
+        statuses.add(status)
+        group = counts.setdefault(record.get(group_field), {})
+        group[status] = group.get(status, 0) + 1
     
-    user_message_lower = user_message.lower()
+    statuses = sorted(statuses)
+    rows = []
+    for group, by_status in sorted(counts.items(), key=lambda g: str(g[0])):
+        days = sum(by_status.values())
+        row = {group_field: group, 'days': days}
+        row.update({f"{status}%": round(100 * by_status.get(status, 0) / days, 1) for status in statuses})
+        rows.append(row)
+    columns = [(group_field, group_field, None), ('days', 'Days', None)]
+    columns.extend((f"{status}%", f"{status}%", None) for status in statuses)
+    return rows, columns
+
+
+def build_analytics(context):
+    """
+    Compute analytics tables for the prompt from the (untrimmed) context.
+    Returns [(title, columns, rows)], each table capped at ANALYTICS_MAX_ROWS.
+    """
+    user_info = context.get('user_info') or {}
+    role = user_info.get('role', 'Employee')
+    hints = context.get('hints') or parse_entity_hints('')
+    scores = [score for score in (context.get('performance_scores') or []) if isinstance(score, dict)]
+    scores_complete = 'performance_scores' not in (context.get('capped') or [])
+    tables = []
     
-    for pattern in injection_patterns:
-        if pattern in user_message_lower:
-            logger.warning(f"Potential prompt injection detected: '{pattern}' in message")
-            return True
+    department_rows = context.get('department_aggregates')
+    if department_rows is None:
+        department_rows = get_department_aggregates(role, user_info.get('department'), hints)
+    source = 'all scores'
+    if not department_rows and scores and scores_complete and role != 'Employee':
+        department_rows = group_stats(scores, ('department', 'period'))
+        source = 'retrieved scores'
+    if department_rows:
+        tables.append((
+            f"AVERAGE SCORE BY DEPARTMENT AND PERIOD (from {source})",
+            [('department', 'Department', None), ('period', 'Period', None), ('count', 'Count', None),
+             ('mean', 'Mean', None), ('change', 'Change vs previous period', None),
+             ('min', 'Min', None), ('max', 'Max', None), ('p50', 'Median', None)],
+            with_period_change(department_rows, 'department')
+        ))
     
+    if scores and scores_complete and role != 'Employee':
+        order = 'BOTTOM' if hints.get('order') == 'asc' else 'TOP'
+        rankings = score_rankings(scores, hints)
+        if rankings:
+            tables.append((
+                f"{order} {len(rankings)} EMPLOYEES BY SCORE ({rankings[0]['period']}, of {len(scores)} retrieved scores)",
+                [('rank', 'Rank', None), ('employeeId', 'Employee ID', None), ('department', 'Department', None),
+                 ('overallScore', 'Overall Score', None)],
+                rankings
+            ))
+    
+    trends = employee_trends(scores) if scores_complete else []
+    if trends:
+        tables.append((
+            "SCORE TREND PER EMPLOYEE",
+            [('employeeId', 'Employee ID', None), ('periods', 'Periods', None), ('from', 'From', None),
+             ('to', 'To', None), ('first', 'First', None), ('latest', 'Latest', None), ('change', 'Change', None)],
+            trends
+        ))
+    
+    attendance = context.get('attendance')
+    if isinstance(attendance, list) and attendance:
+        rows, columns = attendance_rates(attendance)
+        tables.append((f"ATTENDANCE RATES ({len(attendance)} records)", columns, rows))
+    
+    return [(title, columns, rows[:ANALYTICS_MAX_ROWS]) for title, columns, rows in tables]
+
+
+# ---------------------------------------------------------------------------
+# Context encoders
+#
+# Record sections are rendered by a pluggable encoder chosen with
+# CONTEXT_ENCODER. 'table' (default) writes the column header once and one
+# pipe-separated row per record; 'verbose' is the original labelled block per
+# record, about 5x the tokens per row. Encoders only render rows, so ranking
+# and budgeting are shared.
+# ---------------------------------------------------------------------------
+
+# (name, title, [(field, label, default)], budget share)
+CONTEXT_SECTIONS = [
+    ('employees', 'EMPLOYEE RECORDS', [
+        ('employeeId', 'Employee ID', None), ('name', 'Name', None),
+        ('department', 'Department', None), ('role', 'Role', None),
+        ('email', 'Email', None), ('managerId', 'Manager', 'N/A'),
+        ('hireDate', 'Hire Date', 'N/A')
+    ], 0.3),
+    ('performance_scores', 'PERFORMANCE SCORE RECORDS', [
+        ('employeeId', 'Employee ID', None), ('period', 'Period', None),
+        ('overallScore', 'Overall Score', None), ('department', 'Department', None),
+        ('submittedBy', 'Submitted By', 'N/A'), ('submittedAt', 'Submitted At', 'N/A')
+    ], 0.45),
+    ('attendance', 'ATTENDANCE RECORDS', [
+        ('employeeId', 'Employee ID', None), ('date', 'Date', None),
+        ('checkIn', 'Check-in', 'N/A'), ('checkOut', 'Check-out', 'N/A'),
+        ('status', 'Status', None), ('points360', 'Points', 'N/A')
+    ], 0.15),
+    ('users', 'USER ACCOUNTS', [
+        ('userId', 'User ID', None), ('email', 'Email', None),
+        ('name', 'Name', None), ('role', 'Role', None),
+        ('department', 'Department', 'N/A'), ('employeeId', 'Employee ID', 'N/A')
+    ], 0.1)
+]
+
+
+class TableEncoder:
+    """
+    Column names once, then one 'a|b|c' row per record. Columns with the same
+    value in every record (e.g. department in a department query) are stated
+    once above the header instead of on every row. Empty cells are '-'.
+    """
+    name = 'table'
+
+    def cell(self, value):
+        if value is None or value == '':
+            return '-'
+        return str(value).replace('|', '/').replace('\n', ' ')
+
+    def layout(self, records, columns):
+        """Returns (header, row_columns) for a section holding `records`"""
+        constants = []
+        varying = []
+        for column in columns:
+            values = {self.cell(record.get(column[0])) for record in records}
+            if len(records) > 1 and len(values) == 1:
+                constants.append(f"{column[0]}={values.pop()}")
+            else:
+                varying.append(column)
+        header = '|'.join(field for field, _, _ in varying)
+        if constants:
+            header = f"(all rows: {', '.join(constants)})\n{header}"
+        return header, varying
+
+    def row(self, record, columns):
+        return '|'.join(self.cell(record.get(field)) for field, _, _ in columns)
+
+
+class VerboseEncoder:
+    """One labelled line per field, the original prompt layout"""
+    name = 'verbose'
+
+    def layout(self, records, columns):
+        return '', columns
+
+    def row(self, record, columns):
+        lines = [f"- {columns[0][1]}: {record.get(columns[0][0], columns[0][2])}"]
+        lines.extend(f"  {label}: {record.get(field, default)}" for field, label, default in columns[1:])
+        return '\n'.join(lines) + '\n'
+
+
+CONTEXT_ENCODERS = {encoder.name: encoder for encoder in (TableEncoder, VerboseEncoder)}
+
+
+def get_context_encoder(name=None):
+    """Encoder instance for `name` (default CONTEXT_ENCODER; unknown names fall back to table)"""
+    return CONTEXT_ENCODERS.get(name or CONTEXT_ENCODER, TableEncoder)()
+
+
+def encode_section(records, columns, encoder):
+    """Render a record section as one string (header lines, if any, then rows)"""
+    header, row_columns = encoder.layout(records, columns)
+    lines = [header] if header else []
+    lines.extend(encoder.row(record, row_columns) for record in records)
+    return '\n'.join(lines)
+
+
+def detect_prompt_injection(user_message):
+    """Detect potential prompt injection attempts in user input (one precompiled regex scan)"""
+    phrase = find_prompt_injection(user_message)
+    if phrase:
+        logger.warning(f"Potential prompt injection detected: '{phrase}' in message")
+        return True
     return False
 
 
-def construct_prompt(user_message, context, conversation_history=None):
+def construct_prompt(user_message, context, conversation_history=None, encoder=None, history_summary=None):
     """Construct prompt for Bedrock with context, conversation history, and user query
     
     Task 11.8: Added conversation_history parameter for context continuity
+    Record sections are rendered with `encoder` (default CONTEXT_ENCODER).
+    `conversation_history` should already be windowed by prepare_history();
+    `history_summary` is the rolling summary of the turns before it.
     """
+    encoder = encoder or get_context_encoder()
     
     # Build context summary
-    employees = context.get('employees', [])
-    performance_scores = context.get('performance_scores', [])
-    attendance_records = context.get('attendance', [])
-    users = context.get('users', [])
+    matched = context.get('matched', {})
     user_info = context.get('user_info', {})
     role = user_info.get('role', 'Employee')
     department = user_info.get('department')
@@ -308,92 +1055,67 @@ CRITICAL RULES - NEVER VIOLATE THESE
 
 ===================================================================
 AVAILABLE DATA (filtered by {role} permissions)
-===================================================================
-
-EMPLOYEE RECORDS ({len(employees)} total):"""
-    
-    # Add FULL employee data (not just summary)
-    if employees:
-        context_summary += "\n"
-        for emp in employees[:50]:  # Limit to first 50 to avoid token limits
-            context_summary += f"\n- Employee ID: {emp.get('employeeId')}"
-            context_summary += f"\n  Name: {emp.get('name')}"
-            context_summary += f"\n  Department: {emp.get('department')}"
-            context_summary += f"\n  Role: {emp.get('role')}"
-            context_summary += f"\n  Email: {emp.get('email')}"
-            context_summary += f"\n  Manager: {emp.get('managerId', 'N/A')}"
-            context_summary += f"\n  Hire Date: {emp.get('hireDate', 'N/A')}"
-            context_summary += "\n"
-        
-        if len(employees) > 50:
-            context_summary += f"\n... and {len(employees) - 50} more employees (ask for specific employee IDs for details)\n"
-    else:
-        context_summary += "\nNo employee data available for your access level."
-    
-    context_summary += f"\n\nPERFORMANCE SCORE RECORDS ({len(performance_scores)} total):"
-    
-    # Add FULL performance data (not just summary)
-    if performance_scores:
-        context_summary += "\n"
-        for score in performance_scores[:50]:  # Limit to first 50
-            context_summary += f"\n- Employee ID: {score.get('employeeId')}"
-            context_summary += f"\n  Period: {score.get('period')}"
-            context_summary += f"\n  Overall Score: {score.get('overallScore')}"
-            context_summary += f"\n  Department: {score.get('department')}"
-            context_summary += f"\n  Submitted By: {score.get('submittedBy', 'N/A')}"
-            context_summary += f"\n  Submitted At: {score.get('submittedAt', 'N/A')}"
-            context_summary += "\n"
-        
-        if len(performance_scores) > 50:
-            context_summary += f"\n... and {len(performance_scores) - 50} more performance records (ask for specific details)\n"
-    else:
-        context_summary += "\nNo performance data available for your access level."
-    
-    # Add attendance data if provided
-    if attendance_records:
-        context_summary += f"\n\nATTENDANCE RECORDS ({len(attendance_records)} total):"
-        context_summary += "\n"
-        for record in attendance_records[:50]:  # Limit to first 50
-            context_summary += f"\n- Employee ID: {record.get('employeeId')}"
-            context_summary += f"\n  Date: {record.get('date')}"
-            context_summary += f"\n  Check-in: {record.get('checkIn', 'N/A')}"
-            context_summary += f"\n  Check-out: {record.get('checkOut', 'N/A')}"
-            context_summary += f"\n  Status: {record.get('status')}"
-            context_summary += f"\n  Points: {record.get('points360', 'N/A')}"
-            context_summary += "\n"
-        
-        if len(attendance_records) > 50:
-            context_summary += f"\n... and {len(attendance_records) - 50} more attendance records\n"
-    
-    # Add user data if provided
-    if users:
-        context_summary += f"\n\nUSER ACCOUNTS ({len(users)} total):"
-        context_summary += "\n"
-        for user in users[:50]:  # Limit to first 50
-            context_summary += f"\n- User ID: {user.get('userId')}"
-            context_summary += f"\n  Email: {user.get('email')}"
-            context_summary += f"\n  Name: {user.get('name')}"
-            context_summary += f"\n  Role: {user.get('role')}"
-            context_summary += f"\n  Department: {user.get('department', 'N/A')}"
-            context_summary += f"\n  Employee ID: {user.get('employeeId', 'N/A')}"
-            context_summary += "\n"
-        
-        if len(users) > 50:
-            context_summary += f"\n... and {len(users) - 50} more user accounts\n"
+==================================================================="""
+    
+    # Records were ranked and trimmed to the token budget by budget_context;
+    # sections are collected in a list and joined once
+    parts = [context_summary]
+    if encoder.name == 'table':
+        parts.append("\nEach section lists its column names once, then one record per line (fields separated by |, - means empty).")
+    
+    source_labels = {
+        'employees': 'employee records',
+        'performance_scores': 'performance scores',
+        'department_aggregates': 'department averages'
+    }
+    unavailable = [source_labels[name] for name in context.get('unavailable') or [] if name in source_labels]
+    if unavailable:
+        parts.append(f"\nNOTE: These sources could not be loaded and are missing below: {', '.join(unavailable)}. If the question needs them, say the data is temporarily unavailable.")
+    if 'performance_scores' in (context.get('capped') or []):
+        parts.append(f"\nNOTE: More than {CONTEXT_MAX_RECORDS} performance scores match this question, so the scores below are a sample and no rankings or trends are given. For rankings, ask the user to name a department or period.")
+    
+    analytics = context.get('analytics') or []
+    if analytics:
+        parts.append("\n\nANALYTICS (computed server-side before the records below were trimmed; department averages cover every score, the other tables cover the retrieved records; use these for averages, rankings, trends and rates instead of counting records):")
+        for title, columns, rows in analytics:
+            parts.append(f"\n\n{title}:\n")
+            parts.append(encode_section(rows, columns, encoder))
+    
+    section_notes = {
+        'employees': ("No employee data available for your access level.", "more employees (ask for specific employee IDs for details)"),
+        'performance_scores': ("No performance data available for your access level.", "more performance records (ask for specific details)"),
+        'attendance': (None, "more attendance records"),
+        'users': (None, "more user accounts")
+    }
+    for name, title, columns, _ in CONTEXT_SECTIONS:
+        records = context.get(name) or []
+        empty_note, omitted_note = section_notes[name]
+        if not records and empty_note is None:
+            continue
+        total = matched.get(name, len(records))
+        ranked = ", most relevant first" if name in ('employees', 'performance_scores') else ""
+        parts.append(f"\n\n{title} ({total} matched, {len(records)} shown{ranked}):\n")
+        if records:
+            parts.append(encode_section(records, columns, encoder))
+            if total > len(records):
+                parts.append(f"\n... and {total - len(records)} more {omitted_note}")
+        else:
+            parts.append(empty_note)
     
     # Add conversation history if provided (Task 11.8)
-    history_section = ""
-    if conversation_history and len(conversation_history) > 0:
-        history_section = "\n\n===================================================================\n"
-        history_section += "CONVERSATION HISTORY (for context continuity)\n"
-        history_section += "===================================================================\n"
-        for msg in conversation_history:
+    if history_summary or conversation_history:
+        parts.append("\n\n===================================================================\n")
+        parts.append("CONVERSATION HISTORY (for context continuity)\n")
+        parts.append("===================================================================\n")
+        if history_summary:
+            parts.append(f"\nSummary of earlier conversation: {history_summary}\n")
+        for msg in conversation_history or []:
             role_label = "User" if msg.get('role') == 'user' else "Assistant"
-            history_section += f"\n{role_label}: {msg.get('content')}\n"
-        history_section += "\nUse this conversation history to maintain context and provide relevant follow-up responses.\n"
+            parts.append(f"\n{role_label}: {msg.get('content')}\n")
+        parts.append("\nUse this conversation history to maintain context and provide relevant follow-up responses.\n")
     
     # Construct final prompt
-    prompt = f"""{context_summary}{history_section}
+    parts.append(f"""
 
 ===================================================================
 RESPONSE GUIDELINES
@@ -405,6 +1127,7 @@ RESPONSE GUIDELINES
 5. Politely decline non-HR questions
 6. If data is not in context, state "I don't have that information"
 7. Use conversation history to maintain context continuity
+8. For averages, rankings, trends and rates, quote the ANALYTICS tables
 
 ===================================================================
 USER QUESTION
@@ -414,32 +1137,34 @@ USER QUESTION
 ===================================================================
 YOUR RESPONSE
 ===================================================================
-"""
+""")
     
-    return prompt
+    return ''.join(parts)
+
 
+def build_bedrock_request(prompt, max_tokens=2000):
+    """Request body for Claude 3 Haiku (shared by the blocking and streaming calls)"""
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.7,
+        "top_p": 0.9
+    }
 
-def invoke_bedrock(prompt):
+
+def invoke_bedrock(prompt, max_tokens=2000):
     """Invoke Bedrock model with the constructed prompt"""
     try:
-        # Prepare request body for Claude 3 Haiku
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 2000,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.7,
-            "top_p": 0.9
-        }
-        
         # Invoke Bedrock
         response = bedrock_runtime.invoke_model(
             modelId=BEDROCK_MODEL_ID,
-            body=json.dumps(request_body)
+            body=json.dumps(build_bedrock_request(prompt, max_tokens))
         )
         
         # Parse response
@@ -449,23 +1174,531 @@ def invoke_bedrock(prompt):
         if 'content' in response_body and len(response_body['content']) > 0:
             return response_body['content'][0]['text']
         else:
-            return "I apologize, but I couldn't generate a response. Please try again."
+            return NO_RESPONSE_REPLY
     
     except Exception as e:
         logger.error(f"Error invoking Bedrock: {e}")
-        return f"I encountered an error while processing your request. Please try again later."
+        return ERROR_REPLY
+
+
+def invoke_bedrock_stream(prompt, on_text=None, client=None):
+    """
+    Stream a reply with invoke_model_with_response_stream.
+    
+    Calls on_text(delta) for every text delta as it arrives and returns
+    (full_text, metrics) where metrics holds firstTokenMs and totalMs.
+    `client` defaults to the module Bedrock client (tests pass a fake whose
+    response body yields {'chunk': {'bytes': ...}} events).
+    """
+    client = client or bedrock_runtime
+    started = time.monotonic()
+    result = client.invoke_model_with_response_stream(
+        modelId=BEDROCK_MODEL_ID,
+        body=json.dumps(build_bedrock_request(prompt))
+    )
+    
+    parts = []
+    first_token_ms = None
+    for event in result['body']:
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        payload = json.loads(chunk['bytes'])
+        if payload.get('type') != 'content_block_delta':
+            continue
+        text = payload.get('delta', {}).get('text', '')
+        if not text:
+            continue
+        if first_token_ms is None:
+            first_token_ms = int((time.monotonic() - started) * 1000)
+        parts.append(text)
+        if on_text:
+            on_text(text)
+    
+    metrics = {
+        'firstTokenMs': first_token_ms,
+        'totalMs': int((time.monotonic() - started) * 1000)
+    }
+    return ''.join(parts), metrics
+
+
+# ---------------------------------------------------------------------------
+# Streaming replies
+#
+# API Gateway REST proxies cannot stream a Lambda response, so streaming uses
+# a chunked polling endpoint: POST /chatbot/message with "stream": true stores
+# the prompt on a stream item and returns its streamId immediately; a worker
+# (async self-invoke) streams Bedrock deltas into the item, and the client
+# polls GET /chatbot/stream/{streamId}?offset=N for the text after offset N.
+# ---------------------------------------------------------------------------
+
+def create_chat_stream(prompt, user_email, cache_key=None, reply=None):
+    """Store a pending stream item holding the prompt; returns the streamId
+    
+    With `reply` (a response cache hit) the item is stored already complete
+    and no worker is needed. `cache_key` is kept on pending items so the
+    worker can cache the finished reply.
+    """
+    stream_id = str(uuid.uuid4())
+    now = datetime.utcnow().isoformat()
+    item = {
+        'streamId': stream_id,
+        'status': 'pending' if reply is None else 'complete',
+        'prompt': prompt if reply is None else '',
+        'text': reply or '',
+        'createdBy': user_email,
+        'createdAt': now,
+        'updatedAt': now,
+        'expiresAt': int(time.time()) + CHAT_STREAM_TTL_SECONDS
+    }
+    if cache_key and reply is None:
+        item['cacheKey'] = cache_key
+    chat_streams_table.put_item(Item=item)
+    return stream_id
+
+
+def dispatch_chat_stream(stream_id, context=None):
+    """Start the stream worker: async self-invoke in Lambda, in-process otherwise"""
+    function_arn = getattr(context, 'invoked_function_arn', None)
+    if CHAT_STREAM_INLINE or not function_arn:
+        logger.info(f"Streaming chat reply {stream_id} in-process")
+        return run_chat_stream(stream_id)
+    
+    lambda_client.invoke(
+        FunctionName=function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'chatStream': {'streamId': stream_id}})
+    )
+    logger.info(f"Dispatched chat stream {stream_id} to {function_arn}")
+    return None
+
+
+def update_chat_stream(stream_id, values):
+    """SET the given attributes on a stream item"""
+    names = {f"#{key}": key for key in values}
+    chat_streams_table.update_item(
+        Key={'streamId': stream_id},
+        UpdateExpression='SET ' + ', '.join(f"#{key} = :{key}" for key in values),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues={f":{key}": value for key, value in values.items()}
+    )
+
+
+def run_chat_stream(stream_id):
+    """Worker: stream the Bedrock reply for a stream item into DynamoDB
+    
+    Async invokes are delivered at least once, so the worker first claims the
+    item by moving it from 'pending' to 'streaming'; a redelivered invoke
+    fails the condition and exits.
+    """
+    try:
+        item = chat_streams_table.update_item(
+            Key={'streamId': stream_id},
+            UpdateExpression='SET #status = :streaming, updatedAt = :updated',
+            ConditionExpression='#status = :pending',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':streaming': 'streaming',
+                ':pending': 'pending',
+                ':updated': datetime.utcnow().isoformat()
+            },
+            ReturnValues='ALL_NEW'
+        )['Attributes']
+    except chat_streams_table.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.warning(f"Chat stream {stream_id} not found or already started")
+        return None
+    
+    parts = []
+    state = {'flushed_at': time.monotonic(), 'first_token': False}
+    
+    def on_text(delta):
+        parts.append(delta)
+        now = time.monotonic()
+        # Flush the first token immediately, then at most every CHAT_STREAM_FLUSH_MS
+        if not state['first_token'] or (now - state['flushed_at']) * 1000 >= CHAT_STREAM_FLUSH_MS:
+            state['first_token'] = True
+            state['flushed_at'] = now
+            update_chat_stream(stream_id, {
+                'status': 'streaming',
+                'text': ''.join(parts),
+                'updatedAt': datetime.utcnow().isoformat()
+            })
+    
+    try:
+        text, metrics = invoke_bedrock_stream(item['prompt'], on_text)
+        if not text:
+            text = NO_RESPONSE_REPLY
+        logger.info(f"Chat stream {stream_id} complete: first token {metrics['firstTokenMs']} ms, total {metrics['totalMs']} ms")
+        update_chat_stream(stream_id, {
+            'status': 'complete',
+            'text': text,
+            'prompt': '',
+            'firstTokenMs': metrics['firstTokenMs'],
+            'totalMs': metrics['totalMs'],
+            'updatedAt': datetime.utcnow().isoformat()
+        })
+        if item.get('cacheKey'):
+            put_cached_response(item['cacheKey'], text)
+        return text
+    except Exception as e:
+        logger.error(f"Error streaming chat reply {stream_id}: {e}", exc_info=True)
+        update_chat_stream(stream_id, {
+            'status': 'error',
+            'text': ''.join(parts),
+            'prompt': '',
+            'message': ERROR_REPLY,
+            'updatedAt': datetime.utcnow().isoformat()
+        })
+        return None
+
+
+def get_chat_stream(stream_id, user_email, offset=0):
+    """Poll a stream: status plus the text after `offset` (None if not the caller's stream)"""
+    item = chat_streams_table.get_item(Key={'streamId': stream_id}, ConsistentRead=True).get('Item')
+    if not item or item.get('createdBy') != user_email:
+        return None
+    
+    text = item.get('text', '')
+    offset = min(max(offset, 0), len(text))
+    status = item.get('status')
+    message = item.get('message')
+    if status in ('pending', 'streaming') and is_stale_chat_stream(item):
+        # The worker timed out or never started; give pollers a terminal state
+        status, message = 'error', ERROR_REPLY
+    data = {
+        'streamId': stream_id,
+        'status': status,
+        'delta': text[offset:],
+        'offset': len(text),
+        'timestamp': item.get('updatedAt')
+    }
+    if status == 'complete':
+        data['reply'] = text
+        data['firstTokenMs'] = item.get('firstTokenMs')
+    if status == 'error':
+        data['error'] = message
+    return data
+
+
+def is_stale_chat_stream(item):
+    """True if an unfinished stream item has not been updated for CHAT_STREAM_STALE_SECONDS"""
+    try:
+        updated = datetime.fromisoformat(item['updatedAt'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (datetime.utcnow() - updated).total_seconds() > CHAT_STREAM_STALE_SECONDS
+
+
+# ---------------------------------------------------------------------------
+# Conversation history
+#
+# The client sends the whole conversation as `history`. Only the last
+# HISTORY_WINDOW_MESSAGES go into the prompt verbatim; older messages are
+# folded into a rolling summary stored per conversationId, so prompt size
+# stays flat however long the chat runs. Folding is done by a worker (async
+# self-invoke, like stream workers) once HISTORY_SUMMARY_BATCH messages have
+# left the window, so the summary call never adds latency to a reply.
+# ---------------------------------------------------------------------------
+
+def get_conversation(conversation_id, user_email):
+    """Conversation summary item, or None if missing or owned by someone else"""
+    if not conversation_id:
+        return None
+    try:
+        item = thread_table(CHAT_CONVERSATIONS_TABLE).get_item(Key={'conversationId': conversation_id}).get('Item')
+    except Exception as e:
+        logger.warning(f"Could not read conversation {conversation_id}: {e}")
+        return None
+    if not item or item.get('createdBy') != user_email:
+        return None
+    return item
+
+
+def message_text(msg):
+    role_label = "User" if msg.get('role') == 'user' else "Assistant"
+    return f"{role_label}: {msg.get('content')}"
+
+
+def prepare_history(conversation_history, conversation=None):
+    """
+    Window the request history against the stored summary.
+    
+    Returns (summary, messages, pending, start) where `messages` are the
+    verbatim messages for the prompt (newest kept first when over
+    HISTORY_TOKEN_BUDGET), `pending` are messages that left the window but
+    are not folded yet, and `start` is the history index `pending` begins at.
+    """
+    history = [msg for msg in (conversation_history or []) if isinstance(msg, dict)]
+    summary = None
+    start = 0
+    # A shorter history than what was folded means the client reset; ignore the summary
+    if conversation and int(conversation.get('summarizedCount', 0)) <= len(history):
+        start = int(conversation.get('summarizedCount', 0))
+        summary = conversation.get('summary') or None
+    
+    unfolded = history[start:]
+    window_start = max(len(unfolded) - HISTORY_WINDOW_MESSAGES, 0)
+    pending = unfolded[:window_start]
+    
+    budget = HISTORY_TOKEN_BUDGET - (estimate_tokens(summary) if summary else 0)
+    messages = []
+    # Unfolded messages stay in the prompt until the worker has summarized them
+    for msg in reversed(unfolded):
+        cost = estimate_tokens(message_text(msg))
+        if cost > budget:
+            break
+        messages.append(msg)
+        budget -= cost
+    messages.reverse()
+    return summary, messages, pending, start
+
+
+def build_summary_prompt(summary, messages):
+    transcript = '\n'.join(message_text(msg) for msg in messages)
+    return f"""Summarize this HR assistant conversation for later context.
+Keep employee IDs, names, departments, periods, numbers and open questions.
+Write at most {HISTORY_SUMMARY_MAX_WORDS} words of plain text.
+
+EXISTING SUMMARY:
+{summary or "(none)"}
+
+NEW MESSAGES:
+{transcript}
+
+UPDATED SUMMARY:"""
+
+
+def dispatch_history_summary(conversation_id, user_email, start, messages, context=None):
+    """Start the summary worker: async self-invoke in Lambda, in-process otherwise"""
+    payload = {'conversationId': conversation_id, 'owner': user_email, 'start': start, 'messages': messages}
+    function_arn = getattr(context, 'invoked_function_arn', None)
+    if CHAT_STREAM_INLINE or not function_arn:
+        return run_history_summary(**payload)
+    
+    lambda_client.invoke(
+        FunctionName=function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'chatHistorySummary': payload}, cls=DecimalEncoder)
+    )
+    return None
+
+
+def run_history_summary(conversationId, owner, start, messages):
+    """Worker: fold `messages` (history[start:start+n]) into the conversation summary"""
+    item = chat_conversations_table.get_item(Key={'conversationId': conversationId}).get('Item') or {}
+    if item and item.get('createdBy') != owner:
+        logger.warning(f"Conversation {conversationId} belongs to another user; not summarizing")
+        return None
+    if int(item.get('summarizedCount', 0)) != start:
+        logger.info(f"Conversation {conversationId} already summarized past {start}")
+        return None
+    
+    summary = invoke_bedrock(build_summary_prompt(item.get('summary'), messages), max_tokens=400)
+    if summary in (NO_RESPONSE_REPLY, ERROR_REPLY):
+        return None
+    
+    now = datetime.utcnow().isoformat()
+    try:
+        chat_conversations_table.put_item(
+            Item={
+                'conversationId': conversationId,
+                'createdBy': owner,
+                'summary': summary.strip(),
+                'summarizedCount': start + len(messages),
+                'createdAt': item.get('createdAt', now),
+                'updatedAt': now,
+                'expiresAt': int(time.time()) + CHAT_CONVERSATION_TTL_SECONDS
+            },
+            # Only one worker advances a conversation from a given point
+            ConditionExpression='attribute_not_exists(conversationId) OR summarizedCount = :start',
+            ExpressionAttributeValues={':start': start}
+        )
+    except Exception as e:
+        logger.warning(f"Conversation {conversationId} summary not saved: {e}")
+        return None
+    logger.info(f"Conversation {conversationId} summarized through message {start + len(messages)}")
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+#
+# Replies are cached under sha256(normalized question, access scope, data
+# fingerprint, history/frontend context). The fingerprint is the scoring
+# state's inputsVersion, which every score and KPI write bumps, so a score
+# change invalidates every cached reply at once; employee record edits are
+# bounded by RESPONSE_CACHE_TTL_SECONDS. A hit costs the profile lookup plus
+# one state read and skips both context retrieval and the Bedrock call.
+# ---------------------------------------------------------------------------
+
+QUESTION_STOPWORDS = frozenset(
+    'a an the please can could would you tell show give list what who which whose '
+    'is are was were be of in on for to about do does this that'.split()
+)
+NON_WORD_PATTERN = re.compile(r"[^\w\s'-]+")
+
+
+def normalize_question(user_message):
+    """Canonical form of a question: lowercase, periods as YYYY-qN, no punctuation or filler words"""
+    text = YEAR_QUARTER_PATTERN.sub(lambda m: f"{m.group(1)}-q{m.group(2)}", user_message)
+    text = QUARTER_YEAR_PATTERN.sub(lambda m: f"{m.group(2)}-q{m.group(1)}", text)
+    text = NUMERIC_PERIOD_PATTERN.sub(lambda m: f"{m.group(1)}-q{m.group(2)}", text)
+    text = NON_WORD_PATTERN.sub(' ', text.lower())
+    return ' '.join(word for word in text.split() if word not in QUESTION_STOPWORDS)
+
+
+def response_cache_scope(user_info):
+    """The part of the caller's identity the answer depends on
+    
+    The system prompt carries the caller's name and employee ID, so any reply
+    may address or describe the caller; entries are never shared between users.
+    """
+    return [
+        user_info.get('role', 'Employee'),
+        user_info.get('department') or '',
+        user_info.get('employee_id') or user_info.get('email')
+    ]
+
+
+def data_fingerprint():
+    """Version of the score data behind the context, or None if it can't be read"""
+    try:
+        state = get_scoring_state(dynamodb)
+    except Exception as e:
+        logger.warning(f"Could not read data version, bypassing response cache: {e}")
+        return None
+    return f"scores:{int(state.get('inputsVersion', 0))}"
+
+
+def response_cache_key(user_message, user_info, fingerprint, conversation_history=None, frontend_context=None):
+    """Cache key for a question asked by this caller against this data version"""
+    extras = json.dumps([conversation_history or [], frontend_context or {}], sort_keys=True, cls=DecimalEncoder, default=str)
+    material = json.dumps([
+        normalize_question(user_message),
+        response_cache_scope(user_info),
+        fingerprint,
+        hashlib.sha256(extras.encode('utf-8')).hexdigest()
+    ])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def get_cached_response(cache_key):
+    """Cached reply for a key (container cache first, then the shared table)"""
+    reply = local_response_cache.get(cache_key)
+    if reply is not None:
+        return reply
+    
+    try:
+        item = response_cache_table.get_item(Key={'cacheKey': cache_key}).get('Item')
+    except Exception as e:
+        logger.warning(f"Response cache read failed: {e}")
+        return None
+    # TTL deletion is lazy, so expiry is checked here as well
+    if not item or int(item.get('expiresAt', 0)) <= time.time():
+        return None
+    local_response_cache.set(cache_key, item['reply'])
+    return item['reply']
+
+
+def put_cached_response(cache_key, reply):
+    """Cache a reply (fallback/error replies are skipped; never raises)"""
+    if not cache_key or not reply or reply in (NO_RESPONSE_REPLY, ERROR_REPLY):
+        return
+    local_response_cache.set(cache_key, reply)
+    try:
+        response_cache_table.put_item(Item={
+            'cacheKey': cache_key,
+            'reply': reply,
+            'createdAt': datetime.utcnow().isoformat(),
+            'expiresAt': int(time.time()) + RESPONSE_CACHE_TTL_SECONDS
+        })
+    except Exception as e:
+        logger.warning(f"Response cache write failed: {e}")
+
+
+def record_cache_outcome(outcome):
+    """Count a cache hit/miss/bypass and publish it as a CloudWatch metric
+    
+    Uses the embedded metric format, which must be a bare JSON log line, so
+    it is printed rather than sent through the logger.
+    """
+    response_cache_stats[outcome] += 1
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['Outcome']],
+                'Metrics': [{'Name': 'ResponseCacheRequests', 'Unit': 'Count'}]
+            }]
+        },
+        'Outcome': outcome,
+        'ResponseCacheRequests': 1
+    }))
+    logger.info(f"Response cache {outcome} (container totals: {response_cache_stats})")
 
 
 def lambda_handler(event, context):
-    """Main Lambda handler for chatbot"""
+    """Main Lambda handler for chatbot
+    
+    Endpoints:
+    - POST /chatbot/message - Ask a question ({"message", "history", "conversationId", "stream"});
+      returns the reply, or a streamId (202) when "stream" is true
+    - GET /chatbot/stream/{streamId}?offset=N - Poll a streaming reply
+    """
     try:
         logger.info(f"Received event: {json.dumps(event)}")
         
+        # Stream worker (async self-invoke from dispatch_chat_stream)
+        if 'chatStream' in event:
+            run_chat_stream(event['chatStream']['streamId'])
+            return {'statusCode': 200, 'body': json.dumps({'success': True})}
+        
+        # History summary worker (async self-invoke from dispatch_history_summary)
+        if 'chatHistorySummary' in event:
+            run_history_summary(**event['chatHistorySummary'])
+            return {'statusCode': 200, 'body': json.dumps({'success': True})}
+        
+        if event.get('httpMethod') == 'GET':
+            # GET /chatbot/stream/{streamId} - Poll a streaming reply (stream owner only)
+            claims = event.get('requestContext', {}).get('authorizer', {}).get('claims', {})
+            user_email = claims.get('email')
+            if not user_email:
+                return response(401, {
+                    'success': False,
+                    'error': 'Unauthorized: No user email found in token'
+                })
+            
+            stream_id = (event.get('pathParameters') or {}).get('streamId')
+            query_parameters = event.get('queryStringParameters') or {}
+            try:
+                offset = int(query_parameters.get('offset') or 0)
+            except ValueError:
+                return response(400, {
+                    'success': False,
+                    'error': 'offset must be an integer'
+                })
+            
+            stream = get_chat_stream(stream_id, user_email, offset) if stream_id else None
+            if stream is None:
+                return response(404, {
+                    'success': False,
+                    'error': 'Stream not found'
+                })
+            
+            return response(200, {
+                'success': True,
+                'data': stream
+            })
+        
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         user_message = body.get('message', '').strip()
         frontend_context = body.get('context', {})  # Optional context from frontend
         conversation_history = body.get('history', [])  # Task 11.8: Conversation history for context continuity
+        conversation_id = body.get('conversationId')  # Enables the server-side history summary
+        if not isinstance(conversation_history, list):
+            conversation_history = []
         
         if not user_message:
             return {
@@ -524,10 +1757,40 @@ def lambda_handler(event, context):
         # Role is fetched from Users table, not JWT (as per system design)
         user_info = get_user_info(user_email)
         
-        logger.info(f"User info: {user_info['name']}, role: {user_info['role']}, department: {user_info['department']}")
+        logger.info(f"User info: {user_info['name']}, role: {user_info['role']}, department: {user_info['department']} (profile cache: {profile_cache.stats()})")
+        
+        # Response cache: a hit skips context retrieval and the Bedrock call
+        cache_key = None
+        fingerprint = data_fingerprint() if RESPONSE_CACHE_ENABLED else None
+        if fingerprint:
+            cache_key = response_cache_key(user_message, user_info, fingerprint, conversation_history, frontend_context)
+            cached_reply = get_cached_response(cache_key)
+            record_cache_outcome('hit' if cached_reply is not None else 'miss')
+            if cached_reply is not None:
+                if body.get('stream'):
+                    stream_id = create_chat_stream('', user_email, reply=cached_reply)
+                    return response(202, {
+                        'success': True,
+                        'data': {
+                            'streamId': stream_id,
+                            'status': 'complete',
+                            'cached': True,
+                            'timestamp': datetime.utcnow().isoformat()
+                        }
+                    })
+                return response(200, {
+                    'success': True,
+                    'data': {
+                        'reply': cached_reply,
+                        'cached': True,
+                        'timestamp': datetime.utcnow().isoformat()
+                    }
+                })
+        elif RESPONSE_CACHE_ENABLED:
+            record_cache_outcome('bypass')
         
-        # Build context from DynamoDB (backend fetched data)
-        data_context = build_context(user_info)
+        # Build context from DynamoDB (targeted retrieval for this question)
+        data_context = build_context(user_info, user_message, frontend_context, conversation_id)
         
         # Merge frontend context if provided (intelligent context provider)
         if frontend_context:
@@ -562,11 +1825,41 @@ def lambda_handler(event, context):
                 else:
                     data_context['users'] = users_data
         
+        # Analytics run over the complete records, before they are trimmed
+        data_context['analytics'] = build_analytics(data_context)
+        
+        # Rank and trim every record section to the prompt token budget
+        budget_context(data_context)
+        
+        # Window the history; turns that left the window are summarized in the background
+        conversation = data_context.get('conversation')
+        history_summary, recent_history, pending_history, history_start = prepare_history(conversation_history, conversation)
+        if conversation_id and len(pending_history) >= HISTORY_SUMMARY_BATCH:
+            try:
+                dispatch_history_summary(conversation_id, user_email, history_start, pending_history, context)
+            except Exception as e:
+                logger.warning(f"Could not dispatch history summary for {conversation_id}: {e}")
+        
         # Construct prompt for Bedrock with conversation history (Task 11.8)
-        prompt = construct_prompt(user_message, data_context, conversation_history)
+        prompt = construct_prompt(user_message, data_context, recent_history, history_summary=history_summary)
+        
+        # Streaming mode: return a streamId now, the reply is polled via GET /chatbot/stream/{streamId}
+        if body.get('stream'):
+            stream_id = create_chat_stream(prompt, user_email, cache_key=cache_key)
+            dispatch_chat_stream(stream_id, context)
+            return response(202, {
+                'success': True,
+                'data': {
+                    'streamId': stream_id,
+                    'status': 'pending',
+                    'cached': False,
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+            })
         
         # Invoke Bedrock
         assistant_response = invoke_bedrock(prompt)
+        put_cached_response(cache_key, assistant_response)
         
         # Return response
         return {
@@ -581,6 +1874,7 @@ def lambda_handler(event, context):
                 'success': True,
                 'data': {
                     'reply': assistant_response,
+                    'cached': False,
                     'timestamp': datetime.utcnow().isoformat()
                 }
             })
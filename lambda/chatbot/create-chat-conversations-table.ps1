@@ -0,0 +1,35 @@
+# Create insighthr-chat-conversations-dev table for chatbot history summaries
+# PK: conversationId (rolling summary, summarizedCount, createdBy)
+# TTL: expiresAt (conversations are removed automatically after CHAT_CONVERSATION_TTL_SECONDS)
+
+$tableName = "insighthr-chat-conversations-dev"
+$region = "ap-southeast-1"
+
+Write-Host "Creating DynamoDB table: $tableName in region: $region" -ForegroundColor Cyan
+
+aws dynamodb create-table `
+    --table-name $tableName `
+    --attribute-definitions `
+        AttributeName=conversationId,AttributeType=S `
+    --key-schema `
+        AttributeName=conversationId,KeyType=HASH `
+    --billing-mode PAY_PER_REQUEST `
+    --region $region
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Table created successfully!" -ForegroundColor Green
+    Write-Host "Waiting for table to become ACTIVE..." -ForegroundColor Yellow
+    
+    aws dynamodb wait table-exists --table-name $tableName --region $region
+    
+    Write-Host "✓ Table is now ACTIVE" -ForegroundColor Green
+    
+    aws dynamodb update-time-to-live `
+        --table-name $tableName `
+        --time-to-live-specification "Enabled=true,AttributeName=expiresAt" `
+        --region $region | Out-Null
+    
+    Write-Host "✓ TTL enabled on expiresAt" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to create table" -ForegroundColor Red
+}
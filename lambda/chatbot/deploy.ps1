@@ -18,6 +18,9 @@ $DATA_TABLES_TABLE = "insighthr-data-tables-dev"
 $NOTIFICATION_RULES_TABLE = "insighthr-notification-rules-dev"
 $NOTIFICATION_HISTORY_TABLE = "insighthr-notification-history-dev"
 $PASSWORD_RESET_REQUESTS_TABLE = "insighthr-password-reset-requests-dev"
+$CHAT_STREAMS_TABLE = "insighthr-chat-streams-dev"
+$CHAT_CONVERSATIONS_TABLE = "insighthr-chat-conversations-dev"
+$CHAT_RESPONSE_CACHE_TABLE = "insighthr-chat-response-cache-dev"
 
 Write-Host "========================================" -ForegroundColor Cyan
 Write-Host "Deploying Chatbot Handler Lambda" -ForegroundColor Cyan
@@ -36,6 +39,9 @@ New-Item -ItemType Directory -Path $packageDir | Out-Null
 # Copy handler file
 Copy-Item "chatbot_handler.py" $packageDir/
 
+# Copy shared modules (pagination, identity, etc.)
+Copy-Item ..\shared\*.py $packageDir/
+
 # Create ZIP file
 $zipFile = "$FUNCTION_NAME.zip"
 if (Test-Path $zipFile) {
@@ -70,7 +76,7 @@ if ($functionExists) {
         --function-name $FUNCTION_NAME `
         --timeout 60 `
         --memory-size 512 `
-        --environment "Variables={BEDROCK_MODEL_ID=$BEDROCK_MODEL_ID,BEDROCK_REGION=$BEDROCK_REGION,EMPLOYEES_TABLE=$EMPLOYEES_TABLE,PERFORMANCE_SCORES_TABLE=$PERFORMANCE_SCORES_TABLE,USERS_TABLE=$USERS_TABLE,KPIS_TABLE=$KPIS_TABLE,FORMULAS_TABLE=$FORMULAS_TABLE,DATA_TABLES_TABLE=$DATA_TABLES_TABLE,NOTIFICATION_RULES_TABLE=$NOTIFICATION_RULES_TABLE,NOTIFICATION_HISTORY_TABLE=$NOTIFICATION_HISTORY_TABLE,PASSWORD_RESET_REQUESTS_TABLE=$PASSWORD_RESET_REQUESTS_TABLE}" `
+        --environment "Variables={BEDROCK_MODEL_ID=$BEDROCK_MODEL_ID,BEDROCK_REGION=$BEDROCK_REGION,EMPLOYEES_TABLE=$EMPLOYEES_TABLE,PERFORMANCE_SCORES_TABLE=$PERFORMANCE_SCORES_TABLE,USERS_TABLE=$USERS_TABLE,KPIS_TABLE=$KPIS_TABLE,FORMULAS_TABLE=$FORMULAS_TABLE,DATA_TABLES_TABLE=$DATA_TABLES_TABLE,NOTIFICATION_RULES_TABLE=$NOTIFICATION_RULES_TABLE,NOTIFICATION_HISTORY_TABLE=$NOTIFICATION_HISTORY_TABLE,PASSWORD_RESET_REQUESTS_TABLE=$PASSWORD_RESET_REQUESTS_TABLE,CHAT_STREAMS_TABLE=$CHAT_STREAMS_TABLE,CHAT_CONVERSATIONS_TABLE=$CHAT_CONVERSATIONS_TABLE,CHAT_RESPONSE_CACHE_TABLE=$CHAT_RESPONSE_CACHE_TABLE}" `
         --region $REGION | Out-Null
 } else {
     # Create new function
@@ -84,7 +90,7 @@ if ($functionExists) {
         --timeout 60 `
         --memory-size 512 `
         --description "Handle chatbot queries with AWS Bedrock integration" `
-        --environment "Variables={BEDROCK_MODEL_ID=$BEDROCK_MODEL_ID,BEDROCK_REGION=$BEDROCK_REGION,EMPLOYEES_TABLE=$EMPLOYEES_TABLE,PERFORMANCE_SCORES_TABLE=$PERFORMANCE_SCORES_TABLE,USERS_TABLE=$USERS_TABLE,KPIS_TABLE=$KPIS_TABLE,FORMULAS_TABLE=$FORMULAS_TABLE,DATA_TABLES_TABLE=$DATA_TABLES_TABLE,NOTIFICATION_RULES_TABLE=$NOTIFICATION_RULES_TABLE,NOTIFICATION_HISTORY_TABLE=$NOTIFICATION_HISTORY_TABLE,PASSWORD_RESET_REQUESTS_TABLE=$PASSWORD_RESET_REQUESTS_TABLE}" `
+        --environment "Variables={BEDROCK_MODEL_ID=$BEDROCK_MODEL_ID,BEDROCK_REGION=$BEDROCK_REGION,EMPLOYEES_TABLE=$EMPLOYEES_TABLE,PERFORMANCE_SCORES_TABLE=$PERFORMANCE_SCORES_TABLE,USERS_TABLE=$USERS_TABLE,KPIS_TABLE=$KPIS_TABLE,FORMULAS_TABLE=$FORMULAS_TABLE,DATA_TABLES_TABLE=$DATA_TABLES_TABLE,NOTIFICATION_RULES_TABLE=$NOTIFICATION_RULES_TABLE,NOTIFICATION_HISTORY_TABLE=$NOTIFICATION_HISTORY_TABLE,PASSWORD_RESET_REQUESTS_TABLE=$PASSWORD_RESET_REQUESTS_TABLE,CHAT_STREAMS_TABLE=$CHAT_STREAMS_TABLE,CHAT_CONVERSATIONS_TABLE=$CHAT_CONVERSATIONS_TABLE,CHAT_RESPONSE_CACHE_TABLE=$CHAT_RESPONSE_CACHE_TABLE}" `
         --region $REGION | Out-Null
 }
 
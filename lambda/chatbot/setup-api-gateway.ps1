@@ -196,7 +196,7 @@ function Create-OptionsMethod {
     # Create integration response using temp file
     $integrationResponseJson = @{
         "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
-        "method.response.header.Access-Control-Allow-Methods" = "'POST,OPTIONS'"
+        "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,OPTIONS'"
         "method.response.header.Access-Control-Allow-Origin" = "'*'"
     } | ConvertTo-Json -Compress
     [System.IO.File]::WriteAllText("$PWD\temp-integration-response.json", $integrationResponseJson)
@@ -220,6 +220,11 @@ $chatbotResourceId = Get-OrCreateResource -ParentId $ROOT_RESOURCE_ID -PathPart
 Write-Host "Creating /chatbot/message resource..." -ForegroundColor Yellow
 $chatbotMessageResourceId = Get-OrCreateResource -ParentId $chatbotResourceId -PathPart "message"
 
+# Create /chatbot/stream/{streamId} resource
+Write-Host "Creating /chatbot/stream/{streamId} resource..." -ForegroundColor Yellow
+$chatbotStreamResourceId = Get-OrCreateResource -ParentId $chatbotResourceId -PathPart "stream"
+$chatbotStreamIdResourceId = Get-OrCreateResource -ParentId $chatbotStreamResourceId -PathPart "{streamId}"
+
 Write-Host ""
 Write-Host "Creating methods and integrations..." -ForegroundColor Yellow
 Write-Host ""
@@ -232,6 +237,14 @@ Create-Integration -ResourceId $chatbotMessageResourceId -HttpMethod "POST" -Lam
 # OPTIONS for /chatbot/message
 Create-OptionsMethod -ResourceId $chatbotMessageResourceId
 
+# GET /chatbot/stream/{streamId}
+Write-Host "Setting up GET /chatbot/stream/{streamId}" -ForegroundColor Cyan
+Create-Method -ResourceId $chatbotStreamIdResourceId -HttpMethod "GET" -RequireAuth $true
+Create-Integration -ResourceId $chatbotStreamIdResourceId -HttpMethod "GET" -LambdaArn $CHATBOT_HANDLER_ARN
+
+# OPTIONS for /chatbot/stream/{streamId}
+Create-OptionsMethod -ResourceId $chatbotStreamIdResourceId
+
 Write-Host ""
 Write-Host "Adding Lambda permissions..." -ForegroundColor Yellow
 
@@ -239,6 +252,9 @@ Write-Host "Adding Lambda permissions..." -ForegroundColor Yellow
 $sourceArnBase = "arn:aws:execute-api:${REGION}:${ACCOUNT_ID}:${API_ID}/*/POST/chatbot/message"
 Add-LambdaPermission -FunctionName "insighthr-chatbot-handler" -StatementId "apigateway-post-chatbot-message" -SourceArn $sourceArnBase
 
+$streamSourceArn = "arn:aws:execute-api:${REGION}:${ACCOUNT_ID}:${API_ID}/*/GET/chatbot/stream/*"
+Add-LambdaPermission -FunctionName "insighthr-chatbot-handler" -StatementId "apigateway-get-chatbot-stream" -SourceArn $streamSourceArn
+
 Write-Host ""
 Write-Host "Deploying API to dev stage..." -ForegroundColor Yellow
 aws apigateway create-deployment `
@@ -254,6 +270,7 @@ Write-Host "========================================" -ForegroundColor Cyan
 Write-Host ""
 Write-Host "API Endpoint Created:" -ForegroundColor Yellow
 Write-Host "  POST /chatbot/message" -ForegroundColor White
+Write-Host "  GET  /chatbot/stream/{streamId}" -ForegroundColor White
 Write-Host ""
 Write-Host "Base URL: https://lqk4t6qzag.execute-api.ap-southeast-1.amazonaws.com/dev" -ForegroundColor Cyan
 Write-Host "Full Endpoint: https://lqk4t6qzag.execute-api.ap-southeast-1.amazonaws.com/dev/chatbot/message" -ForegroundColor Green
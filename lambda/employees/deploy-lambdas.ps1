@@ -35,6 +35,9 @@ function Deploy-Lambda {
     $handlerFile = "$Handler.py"
     Copy-Item $handlerFile $packageDir/
     
+    # Copy shared modules (pagination, identity, etc.)
+    Copy-Item ..\shared\*.py $packageDir/
+    
     # Create ZIP file
     $zipFile = "$FunctionName.zip"
     if (Test-Path $zipFile) {
@@ -5,6 +5,7 @@ import csv
 import io
 from datetime import datetime
 from decimal import Decimal
+from identity import get_user_by_email
 
 dynamodb = boto3.resource('dynamodb')
 table_name = os.environ.get('EMPLOYEES_TABLE', 'insighthr-employees-dev')
@@ -33,16 +34,10 @@ def get_user_role(event):
         
         print(f"Looking up role for email: {email}")
         
-        # Query Users table by email using GSI
-        response = users_table.query(
-            IndexName='email-index',
-            KeyConditionExpression='email = :email',
-            ExpressionAttributeValues={':email': email}
-        )
-        
-        items = response.get('Items', [])
-        if items:
-            role = items[0].get('role', 'Employee')
+        # Query Users table by email using GSI (cached per container)
+        user = get_user_by_email(users_table, email)
+        if user:
+            role = user.get('role', 'Employee')
             print(f"Found role: {role}")
             return role
         else:
@@ -3,6 +3,9 @@ import boto3
 import os
 from decimal import Decimal
 from datetime import datetime
+from boto3.dynamodb.conditions import Key, Attr
+from identity import get_user_by_email, get_employee_record, invalidate_employee
+from pagination import PaginationError, parse_page_params, fetch_key_page, encode_token
 
 dynamodb = boto3.resource('dynamodb')
 table_name = os.environ.get('EMPLOYEES_TABLE', 'insighthr-employees-dev')
@@ -31,16 +34,10 @@ def get_user_role(event):
         
         print(f"Looking up role for email: {email}")
         
-        # Query Users table by email using GSI
-        response = users_table.query(
-            IndexName='email-index',
-            KeyConditionExpression='email = :email',
-            ExpressionAttributeValues={':email': email}
-        )
-        
-        items = response.get('Items', [])
-        if items:
-            role = items[0].get('role', 'Employee')
+        # Query Users table by email using GSI (cached per container)
+        user = get_user_by_email(users_table, email)
+        if user:
+            role = user.get('role', 'Employee')
             print(f"Found role: {role}")
             return role
         else:
@@ -64,16 +61,9 @@ def get_user_info(event):
         
         print(f"Looking up user info for email: {email}")
         
-        # Query Users table by email using GSI
-        response = users_table.query(
-            IndexName='email-index',
-            KeyConditionExpression='email = :email',
-            ExpressionAttributeValues={':email': email}
-        )
-        
-        items = response.get('Items', [])
-        if items:
-            user = items[0]
+        # Query Users table by email using GSI (cached per container)
+        user = get_user_by_email(users_table, email)
+        if user:
             role = user.get('role', 'Employee')
             user_employee_id = user.get('employeeId')
             
@@ -81,8 +71,7 @@ def get_user_info(event):
             if role == 'Manager' and user_employee_id:
                 print(f"Manager user with employeeId: {user_employee_id}, looking up department from Employees table")
                 try:
-                    emp_response = table.get_item(Key={'employeeId': user_employee_id})
-                    employee = emp_response.get('Item')
+                    employee = get_employee_record(table, user_employee_id)
                     if employee:
                         department = employee.get('department')
                         print(f"Found employee record - department: {department}")
@@ -189,49 +178,59 @@ def lambda_handler(event, context):
         }
 
 def list_employees(query_params, user_role, user_department):
-    """List all employees with optional filters and role-based access control"""
+    """List one page of employees with optional filters and role-based access control"""
     try:
         department = query_params.get('department')
         position = query_params.get('position')
         status = query_params.get('status')
         search = query_params.get('search', '').lower()
         
+        try:
+            limit, cursor = parse_page_params(query_params)
+        except PaginationError as e:
+            return {
+                'statusCode': 400,
+                'headers': cors_headers(),
+                'body': json.dumps({'error': str(e)})
+            }
+        
+        # Filters applied server-side by DynamoDB
+        filter_condition = None
+        if position and position != 'ALL':
+            filter_condition = Attr('position').eq(position)
+        if status and status != 'ALL':
+            status_condition = Attr('status').eq(status)
+            filter_condition = status_condition if filter_condition is None else filter_condition & status_condition
+        
         # Manager role: filter by their department only
         if user_role == 'Manager' and user_department:
             print(f"Manager access: filtering by department {user_department}")
-            response = table.query(
-                IndexName='department-index',
-                KeyConditionExpression='department = :dept',
-                ExpressionAttributeValues={':dept': user_department}
-            )
-            employees = response.get('Items', [])
+            operation = table.query
+            request = {
+                'IndexName': 'department-index',
+                'KeyConditionExpression': Key('department').eq(user_department)
+            }
         # If department filter is provided, use GSI
         elif department and department != 'ALL':
-            response = table.query(
-                IndexName='department-index',
-                KeyConditionExpression='department = :dept',
-                ExpressionAttributeValues={':dept': department}
-            )
-            employees = response.get('Items', [])
+            operation = table.query
+            request = {
+                'IndexName': 'department-index',
+                'KeyConditionExpression': Key('department').eq(department)
+            }
         else:
             # Otherwise, scan the table
-            response = table.scan()
-            employees = response.get('Items', [])
-        
-        # Apply additional filters
-        filtered_employees = employees
+            operation = table.scan
+            request = {}
         
-        if position and position != 'ALL':
-            filtered_employees = [e for e in filtered_employees if e.get('position') == position]
-        
-        if status and status != 'ALL':
-            filtered_employees = [e for e in filtered_employees if e.get('status') == status]
+        if filter_condition is not None:
+            request['FilterExpression'] = filter_condition
         
+        # Case-insensitive search cannot be expressed in a FilterExpression
+        item_filter = None
         if search:
-            filtered_employees = [
-                e for e in filtered_employees
-                if search in e.get('name', '').lower() or search in e.get('employeeId', '').lower()
-            ]
+            item_filter = lambda e: search in e.get('name', '').lower() or search in e.get('employeeId', '').lower()
+        
+        employees, next_cursor = fetch_key_page(operation, request, limit, cursor, item_filter)
         
         return {
             'statusCode': 200,
@@ -239,8 +238,9 @@ def list_employees(query_params, user_role, user_department):
             'body': json.dumps({
                 'success': True,
                 'data': {
-                    'employees': filtered_employees,
-                    'count': len(filtered_employees)
+                    'employees': employees,
+                    'count': len(employees),
+                    'nextToken': encode_token(next_cursor)
                 }
             }, default=decimal_default)
         }
@@ -387,6 +387,7 @@ def update_employee(employee_id, data):
             update_params['ExpressionAttributeNames'] = expr_names
         
         response = table.update_item(**update_params)
+        invalidate_employee(employee_id)
         
         return {
             'statusCode': 200,
@@ -415,6 +416,7 @@ def delete_employee(employee_id):
         
         # Delete the employee
         table.delete_item(Key={'employeeId': employee_id})
+        invalidate_employee(employee_id)
         
         return {
             'statusCode': 200,
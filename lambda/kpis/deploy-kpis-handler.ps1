@@ -12,7 +12,7 @@ Write-Host "Packaging Lambda function..." -ForegroundColor Yellow
 if (Test-Path "kpis_handler.zip") {
     Remove-Item "kpis_handler.zip"
 }
-Compress-Archive -Path "kpis_handler.py" -DestinationPath "kpis_handler.zip" -Force
+Compress-Archive -Path "kpis_handler.py", "..\shared\*.py" -DestinationPath "kpis_handler.zip" -Force
 Write-Host "Lambda function packaged" -ForegroundColor Green
 
 # Check if Lambda function exists
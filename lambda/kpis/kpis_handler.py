@@ -4,6 +4,9 @@ import os
 import uuid
 from datetime import datetime
 from decimal import Decimal
+from boto3.dynamodb.conditions import Attr
+from scoring_trigger import mark_scoring_inputs_changed
+from pagination import PaginationError, parse_page_params, fetch_key_page, encode_token
 
 dynamodb = boto3.resource('dynamodb')
 table_name = os.environ.get('DYNAMODB_KPIS_TABLE', 'insighthr-kpis-dev')
@@ -141,26 +144,44 @@ def lambda_handler(event, context):
         }
 
 def list_kpis(query_parameters):
-    """List all KPIs with optional filters"""
+    """List one page of KPIs with optional filters"""
     try:
-        # Scan all KPIs (for MVP, no pagination)
-        response = table.scan()
-        kpis = response.get('Items', [])
+        try:
+            limit, cursor = parse_page_params(query_parameters)
+        except PaginationError as e:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({'message': str(e)})
+            }
         
-        # Apply filters
+        # Apply filters server-side
         category = query_parameters.get('category')
         data_type = query_parameters.get('dataType')
         is_active = query_parameters.get('isActive')
         
+        conditions = []
         if category:
-            kpis = [kpi for kpi in kpis if kpi.get('category') == category]
+            conditions.append(Attr('category').eq(category))
         
         if data_type:
-            kpis = [kpi for kpi in kpis if kpi.get('dataType') == data_type]
+            conditions.append(Attr('dataType').eq(data_type))
         
         if is_active is not None:
             active_bool = is_active.lower() == 'true'
-            kpis = [kpi for kpi in kpis if kpi.get('isActive') == active_bool]
+            conditions.append(Attr('isActive').eq(active_bool))
+        
+        scan_kwargs = {}
+        if conditions:
+            filter_condition = conditions[0]
+            for condition in conditions[1:]:
+                filter_condition = filter_condition & condition
+            scan_kwargs['FilterExpression'] = filter_condition
+        
+        kpis, next_cursor = fetch_key_page(table.scan, scan_kwargs, limit, cursor)
         
         return {
             'statusCode': 200,
@@ -168,7 +189,7 @@ def list_kpis(query_parameters):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'kpis': kpis}, default=decimal_default)
+            'body': json.dumps({'kpis': kpis, 'nextToken': encode_token(next_cursor)}, default=decimal_default)
         }
     
     except Exception as e:
@@ -267,6 +288,7 @@ def create_kpi(body, user):
         }
         
         table.put_item(Item=kpi)
+        mark_scoring_inputs_changed(dynamodb, 'kpi_create')
         
         return {
             'statusCode': 201,
@@ -342,6 +364,7 @@ def update_kpi(kpi_id, body, user):
         
         response = table.update_item(**update_params)
         updated_kpi = response['Attributes']
+        mark_scoring_inputs_changed(dynamodb, 'kpi_update')
         
         return {
             'statusCode': 200,
@@ -387,6 +410,7 @@ def delete_kpi(kpi_id):
                 ':updatedAt': datetime.utcnow().isoformat()
             }
         )
+        mark_scoring_inputs_changed(dynamodb, 'kpi_delete')
         
         return {
             'statusCode': 200,
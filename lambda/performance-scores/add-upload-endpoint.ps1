@@ -145,6 +145,88 @@ $ErrorActionPreference = "Stop"
 
 Write-Host "OPTIONS method created" -ForegroundColor Green
 
+# Create /performance-scores/upload/{jobId} resource for job progress
+Write-Host "`nCreating /performance-scores/upload/{jobId} resource..." -ForegroundColor Yellow
+$JOB_RESOURCE = aws apigateway get-resources --rest-api-id $API_ID --region $REGION --query "items[?path=='/performance-scores/upload/{jobId}'].id" --output text
+
+if ([string]::IsNullOrEmpty($JOB_RESOURCE)) {
+    $JOB_RESOURCE = aws apigateway create-resource `
+        --rest-api-id $API_ID `
+        --parent-id $UPLOAD_RESOURCE `
+        --path-part "{jobId}" `
+        --region $REGION `
+        --query 'id' --output text
+    
+    Write-Host "Created /performance-scores/upload/{jobId} resource: $JOB_RESOURCE" -ForegroundColor Green
+} else {
+    Write-Host "/performance-scores/upload/{jobId} resource already exists: $JOB_RESOURCE" -ForegroundColor Green
+}
+
+$ErrorActionPreference = "Continue"
+
+if ($AUTHORIZER_ID) {
+    aws apigateway put-method `
+        --rest-api-id $API_ID `
+        --resource-id $JOB_RESOURCE `
+        --http-method GET `
+        --authorization-type COGNITO_USER_POOLS `
+        --authorizer-id $AUTHORIZER_ID `
+        --request-parameters "method.request.path.jobId=true" `
+        --region $REGION 2>$null
+} else {
+    aws apigateway put-method `
+        --rest-api-id $API_ID `
+        --resource-id $JOB_RESOURCE `
+        --http-method GET `
+        --authorization-type NONE `
+        --request-parameters "method.request.path.jobId=true" `
+        --region $REGION 2>$null
+}
+
+aws apigateway put-integration `
+    --rest-api-id $API_ID `
+    --resource-id $JOB_RESOURCE `
+    --http-method GET `
+    --type AWS_PROXY `
+    --integration-http-method POST `
+    --uri $URI `
+    --region $REGION 2>$null
+
+aws apigateway put-method `
+    --rest-api-id $API_ID `
+    --resource-id $JOB_RESOURCE `
+    --http-method OPTIONS `
+    --authorization-type NONE `
+    --region $REGION 2>$null
+
+aws apigateway put-integration `
+    --rest-api-id $API_ID `
+    --resource-id $JOB_RESOURCE `
+    --http-method OPTIONS `
+    --type MOCK `
+    --request-templates $requestTemplates `
+    --region $REGION 2>$null
+
+aws apigateway put-method-response `
+    --rest-api-id $API_ID `
+    --resource-id $JOB_RESOURCE `
+    --http-method OPTIONS `
+    --status-code 200 `
+    --response-parameters "method.response.header.Access-Control-Allow-Headers=false,method.response.header.Access-Control-Allow-Methods=false,method.response.header.Access-Control-Allow-Origin=false" `
+    --region $REGION 2>$null
+
+aws apigateway put-integration-response `
+    --rest-api-id $API_ID `
+    --resource-id $JOB_RESOURCE `
+    --http-method OPTIONS `
+    --status-code 200 `
+    --response-parameters "{\"method.response.header.Access-Control-Allow-Headers\":\"'Content-Type,Authorization'\",\"method.response.header.Access-Control-Allow-Methods\":\"'GET,POST,PUT,DELETE,OPTIONS'\",\"method.response.header.Access-Control-Allow-Origin\":\"'*'\"}" `
+    --region $REGION 2>$null
+
+$ErrorActionPreference = "Stop"
+
+Write-Host "GET method created for /performance-scores/upload/{jobId}" -ForegroundColor Green
+
 # Deploy API
 Write-Host "`nDeploying API to 'dev' stage..." -ForegroundColor Yellow
 
@@ -167,3 +249,4 @@ Write-Host "`n=== Setup Complete ===" -ForegroundColor Cyan
 Write-Host "API Endpoint: $API_ENDPOINT" -ForegroundColor Green
 Write-Host "`nNew endpoint:" -ForegroundColor Yellow
 Write-Host "  POST   $API_ENDPOINT/performance-scores/upload" -ForegroundColor White
+Write-Host "  GET    $API_ENDPOINT/performance-scores/upload/{jobId}" -ForegroundColor White
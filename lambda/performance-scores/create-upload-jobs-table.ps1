@@ -0,0 +1,37 @@
+# Create insighthr-upload-jobs-dev table for asynchronous score uploads
+# PK: jobId, SK: itemId ('META' progress record, 'CHUNK#nnnnnn' pending rows)
+# TTL: expiresAt (jobs are removed automatically after UPLOAD_JOB_TTL_DAYS)
+
+$tableName = "insighthr-upload-jobs-dev"
+$region = "ap-southeast-1"
+
+Write-Host "Creating DynamoDB table: $tableName in region: $region" -ForegroundColor Cyan
+
+aws dynamodb create-table `
+    --table-name $tableName `
+    --attribute-definitions `
+        AttributeName=jobId,AttributeType=S `
+        AttributeName=itemId,AttributeType=S `
+    --key-schema `
+        AttributeName=jobId,KeyType=HASH `
+        AttributeName=itemId,KeyType=RANGE `
+    --billing-mode PAY_PER_REQUEST `
+    --region $region
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Table created successfully!" -ForegroundColor Green
+    Write-Host "Waiting for table to become ACTIVE..." -ForegroundColor Yellow
+    
+    aws dynamodb wait table-exists --table-name $tableName --region $region
+    
+    Write-Host "✓ Table is now ACTIVE" -ForegroundColor Green
+    
+    aws dynamodb update-time-to-live `
+        --table-name $tableName `
+        --time-to-live-specification "Enabled=true,AttributeName=expiresAt" `
+        --region $region | Out-Null
+    
+    Write-Host "✓ TTL enabled on expiresAt" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to create table" -ForegroundColor Red
+}
@@ -32,8 +32,8 @@ if (Test-Path $ZIP_FILE) {
     Remove-Item $ZIP_FILE
 }
 
-# Create zip file with Lambda handler
-Compress-Archive -Path performance_scores_handler.py -DestinationPath $ZIP_FILE
+# Create zip file with Lambda handler and shared modules
+Compress-Archive -Path performance_scores_handler.py, ..\shared\*.py -DestinationPath $ZIP_FILE
 
 Write-Host "Lambda function packaged: $ZIP_FILE" -ForegroundColor Green
 
@@ -65,7 +65,7 @@ if ($FUNCTION_EXISTS_CODE -eq 0) {
     
     aws lambda update-function-configuration `
         --function-name $FUNCTION_NAME `
-        --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev}" `
+        --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev,UPLOAD_JOBS_TABLE=insighthr-upload-jobs-dev}" `
         --region $REGION
     
     if ($LASTEXITCODE -ne 0) {
@@ -86,7 +86,7 @@ if ($FUNCTION_EXISTS_CODE -eq 0) {
         --zip-file fileb://$ZIP_FILE `
         --timeout 30 `
         --memory-size 256 `
-        --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev}" `
+        --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,USERS_TABLE=insighthr-users-dev,UPLOAD_JOBS_TABLE=insighthr-upload-jobs-dev}" `
         --region $REGION
     
     if ($LASTEXITCODE -ne 0) {
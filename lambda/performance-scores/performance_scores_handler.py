@@ -3,8 +3,19 @@ import boto3
 import os
 import logging
 from decimal import Decimal
+import time
+import csv
+import io
+import re
+from itertools import chain, islice
 from datetime import datetime
 import uuid
+from boto3.dynamodb.conditions import Key, Attr
+from batch import batch_get_items, batch_put_items
+from aggregates import apply_score_changes
+from scoring_trigger import mark_scoring_inputs_changed
+from identity import get_user_by_email, get_employee_record
+from pagination import DEFAULT_PAGE_SIZE, PaginationError, parse_page_params, fetch_key_page, iter_items, encode_token
 
 # Configure logging
 logger = logging.getLogger()
@@ -12,17 +23,29 @@ logger.setLevel(logging.INFO)
 
 # Initialize AWS clients
 dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'ap-southeast-1'))
+lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'ap-southeast-1'))
 
 # Environment variables
 PERFORMANCE_SCORES_TABLE = os.environ.get('PERFORMANCE_SCORES_TABLE', 'insighthr-performance-scores-dev')
 EMPLOYEES_TABLE = os.environ.get('EMPLOYEES_TABLE', 'insighthr-employees-dev')
 USERS_TABLE = os.environ.get('USERS_TABLE', 'insighthr-users-dev')
+UPLOAD_JOBS_TABLE = os.environ.get('UPLOAD_JOBS_TABLE', 'insighthr-upload-jobs-dev')
 AWS_REGION = os.environ.get('AWS_REGION', 'ap-southeast-1')
 
 # Get table references
 performance_table = dynamodb.Table(PERFORMANCE_SCORES_TABLE)
 employees_table = dynamodb.Table(EMPLOYEES_TABLE)
 users_table = dynamodb.Table(USERS_TABLE)
+upload_jobs_table = dynamodb.Table(UPLOAD_JOBS_TABLE)
+
+# Upload job settings
+UPLOAD_SYNC_MAX_ROWS = int(os.environ.get('UPLOAD_SYNC_MAX_ROWS', '500'))  # larger uploads always run as jobs
+UPLOAD_JOB_CHUNK_SIZE = int(os.environ.get('UPLOAD_JOB_CHUNK_SIZE', '500'))  # rows per stored chunk
+UPLOAD_JOB_MAX_ERRORS = int(os.environ.get('UPLOAD_JOB_MAX_ERRORS', '100'))  # row errors kept on the job
+UPLOAD_JOB_TTL_DAYS = int(os.environ.get('UPLOAD_JOB_TTL_DAYS', '7'))
+UPLOAD_JOB_MIN_REMAINING_MS = int(os.environ.get('UPLOAD_JOB_MIN_REMAINING_MS', '10000'))
+# 'true' processes jobs in-process instead of re-invoking this function (local runs/tests)
+UPLOAD_JOB_INLINE = os.environ.get('UPLOAD_JOB_INLINE', 'false').lower() == 'true'
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -74,14 +97,8 @@ def extract_user_info(event):
         # Query Users table by email using GSI
         try:
             logger.info(f"Looking up user info for email: {email}")
-            user_response = users_table.query(
-                IndexName='email-index',
-                KeyConditionExpression='email = :email',
-                ExpressionAttributeValues={':email': email}
-            )
-            
-            items = user_response.get('Items', [])
-            if not items:
+            user_data = get_user_by_email(users_table, email)
+            if not user_data:
                 logger.warning(f"No user found for email: {email}")
                 return {
                     'userId': user_id,
@@ -91,7 +108,6 @@ def extract_user_info(event):
                     'department': ''
                 }
             
-            user_data = items[0]
             role = user_data.get('role', 'Employee')
             employee_id = user_data.get('employeeId', '')
             user_department = user_data.get('department', '')
@@ -128,8 +144,7 @@ def extract_user_info(event):
 def get_employee_details(employee_id):
     """Get employee details from Employees table"""
     try:
-        emp_response = employees_table.get_item(Key={'employeeId': employee_id})
-        employee = emp_response.get('Item')
+        employee = get_employee_record(employees_table, employee_id)
         if employee:
             return {
                 'name': employee.get('name', f'Employee {employee_id}'),
@@ -142,9 +157,9 @@ def get_employee_details(employee_id):
         return None
 
 
-def list_performance_scores(filters, user_info):
+def list_performance_scores(filters, user_info, limit=DEFAULT_PAGE_SIZE, cursor=None):
     """
-    List performance scores with filters and role-based access control.
+    List one page of performance scores with filters and role-based access control.
     
     Filters:
     - department: Filter by department
@@ -155,141 +170,108 @@ def list_performance_scores(filters, user_info):
     - Admin: See all data
     - Manager: See only their department
     - Employee: See only their own data
+    
+    Returns (scores, next_cursor); next_cursor is None on the last page.
     """
     try:
         role = user_info.get('role', 'Employee')
         user_employee_id = user_info.get('employeeId', '')
-        user_department = user_info.get('department', '')
+        
+        period_filter = filters.get('period')
         
         # Apply role-based filtering
         if role == 'Employee':
             # Employees can only see their own data
             if not user_employee_id:
                 logger.warning(f"Employee user has no employeeId: {user_info.get('email')}")
-                return []
-            
-            # Query by employeeId
-            score_response = performance_table.query(
-                KeyConditionExpression='employeeId = :empId',
-                ExpressionAttributeValues={':empId': user_employee_id}
-            )
-            scores = score_response.get('Items', [])
+                return [], None
             
-            # Apply period filter if specified
-            period_filter = filters.get('period')
+            # Query by employeeId (period is the sort key)
+            key_condition = Key('employeeId').eq(user_employee_id)
             if period_filter:
-                scores = [s for s in scores if s.get('period') == period_filter]
+                key_condition = key_condition & Key('period').eq(period_filter)
             
-            return scores
+            return fetch_key_page(performance_table.query, {
+                'KeyConditionExpression': key_condition
+            }, limit, cursor)
         
         elif role == 'Manager':
             # Managers can see their department's data
             # Manager's department comes from their employee record in Employees table
             if not user_employee_id:
                 logger.warning(f"Manager user has no employeeId: {user_info.get('email')}")
-                return []
+                return [], None
             
             # Get manager's department from Employees table
             manager_details = get_employee_details(user_employee_id)
             if not manager_details:
                 logger.warning(f"Manager employee record not found: {user_employee_id}")
-                return []
+                return [], None
             
             department = manager_details.get('department', '')
             if not department:
                 logger.warning(f"Manager has no department in Employees table: {user_info.get('email')}")
-                return []
+                return [], None
             
             # Query using GSI: department-period-index
-            period_filter = filters.get('period')
-            
-            if period_filter:
-                # Query with both department and period
-                score_response = performance_table.query(
-                    IndexName='department-period-index',
-                    KeyConditionExpression='department = :dept AND period = :per',
-                    ExpressionAttributeValues={
-                        ':dept': department,
-                        ':per': period_filter
-                    }
-                )
-            else:
-                # Query with department only
-                score_response = performance_table.query(
-                    IndexName='department-period-index',
-                    KeyConditionExpression='department = :dept',
-                    ExpressionAttributeValues={':dept': department}
-                )
-            
-            scores = score_response.get('Items', [])
+            query_kwargs = {
+                'IndexName': 'department-period-index',
+                'KeyConditionExpression': department_period_condition(department, period_filter)
+            }
             
             # Apply employeeId filter if specified
             employee_filter = filters.get('employeeId')
             if employee_filter:
-                scores = [s for s in scores if s.get('employeeId') == employee_filter]
+                query_kwargs['FilterExpression'] = Attr('employeeId').eq(employee_filter)
             
-            return scores
+            return fetch_key_page(performance_table.query, query_kwargs, limit, cursor)
         
         else:  # Admin
             # Admins can see all data with any filters
             department_filter = filters.get('department')
-            period_filter = filters.get('period')
             employee_filter = filters.get('employeeId')
             
             if employee_filter:
-                # Query by specific employee
-                score_response = performance_table.query(
-                    KeyConditionExpression='employeeId = :empId',
-                    ExpressionAttributeValues={':empId': employee_filter}
-                )
-                scores = score_response.get('Items', [])
-                
-                # Apply period filter if specified
+                # Query by specific employee (period is the sort key)
+                key_condition = Key('employeeId').eq(employee_filter)
                 if period_filter:
-                    scores = [s for s in scores if s.get('period') == period_filter]
+                    key_condition = key_condition & Key('period').eq(period_filter)
+                query_kwargs = {'KeyConditionExpression': key_condition}
                 
                 # Apply department filter if specified
                 if department_filter:
-                    scores = [s for s in scores if s.get('department') == department_filter]
+                    query_kwargs['FilterExpression'] = Attr('department').eq(department_filter)
                 
-                return scores
+                return fetch_key_page(performance_table.query, query_kwargs, limit, cursor)
             
             elif department_filter:
                 # Query using GSI: department-period-index
-                if period_filter:
-                    score_response = performance_table.query(
-                        IndexName='department-period-index',
-                        KeyConditionExpression='department = :dept AND period = :per',
-                        ExpressionAttributeValues={
-                            ':dept': department_filter,
-                            ':per': period_filter
-                        }
-                    )
-                else:
-                    score_response = performance_table.query(
-                        IndexName='department-period-index',
-                        KeyConditionExpression='department = :dept',
-                        ExpressionAttributeValues={':dept': department_filter}
-                    )
-                
-                return score_response.get('Items', [])
+                return fetch_key_page(performance_table.query, {
+                    'IndexName': 'department-period-index',
+                    'KeyConditionExpression': department_period_condition(department_filter, period_filter)
+                }, limit, cursor)
             
             else:
-                # Scan all data (no filters)
-                score_response = performance_table.scan()
-                scores = score_response.get('Items', [])
-                
-                # Apply period filter if specified
+                # Scan all data, with the period filter applied server-side
+                scan_kwargs = {}
                 if period_filter:
-                    scores = [s for s in scores if s.get('period') == period_filter]
+                    scan_kwargs['FilterExpression'] = Attr('period').eq(period_filter)
                 
-                return scores
+                return fetch_key_page(performance_table.scan, scan_kwargs, limit, cursor)
     
     except Exception as e:
         logger.error(f"Error listing performance scores: {str(e)}")
         raise
 
 
+def department_period_condition(department, period=None):
+    """Key condition for the department-period-index GSI"""
+    condition = Key('department').eq(department)
+    if period:
+        condition = condition & Key('period').eq(period)
+    return condition
+
+
 def get_single_score(employee_id, period, user_info):
     """Get a single performance score by employeeId and period"""
     try:
@@ -388,42 +370,12 @@ def create_performance_score(data, user_info):
                 logger.warning(f"Manager from {manager_department} attempted to create score for employee from {employee_dept}")
                 return None  # Unauthorized
         
-        # Extract scores
-        kpi_score = Decimal(str(data.get('KPI', 0)))
-        completed_task_score = Decimal(str(data.get('completed_task', 0)))
-        feedback_360_score = Decimal(str(data.get('feedback_360', 0)))
-        
-        # Calculate final score (average of three scores)
-        final_score = data.get('final_score')
-        if final_score is None:
-            final_score = (kpi_score + completed_task_score + feedback_360_score) / 3
-        else:
-            final_score = Decimal(str(final_score))
-        
-        # Create score record
-        now = datetime.utcnow().isoformat()
-        score_id = str(uuid.uuid4())
-        
-        score_item = {
-            'scoreId': score_id,
-            'employeeId': employee_id,
-            'period': period,
-            'employeeName': employee_details['name'],
-            'department': employee_details['department'],
-            'position': employee_details['position'],
-            'overallScore': final_score,
-            'kpiScores': {
-                'KPI': kpi_score,
-                'completed_task': completed_task_score,
-                'feedback_360': feedback_360_score
-            },
-            'calculatedAt': now,
-            'createdAt': now,
-            'updatedAt': now
-        }
+        score_item = build_score_item(data, employee_details, datetime.utcnow().isoformat())
         
         # Save to DynamoDB
-        performance_table.put_item(Item=score_item)
+        put_response = performance_table.put_item(Item=score_item, ReturnValues='ALL_OLD')
+        apply_score_changes(dynamodb, [(put_response.get('Attributes'), score_item)])
+        mark_scoring_inputs_changed(dynamodb, 'performance_score_create')
         
         logger.info(f"Created performance score: {employee_id} - {period}")
         return score_item
@@ -433,6 +385,39 @@ def create_performance_score(data, user_info):
         raise
 
 
+def build_score_item(data, employee_details, now):
+    """Build a PerformanceScores item from request data and the employee's details"""
+    # Extract scores
+    kpi_score = Decimal(str(data.get('KPI', 0)))
+    completed_task_score = Decimal(str(data.get('completed_task', 0)))
+    feedback_360_score = Decimal(str(data.get('feedback_360', 0)))
+    
+    # Calculate final score (average of three scores)
+    final_score = data.get('final_score')
+    if final_score is None:
+        final_score = (kpi_score + completed_task_score + feedback_360_score) / 3
+    else:
+        final_score = Decimal(str(final_score))
+    
+    return {
+        'scoreId': str(uuid.uuid4()),
+        'employeeId': data.get('employeeId'),
+        'period': data.get('period'),
+        'employeeName': employee_details['name'],
+        'department': employee_details['department'],
+        'position': employee_details['position'],
+        'overallScore': final_score,
+        'kpiScores': {
+            'KPI': kpi_score,
+            'completed_task': completed_task_score,
+            'feedback_360': feedback_360_score
+        },
+        'calculatedAt': now,
+        'createdAt': now,
+        'updatedAt': now
+    }
+
+
 def update_performance_score(employee_id, period, data, user_info):
     """Update an existing performance score (Admin and Manager can update)"""
     try:
@@ -505,7 +490,7 @@ def update_performance_score(employee_id, period, data, user_info):
         # Update the record
         now = datetime.utcnow().isoformat()
         
-        performance_table.update_item(
+        updated_response = performance_table.update_item(
             Key={
                 'employeeId': employee_id,
                 'period': period
@@ -515,19 +500,15 @@ def update_performance_score(employee_id, period, data, user_info):
                 ':kpi': kpi_scores,
                 ':score': final_score,
                 ':updated': now
-            }
-        )
-        
-        # Get updated score
-        updated_response = performance_table.get_item(
-            Key={
-                'employeeId': employee_id,
-                'period': period
-            }
+            },
+            ReturnValues='ALL_NEW'
         )
+        updated_score = updated_response.get('Attributes')
+        apply_score_changes(dynamodb, [(existing_score, updated_score)])
+        mark_scoring_inputs_changed(dynamodb, 'performance_score_update')
         
         logger.info(f"Updated performance score: {employee_id} - {period}")
-        return updated_response.get('Item')
+        return updated_score
     
     except Exception as e:
         logger.error(f"Error updating performance score: {str(e)}")
@@ -545,12 +526,15 @@ def delete_performance_score(employee_id, period, user_info):
             return False  # Unauthorized
         
         # Delete the score
-        performance_table.delete_item(
+        delete_response = performance_table.delete_item(
             Key={
                 'employeeId': employee_id,
                 'period': period
-            }
+            },
+            ReturnValues='ALL_OLD'
         )
+        apply_score_changes(dynamodb, [(delete_response.get('Attributes'), None)])
+        mark_scoring_inputs_changed(dynamodb, 'performance_score_delete')
         
         logger.info(f"Deleted performance score: {employee_id} - {period}")
         return True
@@ -560,96 +544,410 @@ def delete_performance_score(employee_id, period, user_info):
         raise
 
 
+def get_employee_details_batch(employee_ids):
+    """Resolve many employees at once with chunked BatchGetItem.
+    Returns {employeeId: details} in the same shape as get_employee_details."""
+    items = batch_get_items(
+        dynamodb,
+        EMPLOYEES_TABLE,
+        [{'employeeId': employee_id} for employee_id in employee_ids],
+        projection='employeeId, #n, department, #p',
+        expression_names={'#n': 'name', '#p': 'position'}
+    )
+    return {
+        item['employeeId']: {
+            'name': item.get('name', f"Employee {item['employeeId']}"),
+            'department': item.get('department', ''),
+            'position': item.get('position', '')
+        }
+        for item in items
+    }
+
+
+def get_existing_scores_batch(score_items):
+    """Fetch the stored scores for the given items' keys, keyed by (employeeId, period)"""
+    keys = [{'employeeId': item['employeeId'], 'period': item['period']} for item in score_items]
+    if not keys:
+        return {}
+    items = batch_get_items(
+        dynamodb,
+        PERFORMANCE_SCORES_TABLE,
+        keys,
+        projection='employeeId, #p, department, overallScore',
+        expression_names={'#p': 'period'}
+    )
+    return {(item['employeeId'], item['period']): item for item in items}
+
+
 def bulk_create_scores(scores_data, user_info):
-    """Bulk create performance scores (Admin and Manager can create)"""
+    """Bulk create performance scores (Admin and Manager can create).
+    
+    Pipeline: resolve every referenced employee with BatchGetItem, resolve the
+    manager's department once, validate and build all items in memory, then
+    write them with BatchWriteItem and fold the changes into the
+    department/period aggregates. Returns one result per input row.
+    """
     try:
         role = user_info.get('role', 'Employee')
+        user_employee_id = user_info.get('employeeId', '')
+        user_email = user_info.get('email', '')
         
         # Only Admin and Manager can bulk create scores
         if role not in ['Admin', 'Manager']:
-            logger.warning(f"Non-admin/manager user attempted to bulk create scores: {user_info.get('email')}")
+            logger.warning(f"Non-admin/manager user attempted to bulk create scores: {user_email}")
             return None  # Unauthorized
         
+        # For Managers, resolve their department once for the whole upload
+        manager_department = None
+        if role == 'Manager':
+            manager_details = get_employee_details(user_employee_id) if user_employee_id else None
+            if not manager_details:
+                logger.error(f"Manager {user_email} has no resolvable employee record: {user_employee_id}")
+                return None  # Unauthorized - Manager employee record must exist
+            manager_department = manager_details.get('department', '')
+        
+        employee_ids = {row.get('employeeId') for row in scores_data if row.get('employeeId')}
+        employees = get_employee_details_batch(employee_ids) if employee_ids else {}
+        logger.info(f"Bulk create - {len(scores_data)} rows, {len(employee_ids)} employees referenced, {len(employees)} found")
+        
+        # Validate and build every item in memory
+        now = datetime.utcnow().isoformat()
         results = []
+        pending = []  # (result index, score item)
         for score_data in scores_data:
+            employee_id = score_data.get('employeeId')
+            period = score_data.get('period')
             try:
-                score = create_performance_score(score_data, user_info)
+                if not employee_id or not period:
+                    raise ValueError("employeeId and period are required")
+                
+                employee_details = employees.get(employee_id)
+                if not employee_details:
+                    raise ValueError(f"Employee {employee_id} not found")
+                
+                if role == 'Manager' and employee_details.get('department', '') != manager_department:
+                    logger.warning(f"Manager from {manager_department} attempted to create score for employee from {employee_details.get('department', '')}")
+                    raise ValueError(f"Access denied: employee {employee_id} is not in your department")
+                
+                score_item = build_score_item(score_data, employee_details, now)
+                pending.append((len(results), score_item))
                 results.append({
                     'success': True,
-                    'employeeId': score_data.get('employeeId'),
-                    'period': score_data.get('period'),
-                    'score': score
+                    'employeeId': employee_id,
+                    'period': period,
+                    'score': score_item
                 })
             except Exception as e:
-                logger.error(f"Failed to create score for {score_data.get('employeeId')}: {str(e)}")
+                logger.error(f"Failed to create score for {employee_id}: {str(e)}")
                 results.append({
                     'success': False,
-                    'employeeId': score_data.get('employeeId'),
-                    'period': score_data.get('period'),
+                    'employeeId': employee_id,
+                    'period': period,
                     'error': str(e)
                 })
         
+        # Existing scores these rows overwrite, needed to keep the aggregates exact
+        existing_scores = get_existing_scores_batch([item for _, item in pending])
+        
+        # Write in batches; rows whose item could not be written are reported as failures
+        failures = batch_put_items(
+            dynamodb,
+            PERFORMANCE_SCORES_TABLE,
+            [item for _, item in pending],
+            ('employeeId', 'period')
+        )
+        failed_keys = {(item['employeeId'], item['period']): error for item, error in failures}
+        written = {}
+        for index, item in pending:
+            key = (item['employeeId'], item['period'])
+            error = failed_keys.get(key)
+            if error:
+                logger.error(f"Failed to write score for {item['employeeId']}: {error}")
+                results[index] = {
+                    'success': False,
+                    'employeeId': item['employeeId'],
+                    'period': item['period'],
+                    'error': error
+                }
+            else:
+                written[key] = item  # last row wins, matching batch_put_items
+        
+        if written:
+            apply_score_changes(dynamodb, [(existing_scores.get(key), item) for key, item in written.items()])
+            mark_scoring_inputs_changed(dynamodb, 'performance_score_bulk')
+        
+        logger.info(f"Bulk create complete - {len(pending) - len(failures)} written, {len(failures)} write failures")
         return results
     except Exception as e:
         logger.error(f"Error in bulk_create_scores: {str(e)}")
         raise
 
 
+# Score columns in upload CSVs are named by period, e.g. "2025-Q1"
+PERIOD_COLUMN_PATTERN = re.compile(r'^\d{4}-Q[1-4]$')
+
+
 def parse_csv_upload(csv_content):
-    """Parse CSV content and extract scores"""
-    import csv
-    import io
+    """
+    Stream score rows out of an uploaded CSV.
     
-    try:
-        lines = csv_content.strip().split('\n')
-        if len(lines) < 2:
-            raise ValueError("CSV file is empty or invalid")
-        
-        # Parse header
-        header = [h.strip() for h in lines[0].split(',')]
-        
-        # Find score column (format: YYYY-QN)
-        score_col_idx = None
-        period = None
-        for idx, col in enumerate(header):
-            if col and len(col) >= 7 and col[4] == '-' and col[5] == 'Q':
-                score_col_idx = idx
-                period = col
-                break
-        
-        if score_col_idx is None:
-            raise ValueError("No score column found (expected format: YYYY-QN)")
-        
-        # Parse data rows
-        scores = []
-        for i in range(1, len(lines)):
-            if not lines[i].strip():
+    The header is resolved once: the employeeId column plus every period
+    column (format YYYY-QN). Each data row yields one score per non-empty
+    period cell. Parsing uses csv.reader, so quoted fields (names with commas)
+    and CRLF line endings are handled. Invalid rows are logged and skipped.
+    
+    This is a generator - header errors raise ValueError on first iteration.
+    """
+    reader = csv.reader(io.StringIO(csv_content.lstrip('\ufeff')))
+    
+    header = None
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            header = [h.strip() for h in row]
+            break
+    if header is None:
+        raise ValueError("CSV file is empty or invalid")
+    
+    if 'employeeId' not in header:
+        raise ValueError("No employeeId column found")
+    employee_id_idx = header.index('employeeId')
+    
+    period_columns = [(idx, col) for idx, col in enumerate(header) if PERIOD_COLUMN_PATTERN.match(col)]
+    if not period_columns:
+        raise ValueError("No score column found (expected format: YYYY-QN)")
+    
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        
+        line = reader.line_num
+        employee_id = row[employee_id_idx].strip() if employee_id_idx < len(row) else ''
+        if not employee_id:
+            logger.warning(f"Skipping invalid row {line}: missing employeeId")
+            continue
+        
+        for idx, period in period_columns:
+            raw_value = row[idx].strip() if idx < len(row) else ''
+            if not raw_value:
                 continue
-                
-            values = [v.strip() for v in lines[i].split(',')]
-            
             try:
-                employee_id_idx = header.index('employeeId')
-                employee_id = values[employee_id_idx]
-                score_value = float(values[score_col_idx])
-                
-                if employee_id and score_value:
-                    scores.append({
-                        'employeeId': employee_id,
-                        'period': period,
-                        'KPI': score_value,
-                        'completed_task': score_value,
-                        'feedback_360': score_value,
-                        'final_score': score_value
-                    })
-            except (ValueError, IndexError) as e:
-                logger.warning(f"Skipping invalid row {i}: {str(e)}")
+                score_value = float(raw_value)
+            except ValueError as e:
+                logger.warning(f"Skipping invalid row {line} ({period}): {str(e)}")
                 continue
-        
-        return scores
-    except Exception as e:
-        logger.error(f"Error parsing CSV: {str(e)}")
-        raise
+            
+            yield {
+                'employeeId': employee_id,
+                'period': period,
+                'KPI': score_value,
+                'completed_task': score_value,
+                'feedback_360': score_value,
+                'final_score': score_value
+            }
+
+
+def iter_chunks(rows, size):
+    """Group any iterable into lists of at most `size` items"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def create_upload_job(scores_data, user_info):
+    """
+    Store parsed upload rows as a job for the background worker.
+    
+    Jobs table layout (PK jobId, SK itemId):
+    - itemId 'META': status and progress counters
+    - itemId 'CHUNK#nnnnnn': up to UPLOAD_JOB_CHUNK_SIZE rows, deleted once processed
+    
+    scores_data may be any iterable (e.g. the parse_csv_upload generator); rows
+    are written chunk by chunk and never held in memory all at once.
+    """
+    job_id = str(uuid.uuid4())
+    now = datetime.utcnow().isoformat()
+    expires_at = int(time.time()) + UPLOAD_JOB_TTL_DAYS * 86400
+    
+    total = 0
+    chunk_count = 0
+    for chunk_index, rows in enumerate(iter_chunks(scores_data, UPLOAD_JOB_CHUNK_SIZE)):
+        upload_jobs_table.put_item(Item={
+            'jobId': job_id,
+            'itemId': f"CHUNK#{chunk_index:06d}",
+            'rowsJson': json.dumps(rows),
+            'expiresAt': expires_at
+        })
+        total += len(rows)
+        chunk_count += 1
+    
+    job = {
+        'jobId': job_id,
+        'itemId': 'META',
+        'status': 'queued',
+        'total': total,
+        'chunks': chunk_count,
+        'processed': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'errors': [],
+        'createdBy': {
+            'userId': user_info.get('userId', ''),
+            'email': user_info.get('email', ''),
+            'role': user_info.get('role', 'Employee'),
+            'employeeId': user_info.get('employeeId', ''),
+            'department': user_info.get('department', '')
+        },
+        'createdAt': now,
+        'updatedAt': now,
+        'expiresAt': expires_at
+    }
+    upload_jobs_table.put_item(Item=job)
+    
+    logger.info(f"Created upload job {job_id}: {total} rows in {chunk_count} chunks")
+    return job
+
+
+def dispatch_upload_job(job_id, context=None):
+    """Start the worker for a job: async self-invoke in Lambda, in-process otherwise"""
+    function_arn = getattr(context, 'invoked_function_arn', None)
+    if UPLOAD_JOB_INLINE or not function_arn:
+        logger.info(f"Processing upload job {job_id} in-process")
+        return run_upload_job(job_id)
+    
+    lambda_client.invoke(
+        FunctionName=function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'uploadJob': {'jobId': job_id}})
+    )
+    logger.info(f"Dispatched upload job {job_id} to {function_arn}")
+    return None
+
+
+def get_upload_job(job_id):
+    """Get the META record of an upload job"""
+    job_response = upload_jobs_table.get_item(Key={'jobId': job_id, 'itemId': 'META'})
+    return job_response.get('Item')
+
+
+def set_upload_job_status(job_id, status, message=None):
+    """Set the status (and optional message) of an upload job"""
+    update_expr = 'SET #status = :status, updatedAt = :updated'
+    values = {':status': status, ':updated': datetime.utcnow().isoformat()}
+    if message:
+        update_expr += ', message = :message'
+        values[':message'] = message
+    upload_jobs_table.update_item(
+        Key={'jobId': job_id, 'itemId': 'META'},
+        UpdateExpression=update_expr,
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues=values
+    )
+
+
+def record_chunk_progress(job_id, chunk_id, succeeded, failed, errors):
+    """Add one chunk's counts to the job exactly once (re-runs of a chunk are ignored)"""
+    # Counter names go through placeholders: 'processed' is a DynamoDB reserved word
+    update_expr = ('SET updatedAt = :updated '
+                   'ADD #processed :processed, #succeeded :succeeded, #failed :failed, doneChunks :chunk')
+    names = {'#processed': 'processed', '#succeeded': 'succeeded', '#failed': 'failed'}
+    values = {
+        ':updated': datetime.utcnow().isoformat(),
+        ':processed': succeeded + failed,
+        ':succeeded': succeeded,
+        ':failed': failed,
+        ':chunk': {chunk_id}
+    }
+    if errors:
+        update_expr = update_expr.replace(
+            'SET updatedAt = :updated',
+            'SET updatedAt = :updated, #errors = list_append(if_not_exists(#errors, :empty), :errors)'
+        )
+        names['#errors'] = 'errors'
+        values[':errors'] = errors
+        values[':empty'] = []
+    
+    try:
+        upload_jobs_table.update_item(
+            Key={'jobId': job_id, 'itemId': 'META'},
+            UpdateExpression=update_expr,
+            ConditionExpression='attribute_not_exists(doneChunks) OR NOT contains(doneChunks, :chunkId)',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={**values, ':chunkId': chunk_id}
+        )
+    except upload_jobs_table.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"Upload job {job_id} chunk {chunk_id} already counted")
+
+
+def run_upload_job(job_id, context=None):
+    """
+    Worker: process a job's remaining chunks through bulk_create_scores.
+    
+    Each chunk is counted once and deleted after it is written, so the worker
+    can be re-run or continued after a timeout without double-counting. When
+    the Lambda is close to its timeout, it re-dispatches itself and returns.
+    """
+    job = get_upload_job(job_id)
+    if not job:
+        logger.error(f"Upload job {job_id} not found")
+        return None
+    if job.get('status') in ('completed', 'failed'):
+        logger.info(f"Upload job {job_id} already {job.get('status')}")
+        return job
+    
+    set_upload_job_status(job_id, 'running')
+    user_info = job.get('createdBy', {})
+    errors_recorded = len(job.get('errors', []))
+    
+    chunks = iter_items(upload_jobs_table.query, {
+        'KeyConditionExpression': Key('jobId').eq(job_id) & Key('itemId').begins_with('CHUNK#')
+    })
+    for chunk in chunks:
+        if context is not None and context.get_remaining_time_in_millis() < UPLOAD_JOB_MIN_REMAINING_MS:
+            logger.info(f"Upload job {job_id} nearing timeout - continuing in a new invocation")
+            dispatch_upload_job(job_id, context)
+            return get_upload_job(job_id)
+        
+        rows = json.loads(chunk['rowsJson'])
+        results = bulk_create_scores(rows, user_info)
+        if results is None:
+            set_upload_job_status(job_id, 'failed', 'Access denied. Admin or Manager role required.')
+            return get_upload_job(job_id)
+        
+        succeeded = sum(1 for r in results if r.get('success'))
+        failed = len(results) - succeeded
+        errors = []
+        if errors_recorded < UPLOAD_JOB_MAX_ERRORS:
+            errors = [
+                {'employeeId': r.get('employeeId'), 'period': r.get('period'), 'error': r.get('error')}
+                for r in results if not r.get('success')
+            ][:UPLOAD_JOB_MAX_ERRORS - errors_recorded]
+            errors_recorded += len(errors)
+        
+        record_chunk_progress(job_id, chunk['itemId'], succeeded, failed, errors)
+        upload_jobs_table.delete_item(Key={'jobId': job_id, 'itemId': chunk['itemId']})
+        logger.info(f"Upload job {job_id} {chunk['itemId']}: {succeeded} succeeded, {failed} failed")
+    
+    set_upload_job_status(job_id, 'completed')
+    return get_upload_job(job_id)
+
+
+def upload_job_status(job):
+    """Public view of an upload job's META record"""
+    return {
+        'jobId': job['jobId'],
+        'status': job.get('status'),
+        'message': job.get('message'),
+        'total': job.get('total', 0),
+        'processed': job.get('processed', 0),
+        'succeeded': job.get('succeeded', 0),
+        'failed': job.get('failed', 0),
+        'errors': job.get('errors', []),
+        'createdAt': job.get('createdAt'),
+        'updatedAt': job.get('updatedAt')
+    }
 
 
 def generate_template(year, quarter):
@@ -691,11 +989,19 @@ def lambda_handler(event, context):
     - POST /performance-scores - Create new score (Admin only)
     - POST /performance-scores/bulk - Bulk create scores (Admin only)
     - POST /performance-scores/upload - Upload CSV file (Admin and Manager)
+    - GET /performance-scores/upload/{jobId} - Upload job progress
     - GET /performance-scores/template/{year}/{quarter} - Download template CSV
     - PUT /performance-scores/{employeeId}/{period} - Update score (Admin only)
     - DELETE /performance-scores/{employeeId}/{period} - Delete score (Admin only)
     """
     try:
+        # Background worker invocation for upload jobs
+        if 'uploadJob' in event:
+            job_id = event['uploadJob'].get('jobId')
+            logger.info(f"Running upload job worker: {job_id}")
+            job = run_upload_job(job_id, context)
+            return upload_job_status(job) if job else None
+        
         logger.info(f"Received event: {json.dumps(event)}")
         
         # Extract HTTP method and path
@@ -720,12 +1026,38 @@ def lambda_handler(event, context):
                 'employeeId': query_parameters.get('employeeId')
             }
             
-            scores = list_performance_scores(filters, user_info)
+            try:
+                limit, cursor = parse_page_params(query_parameters)
+            except PaginationError as e:
+                return response(400, {
+                    'success': False,
+                    'message': str(e)
+                })
+            
+            scores, next_cursor = list_performance_scores(filters, user_info, limit, cursor)
             
             return response(200, {
                 'success': True,
                 'scores': scores,
-                'count': len(scores)
+                'count': len(scores),
+                'nextToken': encode_token(next_cursor)
+            })
+        
+        elif http_method == 'GET' and path.startswith('/performance-scores/upload/'):
+            # GET /performance-scores/upload/{jobId} - Upload job progress
+            job_id = path_parameters.get('jobId') or path.rsplit('/', 1)[-1]
+            job = get_upload_job(job_id)
+            
+            created_by = (job or {}).get('createdBy', {})
+            if not job or (user_info.get('role') != 'Admin' and created_by.get('email') != user_info.get('email')):
+                return response(404, {
+                    'success': False,
+                    'message': 'Upload job not found'
+                })
+            
+            return response(200, {
+                'success': True,
+                'job': upload_job_status(job)
             })
         
         elif http_method == 'GET' and 'template' in path and path_parameters and 'year' in path_parameters:
@@ -786,8 +1118,6 @@ def lambda_handler(event, context):
         
         elif http_method == 'POST' and path == '/performance-scores/upload':
             # POST /performance-scores/upload - Upload CSV file (Admin and Manager)
-            import base64
-            
             body = json.loads(event.get('body', '{}'))
             csv_content = body.get('csvContent', '')
             
@@ -799,7 +1129,10 @@ def lambda_handler(event, context):
             
             # Parse CSV and extract scores
             try:
-                scores_data = parse_csv_upload(csv_content)
+                rows = parse_csv_upload(csv_content)
+                
+                # Read just enough rows to decide between inline and job processing
+                scores_data = list(islice(rows, UPLOAD_SYNC_MAX_ROWS + 1))
                 
                 if not scores_data:
                     return response(400, {
@@ -807,6 +1140,24 @@ def lambda_handler(event, context):
                         'message': 'No valid scores found in CSV'
                     })
                 
+                # Job mode: large (or explicitly async) uploads return a job id immediately
+                if body.get('async') or len(scores_data) > UPLOAD_SYNC_MAX_ROWS:
+                    if user_info.get('role') not in ['Admin', 'Manager']:
+                        return response(403, {
+                            'success': False,
+                            'message': 'Access denied. Admin or Manager role required.'
+                        })
+                    
+                    job = create_upload_job(chain(scores_data, rows), user_info)
+                    dispatch_upload_job(job['jobId'], context)
+                    
+                    return response(202, {
+                        'success': True,
+                        'jobId': job['jobId'],
+                        'total': job['total'],
+                        'message': f"Upload accepted: {job['total']} rows queued for processing"
+                    })
+                
                 # Bulk create scores
                 results = bulk_create_scores(scores_data, user_info)
                 
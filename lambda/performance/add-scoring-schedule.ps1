@@ -0,0 +1,45 @@
+# Schedule the debounced auto-scoring sweep on the performance handler
+# EventBridge invokes the function with {"scheduledScoring": true}; the handler
+# only calls the auto-scoring Lambda when score inputs changed since its last run
+
+$REGION = "ap-southeast-1"
+$FUNCTION_NAME = "insighthr-performance-handler"
+$RULE_NAME = "insighthr-auto-scoring-sweep"
+$SCHEDULE = "rate(5 minutes)"
+
+Write-Host "=== Scheduling Auto-Scoring Sweep ===" -ForegroundColor Cyan
+
+$lambdaArn = aws lambda get-function --function-name $FUNCTION_NAME --region $REGION --query "Configuration.FunctionArn" --output text
+
+$ruleArn = aws events put-rule `
+    --name $RULE_NAME `
+    --schedule-expression $SCHEDULE `
+    --region $REGION `
+    --query "RuleArn" --output text
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "✗ Failed to create rule" -ForegroundColor Red
+    exit 1
+}
+Write-Host "✓ Rule $RULE_NAME ($SCHEDULE)" -ForegroundColor Green
+
+aws lambda add-permission `
+    --function-name $FUNCTION_NAME `
+    --statement-id "$RULE_NAME-invoke" `
+    --action lambda:InvokeFunction `
+    --principal events.amazonaws.com `
+    --source-arn $ruleArn `
+    --region $REGION 2>&1 | Out-Null
+
+$targets = '[{"Id":"performance-handler","Arn":"' + $lambdaArn + '","Input":"{\"scheduledScoring\": true}"}]'
+$targetsFile = [System.IO.Path]::GetTempFileName()
+Set-Content -Path $targetsFile -Value $targets
+
+aws events put-targets --rule $RULE_NAME --targets "file://$targetsFile" --region $REGION | Out-Null
+Remove-Item $targetsFile -Force
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Target set to $FUNCTION_NAME" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to set target" -ForegroundColor Red
+}
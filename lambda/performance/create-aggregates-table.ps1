@@ -0,0 +1,30 @@
+# Create insighthr-performance-aggregates-dev table for dashboard summaries
+# PK: department, SK: period (count, total, min/max, percentile sketch, histogram)
+# Backfill with: python scripts/rebuild-performance-aggregates.py
+
+$tableName = "insighthr-performance-aggregates-dev"
+$region = "ap-southeast-1"
+
+Write-Host "Creating DynamoDB table: $tableName in region: $region" -ForegroundColor Cyan
+
+aws dynamodb create-table `
+    --table-name $tableName `
+    --attribute-definitions `
+        AttributeName=department,AttributeType=S `
+        AttributeName=period,AttributeType=S `
+    --key-schema `
+        AttributeName=department,KeyType=HASH `
+        AttributeName=period,KeyType=RANGE `
+    --billing-mode PAY_PER_REQUEST `
+    --region $region
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Table created successfully!" -ForegroundColor Green
+    Write-Host "Waiting for table to become ACTIVE..." -ForegroundColor Yellow
+    
+    aws dynamodb wait table-exists --table-name $tableName --region $region
+    
+    Write-Host "✓ Table is now ACTIVE" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to create table" -ForegroundColor Red
+}
@@ -0,0 +1,51 @@
+# Create insighthr-exports-dev bucket for large performance CSV exports
+# Objects are written under exports/ and downloaded through presigned URLs
+# Lifecycle: exports expire after 1 day, incomplete multipart uploads are aborted after 1 day
+
+$bucketName = "insighthr-exports-dev"
+$region = "ap-southeast-1"
+
+Write-Host "Creating S3 bucket: $bucketName in region: $region" -ForegroundColor Cyan
+
+aws s3api create-bucket `
+    --bucket $bucketName `
+    --create-bucket-configuration LocationConstraint=$region `
+    --region $region
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Bucket created successfully!" -ForegroundColor Green
+    
+    aws s3api put-public-access-block `
+        --bucket $bucketName `
+        --public-access-block-configuration "BlockPublicAcls=true,IgnorePublicAcls=true,BlockPublicPolicy=true,RestrictPublicBuckets=true" `
+        --region $region
+    
+    Write-Host "✓ Public access blocked" -ForegroundColor Green
+    
+    $lifecycle = @'
+{
+  "Rules": [
+    {
+      "ID": "expire-exports",
+      "Filter": { "Prefix": "exports/" },
+      "Status": "Enabled",
+      "Expiration": { "Days": 1 },
+      "AbortIncompleteMultipartUpload": { "DaysAfterInitiation": 1 }
+    }
+  ]
+}
+'@
+    $lifecycleFile = [System.IO.Path]::GetTempFileName()
+    Set-Content -Path $lifecycleFile -Value $lifecycle
+    
+    aws s3api put-bucket-lifecycle-configuration `
+        --bucket $bucketName `
+        --lifecycle-configuration "file://$lifecycleFile" `
+        --region $region
+    
+    Remove-Item $lifecycleFile -Force
+    
+    Write-Host "✓ Lifecycle rule applied (exports expire after 1 day)" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to create bucket" -ForegroundColor Red
+}
@@ -0,0 +1,27 @@
+# Create insighthr-scoring-state-dev table for the debounced auto-scoring trigger
+# PK: stateId (single item 'auto-scoring': inputsVersion, scoredVersion, lastTriggeredAt)
+
+$tableName = "insighthr-scoring-state-dev"
+$region = "ap-southeast-1"
+
+Write-Host "Creating DynamoDB table: $tableName in region: $region" -ForegroundColor Cyan
+
+aws dynamodb create-table `
+    --table-name $tableName `
+    --attribute-definitions `
+        AttributeName=stateId,AttributeType=S `
+    --key-schema `
+        AttributeName=stateId,KeyType=HASH `
+    --billing-mode PAY_PER_REQUEST `
+    --region $region
+
+if ($LASTEXITCODE -eq 0) {
+    Write-Host "✓ Table created successfully!" -ForegroundColor Green
+    Write-Host "Waiting for table to become ACTIVE..." -ForegroundColor Yellow
+    
+    aws dynamodb wait table-exists --table-name $tableName --region $region
+    
+    Write-Host "✓ Table is now ACTIVE" -ForegroundColor Green
+} else {
+    Write-Host "✗ Failed to create table" -ForegroundColor Red
+}
@@ -15,7 +15,7 @@ Write-Host "`nPackaging Lambda function..." -ForegroundColor Yellow
 if (Test-Path "performance_handler.zip") {
     Remove-Item "performance_handler.zip" -Force
 }
-Compress-Archive -Path "performance_handler.py" -DestinationPath "performance_handler.zip" -Force
+Compress-Archive -Path "performance_handler.py", "..\shared\*.py" -DestinationPath "performance_handler.zip" -Force
 Write-Host "Packaged successfully" -ForegroundColor Green
 
 # Step 2: Check if function exists
@@ -27,11 +27,11 @@ if ($functionExists) {
     Write-Host "Function exists - updating..." -ForegroundColor Green
     aws lambda update-function-code --function-name $FUNCTION_NAME --zip-file fileb://performance_handler.zip --region $REGION
     Start-Sleep -Seconds 2
-    aws lambda update-function-configuration --function-name $FUNCTION_NAME --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,AUTO_SCORING_LAMBDA_ARN=,AWS_REGION=ap-southeast-1}" --region $REGION
+    aws lambda update-function-configuration --function-name $FUNCTION_NAME --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,AUTO_SCORING_LAMBDA_ARN=,EXPORT_BUCKET=insighthr-exports-dev,AWS_REGION=ap-southeast-1}" --region $REGION
 }
 else {
     Write-Host "Function does not exist - creating..." -ForegroundColor Green
-    aws lambda create-function --function-name $FUNCTION_NAME --runtime $RUNTIME --role $ROLE_ARN --handler $HANDLER --zip-file fileb://performance_handler.zip --timeout 30 --memory-size 256 --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,AUTO_SCORING_LAMBDA_ARN=,AWS_REGION=ap-southeast-1}" --region $REGION
+    aws lambda create-function --function-name $FUNCTION_NAME --runtime $RUNTIME --role $ROLE_ARN --handler $HANDLER --zip-file fileb://performance_handler.zip --timeout 30 --memory-size 256 --environment "Variables={PERFORMANCE_SCORES_TABLE=insighthr-performance-scores-dev,EMPLOYEES_TABLE=insighthr-employees-dev,AUTO_SCORING_LAMBDA_ARN=,EXPORT_BUCKET=insighthr-exports-dev,AWS_REGION=ap-southeast-1}" --region $REGION
 }
 
 if ($LASTEXITCODE -eq 0) {
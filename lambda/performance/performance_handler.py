@@ -2,8 +2,17 @@ import json
 import boto3
 import os
 import logging
+import csv
+import io
+import uuid
+from itertools import chain, islice
 from decimal import Decimal
 from datetime import datetime
+from boto3.dynamodb.conditions import Key, Attr
+from identity import get_user_by_email, get_employee_record
+from aggregates import PERFORMANCE_AGGREGATES_TABLE, summarize_aggregate
+from scoring_trigger import maybe_trigger_auto_scoring
+from pagination import DEFAULT_PAGE_SIZE, PaginationError, parse_page_params, fetch_key_page, iter_items, encode_token
 
 # Configure logging
 logger = logging.getLogger()
@@ -12,16 +21,27 @@ logger.setLevel(logging.INFO)
 # Initialize AWS clients
 dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'ap-southeast-1'))
 lambda_client = boto3.client('lambda', region_name=os.environ.get('AWS_REGION', 'ap-southeast-1'))
+s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'ap-southeast-1'))
 
 # Environment variables
 PERFORMANCE_SCORES_TABLE = os.environ.get('PERFORMANCE_SCORES_TABLE', 'insighthr-performance-scores-dev')
 EMPLOYEES_TABLE = os.environ.get('EMPLOYEES_TABLE', 'insighthr-employees-dev')
+USERS_TABLE = os.environ.get('USERS_TABLE', 'insighthr-users-dev')
 AUTO_SCORING_LAMBDA_ARN = os.environ.get('AUTO_SCORING_LAMBDA_ARN', '')
 AWS_REGION = os.environ.get('AWS_REGION', 'ap-southeast-1')
 
+# CSV export settings
+EXPORT_BUCKET = os.environ.get('EXPORT_BUCKET', 'insighthr-exports-dev')
+EXPORT_INLINE_MAX_ROWS = int(os.environ.get('EXPORT_INLINE_MAX_ROWS', '1000'))
+EXPORT_PART_SIZE = max(int(os.environ.get('EXPORT_PART_SIZE_MB', '8')), 5) * 1024 * 1024  # S3 minimum part size is 5 MB
+EXPORT_URL_EXPIRES_SECONDS = int(os.environ.get('EXPORT_URL_EXPIRES_SECONDS', '900'))
+EXPORT_COLUMNS = ['Employee ID', 'Employee Name', 'Department', 'Position', 'Period', 'Overall Score', 'KPI Scores']
+
 # Get table references
 performance_table = dynamodb.Table(PERFORMANCE_SCORES_TABLE)
 employees_table = dynamodb.Table(EMPLOYEES_TABLE)
+users_table = dynamodb.Table(USERS_TABLE)
+aggregates_table = dynamodb.Table(PERFORMANCE_AGGREGATES_TABLE)
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -71,19 +91,11 @@ def extract_user_info(event):
                 'department': ''
             }
         
-        # Query Users table by email using GSI
-        users_table = dynamodb.Table(os.environ.get('USERS_TABLE', 'insighthr-users-dev'))
-        
+        # Query Users table by email using GSI (cached per container)
         try:
             logger.info(f"Looking up user info for email: {email}")
-            response = users_table.query(
-                IndexName='email-index',
-                KeyConditionExpression='email = :email',
-                ExpressionAttributeValues={':email': email}
-            )
-            
-            items = response.get('Items', [])
-            if not items:
+            user_data = get_user_by_email(users_table, email)
+            if not user_data:
                 logger.warning(f"No user found for email: {email}")
                 return {
                     'userId': user_id,
@@ -93,7 +105,6 @@ def extract_user_info(event):
                     'department': ''
                 }
             
-            user_data = items[0]
             role = user_data.get('role', 'Employee')
             employee_id = user_data.get('employeeId', '')
             user_department = user_data.get('department', '')
@@ -102,8 +113,7 @@ def extract_user_info(event):
             if role == 'Manager' and employee_id:
                 logger.info(f"Manager user with employeeId: {employee_id}, looking up department from Employees table")
                 try:
-                    emp_response = employees_table.get_item(Key={'employeeId': employee_id})
-                    employee = emp_response.get('Item')
+                    employee = get_employee_record(employees_table, employee_id)
                     if employee:
                         department = employee.get('department', '')
                         logger.info(f"Found employee record - department: {department}")
@@ -145,33 +155,30 @@ def extract_user_info(event):
         }
 
 
-def trigger_auto_scoring():
+def trigger_auto_scoring(reason='scheduled_sweep'):
     """
-    Optionally trigger auto-scoring Lambda if configured.
+    Invoke the auto-scoring Lambda if score inputs changed since its last run.
+    Called from the scheduled sweep only - reads never trigger scoring. Debouncing
+    and the changed-inputs check live in scoring_trigger.
     This is for Phase 5 integration - gracefully degrades if not available.
     """
     if not AUTO_SCORING_LAMBDA_ARN:
         logger.info("AUTO_SCORING_LAMBDA_ARN not configured - skipping auto-scoring trigger")
-        return False
+        return 'disabled'
     
     try:
-        logger.info(f"Invoking auto-scoring Lambda: {AUTO_SCORING_LAMBDA_ARN}")
-        lambda_client.invoke(
-            FunctionName=AUTO_SCORING_LAMBDA_ARN,
-            InvocationType='Event',  # Async invocation
-            Payload=json.dumps({'trigger': 'performance_query'})
-        )
-        logger.info("Auto-scoring Lambda invoked successfully")
-        return True
+        outcome = maybe_trigger_auto_scoring(dynamodb, lambda_client, AUTO_SCORING_LAMBDA_ARN, reason)
+        logger.info(f"Auto-scoring sweep: {outcome}")
+        return outcome
     except Exception as e:
-        logger.warning(f"Auto-scoring Lambda invocation failed: {str(e)}")
+        logger.warning(f"Auto-scoring sweep failed: {str(e)}")
         logger.info("Continuing with existing performance data")
-        return False
+        return 'failed'
 
 
-def get_all_performance_scores(filters, user_info):
+def build_scores_query(filters, user_info):
     """
-    Query performance scores with filters and role-based access control.
+    Build the DynamoDB request for performance scores with filters and role-based access control.
     
     Filters:
     - department: Filter by department
@@ -182,130 +189,161 @@ def get_all_performance_scores(filters, user_info):
     - Admin: See all data
     - Manager: See only their department
     - Employee: See only their own data
+    
+    Returns (operation, kwargs) or None when the caller can see no data.
     """
-    try:
-        role = user_info.get('role', 'Employee')
-        user_employee_id = user_info.get('employeeId', '')
-        user_department = user_info.get('department', '')
+    role = user_info.get('role', 'Employee')
+    user_employee_id = user_info.get('employeeId', '')
+    user_department = user_info.get('department', '')
+    period_filter = filters.get('period')
+    
+    # Apply role-based filtering
+    if role == 'Employee':
+        # Employees can only see their own data
+        if not user_employee_id:
+            logger.warning(f"Employee user has no employeeId: {user_info.get('email')}")
+            return None
         
-        # Apply role-based filtering
-        if role == 'Employee':
-            # Employees can only see their own data
-            if not user_employee_id:
-                logger.warning(f"Employee user has no employeeId: {user_info.get('email')}")
-                return []
-            
-            # Query by employeeId
-            response = performance_table.query(
-                KeyConditionExpression='employeeId = :empId',
-                ExpressionAttributeValues={':empId': user_employee_id}
-            )
-            scores = response.get('Items', [])
+        # Query by employeeId (period is the sort key)
+        return performance_table.query, {
+            'KeyConditionExpression': employee_period_condition(user_employee_id, period_filter)
+        }
+    
+    elif role == 'Manager':
+        # Managers can see their department's data
+        department = filters.get('department') or user_department
+        if not department:
+            logger.warning(f"Manager user has no department: {user_info.get('email')}")
+            return None
+        
+        # Query using GSI: department-period-index
+        query_kwargs = {
+            'IndexName': 'department-period-index',
+            'KeyConditionExpression': department_period_condition(department, period_filter)
+        }
+        
+        # Apply employeeId filter if specified
+        employee_filter = filters.get('employeeId')
+        if employee_filter:
+            query_kwargs['FilterExpression'] = Attr('employeeId').eq(employee_filter)
+        
+        return performance_table.query, query_kwargs
+    
+    else:  # Admin
+        # Admins can see all data with any filters
+        department_filter = filters.get('department')
+        employee_filter = filters.get('employeeId')
+        
+        if employee_filter:
+            # Query by specific employee
+            query_kwargs = {
+                'KeyConditionExpression': employee_period_condition(employee_filter, period_filter)
+            }
             
-            # Apply period filter if specified
-            period_filter = filters.get('period')
-            if period_filter:
-                scores = [s for s in scores if s.get('period') == period_filter]
+            # Apply department filter if specified
+            if department_filter:
+                query_kwargs['FilterExpression'] = Attr('department').eq(department_filter)
             
-            return scores
+            return performance_table.query, query_kwargs
         
-        elif role == 'Manager':
-            # Managers can see their department's data
-            department = filters.get('department', user_department)
-            if not department:
-                logger.warning(f"Manager user has no department: {user_info.get('email')}")
-                return []
-            
+        elif department_filter:
             # Query using GSI: department-period-index
-            period_filter = filters.get('period')
-            
-            if period_filter:
-                # Query with both department and period
-                response = performance_table.query(
-                    IndexName='department-period-index',
-                    KeyConditionExpression='department = :dept AND period = :per',
-                    ExpressionAttributeValues={
-                        ':dept': department,
-                        ':per': period_filter
-                    }
-                )
-            else:
-                # Query with department only
-                response = performance_table.query(
-                    IndexName='department-period-index',
-                    KeyConditionExpression='department = :dept',
-                    ExpressionAttributeValues={':dept': department}
-                )
-            
-            scores = response.get('Items', [])
-            
-            # Apply employeeId filter if specified
-            employee_filter = filters.get('employeeId')
-            if employee_filter:
-                scores = [s for s in scores if s.get('employeeId') == employee_filter]
-            
-            return scores
+            return performance_table.query, {
+                'IndexName': 'department-period-index',
+                'KeyConditionExpression': department_period_condition(department_filter, period_filter)
+            }
         
-        else:  # Admin
-            # Admins can see all data with any filters
-            department_filter = filters.get('department')
-            period_filter = filters.get('period')
-            employee_filter = filters.get('employeeId')
-            
-            if employee_filter:
-                # Query by specific employee
-                response = performance_table.query(
-                    KeyConditionExpression='employeeId = :empId',
-                    ExpressionAttributeValues={':empId': employee_filter}
-                )
-                scores = response.get('Items', [])
-                
-                # Apply period filter if specified
-                if period_filter:
-                    scores = [s for s in scores if s.get('period') == period_filter]
-                
-                # Apply department filter if specified
-                if department_filter:
-                    scores = [s for s in scores if s.get('department') == department_filter]
-                
-                return scores
-            
-            elif department_filter:
-                # Query using GSI: department-period-index
-                if period_filter:
-                    response = performance_table.query(
-                        IndexName='department-period-index',
-                        KeyConditionExpression='department = :dept AND period = :per',
-                        ExpressionAttributeValues={
-                            ':dept': department_filter,
-                            ':per': period_filter
-                        }
-                    )
-                else:
-                    response = performance_table.query(
-                        IndexName='department-period-index',
-                        KeyConditionExpression='department = :dept',
-                        ExpressionAttributeValues={':dept': department_filter}
-                    )
-                
-                return response.get('Items', [])
-            
-            else:
-                # Scan all data (no filters)
-                response = performance_table.scan()
-                scores = response.get('Items', [])
-                
-                # Apply period filter if specified
-                if period_filter:
-                    scores = [s for s in scores if s.get('period') == period_filter]
-                
-                return scores
+        else:
+            # Scan all data, with the period filter applied server-side
+            scan_kwargs = {}
+            if period_filter:
+                scan_kwargs['FilterExpression'] = Attr('period').eq(period_filter)
+            return performance_table.scan, scan_kwargs
+
+
+def employee_period_condition(employee_id, period=None):
+    """Key condition for the base table (employeeId + optional period)"""
+    condition = Key('employeeId').eq(employee_id)
+    if period:
+        condition = condition & Key('period').eq(period)
+    return condition
+
+
+def department_period_condition(department, period=None):
+    """Key condition for the department-period-index GSI"""
+    condition = Key('department').eq(department)
+    if period:
+        condition = condition & Key('period').eq(period)
+    return condition
+
+
+def get_performance_aggregates(filters, user_info):
+    """
+    Read precomputed department/period aggregates (maintained by performance-scores writes).
+    
+    Filters:
+    - department: Aggregates for one department
+    - period: Aggregates for one period
+    
+    Role-based access:
+    - Admin: Any department
+    - Manager: Only their department
+    - Employee: No access (returns None)
+    """
+    role = user_info.get('role', 'Employee')
+    period_filter = filters.get('period')
+    
+    if role == 'Manager':
+        department = user_info.get('department', '')
+        if not department:
+            logger.warning(f"Manager user has no department: {user_info.get('email')}")
+            return None
+    elif role == 'Admin':
+        department = filters.get('department')
+    else:
+        return None
+    
+    if department:
+        items = iter_items(aggregates_table.query, {
+            'KeyConditionExpression': department_period_condition(department, period_filter)
+        })
+    else:
+        scan_kwargs = {}
+        if period_filter:
+            scan_kwargs['FilterExpression'] = Attr('period').eq(period_filter)
+        items = iter_items(aggregates_table.scan, scan_kwargs)
+    
+    aggregates = [summarize_aggregate(item) for item in items]
+    aggregates.sort(key=lambda a: (a['department'], a['period']))
+    return aggregates
+
+
+def get_all_performance_scores(filters, user_info, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Query one page of performance scores.
+    Returns (scores, next_cursor); next_cursor is None on the last page.
+    """
+    try:
+        query = build_scores_query(filters, user_info)
+        if query is None:
+            return [], None
+        operation, kwargs = query
+        return fetch_key_page(operation, kwargs, limit, cursor)
     
     except Exception as e:
         logger.error(f"Error querying performance scores: {str(e)}")
         raise
 
 
+def iter_performance_scores(filters, user_info):
+    """Stream every performance score matching the filters, one DynamoDB page at a time"""
+    query = build_scores_query(filters, user_info)
+    if query is None:
+        return iter(())
+    operation, kwargs = query
+    return iter_items(operation, kwargs)
+
+
 def get_employee_performance_history(employee_id, user_info):
     """
     Get performance history for a specific employee.
@@ -345,52 +383,155 @@ def get_employee_performance_history(employee_id, user_info):
         raise
 
 
+def export_row(score):
+    """Flatten a performance score into a CSV export row"""
+    return [
+        score.get('employeeId', ''),
+        score.get('employeeName', ''),
+        score.get('department', ''),
+        score.get('position', ''),
+        score.get('period', ''),
+        score.get('overallScore', 0),
+        json.dumps(score.get('kpiScores', {}), cls=DecimalEncoder)
+    ]
+
+
 def generate_csv_export(scores):
     """
     Generate CSV export data from performance scores.
-    Returns CSV string.
+    Returns CSV string (inline export path for small results).
     """
     try:
-        if not scores:
-            return "No data available"
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
         
-        # CSV header
-        csv_lines = ["Employee ID,Employee Name,Department,Position,Period,Overall Score,KPI Scores"]
-        
-        # CSV rows
+        row_count = 0
         for score in scores:
-            employee_id = score.get('employeeId', '')
-            employee_name = score.get('employeeName', '')
-            department = score.get('department', '')
-            position = score.get('position', '')
-            period = score.get('period', '')
-            overall_score = score.get('overallScore', 0)
-            kpi_scores = score.get('kpiScores', {})
-            
-            # Format KPI scores as JSON string
-            kpi_scores_str = json.dumps(kpi_scores, cls=DecimalEncoder)
-            
-            csv_lines.append(f"{employee_id},{employee_name},{department},{position},{period},{overall_score},\"{kpi_scores_str}\"")
+            writer.writerow(export_row(score))
+            row_count += 1
         
-        return "\n".join(csv_lines)
+        if row_count == 0:
+            return "No data available"
+        
+        return buffer.getvalue()
     
     except Exception as e:
         logger.error(f"Error generating CSV export: {str(e)}")
         raise
 
 
+class S3MultipartWriter:
+    """
+    Text file-like sink for csv.writer that streams into an S3 multipart upload.
+    
+    Output is buffered until EXPORT_PART_SIZE bytes and then uploaded as one
+    part, so memory stays bounded by a single part regardless of export size.
+    """
+    
+    def __init__(self, bucket, key, content_type='text/csv'):
+        self.bucket = bucket
+        self.key = key
+        self.parts = []
+        self.buffer = io.StringIO()
+        self.buffered_bytes = 0
+        upload = s3_client.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)
+        self.upload_id = upload['UploadId']
+    
+    def write(self, text):
+        self.buffer.write(text)
+        self.buffered_bytes += len(text)  # chars <= UTF-8 bytes, so parts never fall under the S3 minimum
+        if self.buffered_bytes >= EXPORT_PART_SIZE:
+            self.flush_part()
+        return len(text)
+    
+    def flush_part(self):
+        data = self.buffer.getvalue().encode('utf-8')
+        self.buffer = io.StringIO()
+        self.buffered_bytes = 0
+        if not data:
+            return
+        part_number = len(self.parts) + 1
+        result = s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+        self.parts.append({'ETag': result['ETag'], 'PartNumber': part_number})
+    
+    def complete(self):
+        """Upload the last (possibly short) part and assemble the object"""
+        self.flush_part()
+        s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+    
+    def abort(self):
+        try:
+            s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload {self.upload_id}: {str(e)}")
+
+
+def export_csv_to_s3(scores, user_info):
+    """
+    Stream performance scores into a CSV object in EXPORT_BUCKET.
+    Returns (key, row_count, presigned download URL).
+    """
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    owner = user_info.get('userId') or 'anonymous'
+    key = f"exports/performance/{owner}/{timestamp}-{uuid.uuid4().hex[:8]}.csv"
+    
+    sink = S3MultipartWriter(EXPORT_BUCKET, key)
+    row_count = 0
+    try:
+        writer = csv.writer(sink)
+        writer.writerow(EXPORT_COLUMNS)
+        for score in scores:
+            writer.writerow(export_row(score))
+            row_count += 1
+        sink.complete()
+    except Exception:
+        sink.abort()
+        raise
+    
+    url = s3_client.generate_presigned_url(
+        'get_object',
+        Params={
+            'Bucket': EXPORT_BUCKET,
+            'Key': key,
+            'ResponseContentDisposition': 'attachment; filename="performance_export.csv"'
+        },
+        ExpiresIn=EXPORT_URL_EXPIRES_SECONDS
+    )
+    logger.info(f"Exported {row_count} performance scores to s3://{EXPORT_BUCKET}/{key}")
+    return key, row_count, url
+
+
 def lambda_handler(event, context):
     """
     Main Lambda handler for performance data operations.
     
     Endpoints:
     - GET /performance - Get all performance scores with filters
+    - GET /performance/aggregates - Get department/period summary statistics
     - GET /performance/{employeeId} - Get employee performance history
-    - POST /performance/export - Export performance data as CSV
+    - POST /performance/export - Export performance data as CSV (inline, or S3 presigned URL for large results)
+    
+    Scheduled events ({"scheduledScoring": true} from EventBridge) run the
+    debounced auto-scoring sweep instead of an API route.
     """
     try:
         logger.info(f"Received event: {json.dumps(event)}")
         
+        if event.get('scheduledScoring'):
+            return {'outcome': trigger_auto_scoring()}
+        
         # Extract HTTP method and path
         http_method = event.get('httpMethod', '')
         path = event.get('path', '')
@@ -400,9 +541,6 @@ def lambda_handler(event, context):
         # Extract user information from JWT
         user_info = extract_user_info(event)
         
-        # Optional: Trigger auto-scoring Lambda (Phase 5 feature)
-        trigger_auto_scoring()
-        
         # Route to appropriate handler
         if http_method == 'GET' and path == '/performance':
             # GET /performance - Get all performance scores with filters
@@ -412,12 +550,42 @@ def lambda_handler(event, context):
                 'employeeId': query_parameters.get('employeeId')
             }
             
-            scores = get_all_performance_scores(filters, user_info)
+            try:
+                limit, cursor = parse_page_params(query_parameters)
+            except PaginationError as e:
+                return response(400, {
+                    'success': False,
+                    'message': str(e)
+                })
+            
+            scores, next_cursor = get_all_performance_scores(filters, user_info, limit, cursor)
             
             return response(200, {
                 'success': True,
                 'scores': scores,
-                'count': len(scores)
+                'count': len(scores),
+                'nextToken': encode_token(next_cursor)
+            })
+        
+        elif http_method == 'GET' and path == '/performance/aggregates':
+            # GET /performance/aggregates - Department/period summary statistics
+            filters = {
+                'department': query_parameters.get('department'),
+                'period': query_parameters.get('period')
+            }
+            
+            aggregates = get_performance_aggregates(filters, user_info)
+            
+            if aggregates is None:
+                return response(403, {
+                    'success': False,
+                    'message': 'Access denied'
+                })
+            
+            return response(200, {
+                'success': True,
+                'aggregates': aggregates,
+                'count': len(aggregates)
             })
         
         elif http_method == 'GET' and '/performance/' in path:
@@ -450,8 +618,21 @@ def lambda_handler(event, context):
             body = json.loads(event.get('body', '{}'))
             filters = body.get('filters', {})
             
-            scores = get_all_performance_scores(filters, user_info)
-            csv_data = generate_csv_export(scores)
+            scores = iter_performance_scores(filters, user_info)
+            
+            # Small results stay inline; larger ones (or delivery=url) go through S3
+            head = list(islice(scores, EXPORT_INLINE_MAX_ROWS + 1))
+            if body.get('delivery') == 'url' or len(head) > EXPORT_INLINE_MAX_ROWS:
+                key, row_count, url = export_csv_to_s3(chain(head, scores), user_info)
+                return response(200, {
+                    'success': True,
+                    'downloadUrl': url,
+                    'expiresIn': EXPORT_URL_EXPIRES_SECONDS,
+                    'rowCount': row_count,
+                    'key': key
+                })
+            
+            csv_data = generate_csv_export(head)
             
             return {
                 'statusCode': 200,
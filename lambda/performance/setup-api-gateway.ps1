@@ -135,8 +135,36 @@ aws apigateway put-integration --rest-api-id $API_ID --resource-id $exportResour
 
 Write-Host "POST method configured" -ForegroundColor Green
 
-# Step 10: Deploy to dev stage
-Write-Host "`nStep 10: Deploying to dev stage..." -ForegroundColor Yellow
+# Step 10: Create GET /performance/aggregates
+Write-Host "`nStep 10: Creating /performance/aggregates resource..." -ForegroundColor Yellow
+$aggregatesResource = aws apigateway create-resource --rest-api-id $API_ID --parent-id $performanceResourceId --path-part "aggregates" --region $REGION 2>&1
+
+if ($LASTEXITCODE -eq 0) {
+    $aggregatesResourceId = ($aggregatesResource | ConvertFrom-Json).id
+    Write-Host "Aggregates resource created: $aggregatesResourceId" -ForegroundColor Green
+}
+else {
+    Write-Host "Resource might already exist, fetching..." -ForegroundColor Yellow
+    $resources = aws apigateway get-resources --rest-api-id $API_ID --region $REGION | ConvertFrom-Json
+    $aggregatesResourceId = ($resources.items | Where-Object { $_.path -eq "/performance/aggregates" }).id
+    
+    if ($aggregatesResourceId) {
+        Write-Host "Found existing resource: $aggregatesResourceId" -ForegroundColor Green
+    }
+    else {
+        Write-Host "Failed to create or find resource" -ForegroundColor Red
+        exit 1
+    }
+}
+
+aws apigateway put-method --rest-api-id $API_ID --resource-id $aggregatesResourceId --http-method GET --authorization-type COGNITO_USER_POOLS --authorizer-id $AUTHORIZER_ID --region $REGION
+
+aws apigateway put-integration --rest-api-id $API_ID --resource-id $aggregatesResourceId --http-method GET --type AWS_PROXY --integration-http-method POST --uri $uri --region $REGION
+
+Write-Host "GET method configured" -ForegroundColor Green
+
+# Step 11: Deploy to dev stage
+Write-Host "`nStep 11: Deploying to dev stage..." -ForegroundColor Yellow
 aws apigateway create-deployment --rest-api-id $API_ID --stage-name dev --region $REGION
 
 if ($LASTEXITCODE -eq 0) {
@@ -146,5 +174,6 @@ if ($LASTEXITCODE -eq 0) {
 Write-Host "`n=== API Gateway Setup Complete ===" -ForegroundColor Cyan
 Write-Host "Endpoints created:" -ForegroundColor White
 Write-Host "  GET  https://${API_ID}.execute-api.${REGION}.amazonaws.com/dev/performance" -ForegroundColor Cyan
+Write-Host "  GET  https://${API_ID}.execute-api.${REGION}.amazonaws.com/dev/performance/aggregates" -ForegroundColor Cyan
 Write-Host "  GET  https://${API_ID}.execute-api.${REGION}.amazonaws.com/dev/performance/{employeeId}" -ForegroundColor Cyan
 Write-Host "  POST https://${API_ID}.execute-api.${REGION}.amazonaws.com/dev/performance/export" -ForegroundColor Cyan
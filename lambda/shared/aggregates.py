@@ -0,0 +1,212 @@
+"""
+Materialized department/period performance aggregates shared by the InsightHR handlers.
+
+One item per (department, period) in PERFORMANCE_AGGREGATES_TABLE holds:
+- scoreCount, scoreTotal, minScore, maxScore
+- sketch: {"<0..100>": count} - scores rounded to 1 point, used for percentiles
+- histogram: {"<0..90>": count} - 10-point buckets derived from the sketch
+
+performance_scores_handler calls apply_score_changes() after every write with
+(old_item, new_item) pairs, so the table is maintained incrementally and
+dashboards read O(departments x periods) items instead of every score.
+
+Each aggregate is updated read-modify-write with an optimistic `version`
+check, retried on conflict. minScore/maxScore are exact while scores are only
+added; after the current min/max is removed they fall back to sketch (1 point)
+resolution. scripts/rebuild-performance-aggregates.py recomputes the table
+from scratch.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import os
+from datetime import datetime
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+PERFORMANCE_AGGREGATES_TABLE = os.environ.get('PERFORMANCE_AGGREGATES_TABLE', 'insighthr-performance-aggregates-dev')
+MAX_AGGREGATE_RETRIES = int(os.environ.get('MAX_AGGREGATE_RETRIES', '5'))
+SKETCH_MAX_SCORE = 100
+HISTOGRAM_BUCKET_WIDTH = 10
+SUMMARY_PERCENTILES = (25, 50, 75, 90)
+
+
+def _score_of(item):
+    """Return (department, period, score) for a score item, or None if it can't be aggregated"""
+    if not item:
+        return None
+    department = item.get('department')
+    period = item.get('period')
+    score = item.get('overallScore')
+    if not department or not period or score is None:
+        return None
+    return department, period, Decimal(str(score))
+
+
+def _sketch_bucket(score):
+    return str(min(max(int(round(score)), 0), SKETCH_MAX_SCORE))
+
+
+def group_score_changes(changes):
+    """
+    Turn (old_item, new_item) pairs into per-aggregate deltas.
+    Returns {(department, period): [(score, +1 | -1), ...]}.
+    """
+    grouped = {}
+    for old_item, new_item in changes:
+        for item, sign in ((old_item, -1), (new_item, 1)):
+            scored = _score_of(item)
+            if scored:
+                department, period, score = scored
+                grouped.setdefault((department, period), []).append((score, sign))
+    return grouped
+
+
+def empty_aggregate(department, period):
+    return {
+        'department': department,
+        'period': period,
+        'scoreCount': 0,
+        'scoreTotal': Decimal('0'),
+        'minScore': None,
+        'maxScore': None,
+        'sketch': {},
+        'version': 0
+    }
+
+
+def apply_deltas(aggregate, deltas):
+    """Apply (score, sign) deltas to an aggregate dict in place"""
+    sketch = aggregate['sketch']
+    for score, sign in deltas:
+        bucket = _sketch_bucket(score)
+        aggregate['scoreCount'] = int(aggregate['scoreCount']) + sign
+        aggregate['scoreTotal'] = Decimal(str(aggregate['scoreTotal'])) + sign * score
+        sketch[bucket] = int(sketch.get(bucket, 0)) + sign
+        if sketch[bucket] <= 0:
+            del sketch[bucket]
+
+        if sign > 0:
+            if aggregate['minScore'] is None or score < aggregate['minScore']:
+                aggregate['minScore'] = score
+            if aggregate['maxScore'] is None or score > aggregate['maxScore']:
+                aggregate['maxScore'] = score
+        else:
+            buckets = sorted(int(b) for b in sketch)
+            if not buckets:
+                aggregate['minScore'] = None
+                aggregate['maxScore'] = None
+                continue
+            # The removed score may have been the extreme; fall back to the sketch edge
+            if aggregate['minScore'] is None or int(bucket) <= int(_sketch_bucket(aggregate['minScore'])):
+                aggregate['minScore'] = Decimal(buckets[0])
+            if aggregate['maxScore'] is None or int(bucket) >= int(_sketch_bucket(aggregate['maxScore'])):
+                aggregate['maxScore'] = Decimal(buckets[-1])
+
+    aggregate['histogram'] = build_histogram(sketch)
+    return aggregate
+
+
+def build_histogram(sketch):
+    histogram = {}
+    for bucket, count in sketch.items():
+        start = min(int(bucket) // HISTOGRAM_BUCKET_WIDTH * HISTOGRAM_BUCKET_WIDTH,
+                    SKETCH_MAX_SCORE - HISTOGRAM_BUCKET_WIDTH)
+        histogram[str(start)] = histogram.get(str(start), 0) + int(count)
+    return histogram
+
+
+def _update_aggregate(table, department, period, deltas):
+    """Read-modify-write one aggregate with an optimistic version check"""
+    for _ in range(MAX_AGGREGATE_RETRIES + 1):
+        current = table.get_item(
+            Key={'department': department, 'period': period},
+            ConsistentRead=True
+        ).get('Item')
+        aggregate = dict(current) if current else empty_aggregate(department, period)
+        aggregate['sketch'] = dict(aggregate.get('sketch', {}))
+        expected_version = int(aggregate.get('version', 0))
+
+        apply_deltas(aggregate, deltas)
+        aggregate['version'] = expected_version + 1
+        aggregate['updatedAt'] = datetime.utcnow().isoformat()
+
+        if aggregate['scoreCount'] <= 0:
+            condition = {'ConditionExpression': 'version = :v',
+                         'ExpressionAttributeValues': {':v': expected_version}}
+            try:
+                if current:
+                    table.delete_item(Key={'department': department, 'period': period}, **condition)
+                return True
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                continue
+
+        if current:
+            condition = {'ConditionExpression': 'version = :v',
+                         'ExpressionAttributeValues': {':v': expected_version}}
+        else:
+            condition = {'ConditionExpression': 'attribute_not_exists(department)'}
+        try:
+            table.put_item(Item=aggregate, **condition)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+    return False
+
+
+def apply_score_changes(dynamodb, changes):
+    """
+    Fold (old_item, new_item) score changes into the aggregates table.
+    Returns the (department, period) keys that could not be updated; errors are
+    logged, never raised, so a failed aggregate update never fails the score write.
+    """
+    table = dynamodb.Table(PERFORMANCE_AGGREGATES_TABLE)
+    failed = []
+    for (department, period), deltas in group_score_changes(changes).items():
+        try:
+            if not _update_aggregate(table, department, period, deltas):
+                print(f"Aggregate {department}/{period} still conflicting after {MAX_AGGREGATE_RETRIES} retries")
+                failed.append((department, period))
+        except Exception as e:
+            print(f"Failed to update aggregate {department}/{period}: {str(e)}")
+            failed.append((department, period))
+    return failed
+
+
+def sketch_percentile(sketch, count, percentile):
+    """Nearest-rank percentile from the 1-point sketch"""
+    if not count:
+        return None
+    rank = max(1, -(-int(count) * percentile // 100))
+    seen = 0
+    for bucket in sorted(sketch, key=int):
+        seen += int(sketch[bucket])
+        if seen >= rank:
+            return int(bucket)
+    return None
+
+
+def summarize_aggregate(item):
+    """API view of an aggregate item"""
+    count = int(item.get('scoreCount', 0))
+    total = Decimal(str(item.get('scoreTotal', 0)))
+    sketch = item.get('sketch', {})
+    histogram = item.get('histogram') or build_histogram(sketch)
+    return {
+        'department': item.get('department'),
+        'period': item.get('period'),
+        'count': count,
+        'mean': round(float(total / count), 2) if count else None,
+        'min': item.get('minScore'),
+        'max': item.get('maxScore'),
+        'percentiles': {f"p{p}": sketch_percentile(sketch, count, p) for p in SUMMARY_PERCENTILES},
+        'histogram': [
+            {'from': start, 'to': start + HISTOGRAM_BUCKET_WIDTH, 'count': int(histogram.get(str(start), 0))}
+            for start in range(0, SKETCH_MAX_SCORE, HISTOGRAM_BUCKET_WIDTH)
+        ],
+        'updatedAt': item.get('updatedAt')
+    }
@@ -0,0 +1,199 @@
+"""
+Attendance 360 points engine driven by a declarative rule table.
+
+A worked minute earns pointsPerHour / 60 points. A minute inside one of the
+rule table's windows earns the window's multiplier instead, and the window
+can set the day's status:
+
+- early_bird: minutes before 08:00 earn 1.25x, but only when the check-in is
+  before 06:00
+- OT: minutes after 17:00 earn 1.5x
+- otherwise the status is 'late' for a check-in after 09:00, else 'work'
+
+When several windows apply, the last one in the table sets the status (an
+early bird who stays late is OT). Windows may not overlap, so a minute is
+never paid twice. Times are 'HH:MM' ('H:MM' and 'HH:MM:SS' are accepted;
+seconds are ignored) and the day ends at '24:00'.
+
+One PointsEngine is compiled from the table at import and serves two APIs:
+- score(check_in, check_out) -> (status, points) for one check-out
+- score_batch(check_in_minutes, check_out_minutes) -> (status_codes, points)
+  for imports, recomputes and migrations. It uses NumPy when it is installed
+  and a plain Python loop otherwise; engine.statuses maps codes to names.
+
+ATTENDANCE_POINTS_RULES (a JSON object shaped like DEFAULT_POINTS_RULES)
+replaces the default table. scripts/benchmark-attendance-points.py measures
+both APIs.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:  # not in the Lambda runtime; score_batch falls back to Python
+    np = None
+
+DEFAULT_POINTS_RULES = {
+    'pointsPerHour': 10,
+    'windows': [
+        {'status': 'early_bird', 'from': '00:00', 'to': '08:00', 'multiplier': 1.25, 'checkInBefore': '06:00'},
+        {'status': 'OT', 'from': '17:00', 'to': '24:00', 'multiplier': 1.5},
+    ],
+    'lateAfter': '09:00',
+    'lateStatus': 'late',
+    'defaultStatus': 'work'
+}
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_minutes(value, allow_end_of_day=False):
+    """'HH:MM' (or 'H:MM', 'HH:MM:SS') -> minutes after midnight; raises ValueError"""
+    parts = str(value).split(':')
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid time: {value}")
+    hour, minute = int(parts[0]), int(parts[1])
+    if allow_end_of_day and hour == 24 and minute == 0:
+        return MINUTES_PER_DAY
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time: {value}")
+    return hour * 60 + minute
+
+
+def load_rules():
+    """Rule table from ATTENDANCE_POINTS_RULES (JSON object) or the defaults"""
+    raw = os.environ.get('ATTENDANCE_POINTS_RULES')
+    if not raw:
+        return DEFAULT_POINTS_RULES
+    rules = json.loads(raw)
+    if not isinstance(rules, dict):
+        raise ValueError("ATTENDANCE_POINTS_RULES must be a JSON object")
+    return dict(DEFAULT_POINTS_RULES, **rules)
+
+
+class PointsEngine:
+    """Compiled rule table with a scalar and a batch scoring API"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.rate = float(rules['pointsPerHour']) / 60
+        self.late_after = parse_minutes(rules['lateAfter'])
+        self.default_status = rules['defaultStatus']
+        self.late_status = rules['lateStatus']
+
+        # (status code, start, end, extra multiplier, checkInBefore or None)
+        self.windows = []
+        statuses = [self.default_status, self.late_status]
+        for window in rules['windows']:
+            if window['status'] not in statuses:
+                statuses.append(window['status'])
+            before = window.get('checkInBefore')
+            self.windows.append((
+                statuses.index(window['status']),
+                parse_minutes(window['from']),
+                parse_minutes(window['to'], allow_end_of_day=True),
+                float(window['multiplier']) - 1,
+                parse_minutes(before) if before else None
+            ))
+        self.statuses = tuple(statuses)
+
+        spans = sorted((start, end) for _, start, end, _, _ in self.windows)
+        for (start, end), (next_start, _) in zip(spans, spans[1:]):
+            if next_start < end:
+                raise ValueError("Points windows must not overlap")
+        if any(start >= end for start, end in spans):
+            raise ValueError("Points windows must end after they start")
+
+    def check_in_status(self, check_in):
+        """Provisional status at check-in, before the check-out is known"""
+        minute = parse_minutes(check_in)
+        for code, _, _, _, before in self.windows:
+            if before is not None and minute < before:
+                return self.statuses[code]
+        return self.late_status if minute > self.late_after else self.default_status
+
+    def score_minutes(self, check_in, check_out):
+        """(status, points) for check-in/check-out given as minutes after midnight"""
+        weighted = max(check_out - check_in, 0)
+        code = 1 if check_in > self.late_after else 0
+        for window_code, start, end, extra, before in self.windows:
+            if before is not None and check_in >= before:
+                continue
+            overlap = min(check_out, end) - max(check_in, start)
+            if overlap > 0:
+                weighted += overlap * extra
+                code = window_code
+        return self.statuses[code], round(weighted * self.rate, 2)
+
+    def score(self, check_in, check_out):
+        """(status, points) for 'HH:MM' check-in/check-out times; raises ValueError"""
+        return self.score_minutes(parse_minutes(check_in), parse_minutes(check_out))
+
+    def score_batch(self, check_in_minutes, check_out_minutes):
+        """Score arrays of minute offsets; returns (status codes, points).
+
+        With NumPy both results are arrays (int8 codes, float64 points);
+        without it they are lists. Codes index engine.statuses.
+        """
+        if np is None:
+            codes, points = [], []
+            index = {status: code for code, status in enumerate(self.statuses)}
+            for check_in, check_out in zip(check_in_minutes, check_out_minutes):
+                status, value = self.score_minutes(check_in, check_out)
+                codes.append(index[status])
+                points.append(value)
+            return codes, points
+
+        check_in = np.asarray(check_in_minutes, dtype=np.int32)
+        check_out = np.asarray(check_out_minutes, dtype=np.int32)
+        weighted = np.maximum(check_out - check_in, 0).astype(np.float64)
+        codes = (check_in > self.late_after).astype(np.int8)
+        for code, start, end, extra, before in self.windows:
+            overlap = np.minimum(check_out, end) - np.maximum(check_in, start)
+            applies = overlap > 0
+            if before is not None:
+                applies &= check_in < before
+            weighted += np.where(applies, overlap * extra, 0.0)
+            codes[applies] = code
+        return codes, np.round(weighted * self.rate, 2)
+
+    def score_records(self, times):
+        """Score (check_in, check_out) string pairs in one batch.
+
+        Returns a list aligned with `times` holding (status, points), or None
+        where a time is missing or unparsable.
+        """
+        times = list(times)
+        rows, check_ins, check_outs = [], [], []
+        for row, (check_in, check_out) in enumerate(times):
+            if not check_in or not check_out:
+                continue
+            try:
+                check_ins.append(parse_minutes(check_in))
+                check_outs.append(parse_minutes(check_out))
+            except ValueError:
+                del check_ins[len(check_outs):]
+                continue
+            rows.append(row)
+
+        results = [None] * len(times)
+        codes, points = self.score_batch(check_ins, check_outs)
+        for row, code, value in zip(rows, codes, points):
+            results[row] = (self.statuses[int(code)], float(value))
+        return results
+
+
+POINTS_ENGINE = PointsEngine(load_rules())
+
+
+def calculate_points(check_in, check_out, engine=None):
+    """(status, points) for one check-in/check-out pair; raises ValueError"""
+    return (engine or POINTS_ENGINE).score(check_in, check_out)
+
+
+def check_in_status(check_in, engine=None):
+    """Provisional status for a check-in time; raises ValueError"""
+    return (engine or POINTS_ENGINE).check_in_status(check_in)
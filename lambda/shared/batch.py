@@ -0,0 +1,107 @@
+"""
+Chunked BatchGetItem / BatchWriteItem helpers shared by the InsightHR bulk paths.
+
+Both helpers work on the boto3 DynamoDB service resource, so keys and items use
+plain Python types (str, Decimal, dict) exactly like Table.get_item/put_item.
+Unprocessed keys/items are retried with exponential backoff; whatever is still
+unprocessed after MAX_BATCH_RETRIES is reported back to the caller instead of
+being dropped, so bulk endpoints can keep per-row success/error reporting.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import os
+import time
+
+BATCH_GET_SIZE = 100    # DynamoDB BatchGetItem limit
+BATCH_WRITE_SIZE = 25   # DynamoDB BatchWriteItem limit
+MAX_BATCH_RETRIES = int(os.environ.get('MAX_BATCH_RETRIES', '5'))
+
+
+def _backoff(attempt):
+    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+
+def _key_tuple(item, key_names):
+    return tuple(item.get(name) for name in key_names)
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def batch_get_items(dynamodb, table_name, keys, projection=None, expression_names=None):
+    """Fetch many items by primary key with chunked BatchGetItem.
+
+    Duplicate keys are collapsed (BatchGetItem rejects them). Items that do not
+    exist are simply absent from the result. Raises if keys are still
+    unprocessed after MAX_BATCH_RETRIES.
+    """
+    unique_keys = []
+    seen = set()
+    for key in keys:
+        marker = tuple(sorted(key.items()))
+        if marker not in seen:
+            seen.add(marker)
+            unique_keys.append(key)
+
+    found = []
+    for chunk in chunked(unique_keys, BATCH_GET_SIZE):
+        request = {'Keys': chunk}
+        if projection:
+            request['ProjectionExpression'] = projection
+        if expression_names:
+            request['ExpressionAttributeNames'] = expression_names
+
+        pending = {table_name: request}
+        attempt = 0
+        while pending:
+            result = dynamodb.batch_get_item(RequestItems=pending)
+            found.extend(result.get('Responses', {}).get(table_name, []))
+            pending = result.get('UnprocessedKeys') or {}
+            if pending:
+                if attempt >= MAX_BATCH_RETRIES:
+                    raise RuntimeError(
+                        f"BatchGetItem on {table_name} left "
+                        f"{len(pending[table_name]['Keys'])} keys unprocessed"
+                    )
+                _backoff(attempt)
+                attempt += 1
+    return found
+
+
+def batch_put_items(dynamodb, table_name, items, key_names):
+    """Write many items with chunked BatchWriteItem.
+
+    Items sharing a primary key are collapsed to the last one (BatchWriteItem
+    rejects duplicates in a request). Returns a list of (item, error) pairs for
+    items that could not be written; an empty list means everything landed.
+    """
+    latest = {}
+    for item in items:
+        latest[_key_tuple(item, key_names)] = item
+    unique_items = list(latest.values())
+
+    failures = []
+    for chunk in chunked(unique_items, BATCH_WRITE_SIZE):
+        pending = {table_name: [{'PutRequest': {'Item': item}} for item in chunk]}
+        attempt = 0
+        while pending:
+            try:
+                result = dynamodb.batch_write_item(RequestItems=pending)
+            except Exception as e:
+                failures.extend((request['PutRequest']['Item'], str(e)) for request in pending[table_name])
+                break
+            pending = result.get('UnprocessedItems') or {}
+            if pending:
+                if attempt >= MAX_BATCH_RETRIES:
+                    failures.extend(
+                        (request['PutRequest']['Item'], 'Write throttled: item left unprocessed')
+                        for request in pending[table_name]
+                    )
+                    break
+                _backoff(attempt)
+                attempt += 1
+    return failures
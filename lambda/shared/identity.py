@@ -0,0 +1,172 @@
+"""
+Per-container identity resolution cache shared by the InsightHR Lambda handlers.
+
+Authenticated requests resolve the caller's Users record (role, department,
+employeeId) and, for Managers, their Employees record. Both lookups are cached
+at module scope so warm invocations skip the DynamoDB round-trips.
+
+- Users records are cached under both the Cognito `sub` (userId) and email.
+- Entries expire after USER_CACHE_TTL_SECONDS; the cache is LRU-bounded to
+  USER_CACHE_MAX_SIZE entries.
+- Misses are not cached, so newly created users resolve immediately.
+- invalidate_user() drops an entry explicitly (users_handler calls it on every
+  write). Invalidation is per container; other functions pick up the change
+  once their entry expires, so keep the TTL short.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+from boto3.dynamodb.conditions import Key
+
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '1024'))
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, max_size, ttl, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+employee_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS)
+
+
+def _email_key(email):
+    return ('email', email)
+
+
+def _sub_key(user_id):
+    return ('sub', user_id)
+
+
+def cache_user(user):
+    """Store a Users record under its userId and email"""
+    if not user:
+        return
+    if user.get('userId'):
+        user_cache.set(_sub_key(user['userId']), user)
+    if user.get('email'):
+        user_cache.set(_email_key(user['email']), user)
+
+
+def get_user_by_email(users_table, email):
+    """Return the Users record for an email (email-index GSI), or None"""
+    if not email:
+        return None
+    cached = user_cache.get(_email_key(email))
+    if cached is not None:
+        return dict(cached)
+
+    result = users_table.query(
+        IndexName='email-index',
+        KeyConditionExpression=Key('email').eq(email)
+    )
+    items = result.get('Items', [])
+    if not items:
+        return None
+    cache_user(items[0])
+    return dict(items[0])
+
+
+def get_user_by_id(users_table, user_id):
+    """Return the Users record for a Cognito sub (table key), or None"""
+    if not user_id:
+        return None
+    cached = user_cache.get(_sub_key(user_id))
+    if cached is not None:
+        return dict(cached)
+
+    result = users_table.get_item(Key={'userId': user_id})
+    user = result.get('Item')
+    if not user:
+        return None
+    cache_user(user)
+    return dict(user)
+
+
+def get_employee_record(employees_table, employee_id):
+    """Return the Employees record for an employeeId, or None"""
+    if not employee_id:
+        return None
+    cached = employee_cache.get(employee_id)
+    if cached is not None:
+        return dict(cached)
+
+    result = employees_table.get_item(Key={'employeeId': employee_id})
+    employee = result.get('Item')
+    if not employee:
+        return None
+    employee_cache.set(employee_id, employee)
+    return dict(employee)
+
+
+def invalidate_user(user_id=None, email=None):
+    """Drop a user's cached record under every key it is stored as"""
+    removed = []
+    if user_id:
+        removed.append(user_cache.pop(_sub_key(user_id)))
+    if email:
+        removed.append(user_cache.pop(_email_key(email)))
+    for user in removed:
+        if not user:
+            continue
+        if user.get('userId'):
+            user_cache.pop(_sub_key(user['userId']))
+        if user.get('email'):
+            user_cache.pop(_email_key(user['email']))
+
+
+def invalidate_employee(employee_id):
+    """Drop a cached Employees record"""
+    if employee_id:
+        employee_cache.pop(employee_id)
+
+
+def clear_caches():
+    """Drop every cached identity (used by tests and local tooling)"""
+    user_cache.clear()
+    employee_cache.clear()
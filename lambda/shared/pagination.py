@@ -0,0 +1,155 @@
+"""
+Cursor-based pagination helpers shared by the InsightHR Lambda handlers.
+
+List endpoints accept two query parameters:
+- limit: page size, clamped to [1, MAX_PAGE_SIZE] (default DEFAULT_PAGE_SIZE)
+- nextToken: opaque cursor returned by the previous page
+
+and return `nextToken` in the response body (null on the last page).
+A request with neither parameter gets a page of MAX_PAGE_SIZE rather than
+DEFAULT_PAGE_SIZE, so callers written before pagination still see every row
+of any list up to that size. Larger lists return nextToken instead of
+growing the response without bound.
+
+Queries and scans are issued with `Limit` set to the number of items still
+needed, so every fetched item is either returned or rejected by a filter and
+the DynamoDB LastEvaluatedKey is always an exact resume point.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import base64
+import json
+import os
+from decimal import Decimal
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '200'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '1000'))
+
+
+class PaginationError(ValueError):
+    """Raised for malformed limit or nextToken parameters (maps to HTTP 400)"""
+
+
+def _encode_value(obj):
+    if isinstance(obj, Decimal):
+        return {'$n': str(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not cursor serializable")
+
+
+def _decode_value(obj):
+    if set(obj.keys()) == {'$n'}:
+        return Decimal(obj['$n'])
+    return obj
+
+
+def encode_token(cursor):
+    """Encode a cursor dict as an opaque URL-safe token (None stays None)"""
+    if not cursor:
+        return None
+    raw = json.dumps(cursor, default=_encode_value, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_token(token):
+    """Decode a token produced by encode_token back into a cursor dict"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii'))
+        cursor = json.loads(raw.decode('utf-8'), object_hook=_decode_value)
+    except (ValueError, UnicodeError) as e:
+        raise PaginationError(f"Invalid nextToken: {str(e)}")
+    if not isinstance(cursor, dict):
+        raise PaginationError("Invalid nextToken")
+    return cursor
+
+
+def parse_page_params(query_params):
+    """Read limit and nextToken from API Gateway query parameters.
+
+    Returns (limit, cursor) where cursor is the decoded nextToken dict or None.
+    """
+    query_params = query_params or {}
+
+    raw_limit = query_params.get('limit')
+    token = query_params.get('nextToken')
+    if raw_limit in (None, ''):
+        # Callers that predate pagination send neither parameter
+        limit = DEFAULT_PAGE_SIZE if token else MAX_PAGE_SIZE
+    else:
+        try:
+            limit = int(raw_limit)
+        except (TypeError, ValueError):
+            raise PaginationError(f"Invalid limit: {raw_limit}")
+        if limit < 1:
+            raise PaginationError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    return limit, decode_token(token)
+
+
+def iter_pages(operation, kwargs, start_key=None, page_size=None):
+    """Stream DynamoDB pages from a query/scan.
+
+    Yields (items, last_evaluated_key) per page; last_evaluated_key is None
+    on the final page. Only one page is held in memory at a time.
+    """
+    request = dict(kwargs)
+    if page_size:
+        request['Limit'] = page_size
+    if start_key:
+        request['ExclusiveStartKey'] = start_key
+
+    while True:
+        result = operation(**request)
+        last_key = result.get('LastEvaluatedKey')
+        yield result.get('Items', []), last_key
+        if not last_key:
+            return
+        request['ExclusiveStartKey'] = last_key
+
+
+def iter_items(operation, kwargs, max_items=None, page_size=None):
+    """Stream individual items from a query/scan, stopping after max_items"""
+    count = 0
+    for items, _ in iter_pages(operation, kwargs, page_size=page_size):
+        for item in items:
+            yield item
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+
+
+def fetch_page(operation, kwargs, limit, start_key=None, item_filter=None):
+    """Collect up to `limit` items from a query/scan.
+
+    `item_filter` is an optional predicate for conditions DynamoDB cannot
+    express (e.g. case-insensitive search). Returns (items, last_key) where
+    last_key is the ExclusiveStartKey for the next page or None when done.
+    """
+    items = []
+    request = dict(kwargs)
+    if start_key:
+        request['ExclusiveStartKey'] = start_key
+
+    while True:
+        request['Limit'] = limit - len(items)
+        result = operation(**request)
+        page = result.get('Items', [])
+        if item_filter is not None:
+            page = [item for item in page if item_filter(item)]
+        items.extend(page)
+
+        last_key = result.get('LastEvaluatedKey')
+        if not last_key or len(items) >= limit:
+            return items, last_key
+        request['ExclusiveStartKey'] = last_key
+
+
+def fetch_key_page(operation, kwargs, limit, cursor=None, item_filter=None):
+    """fetch_page wrapper that reads and writes the {'k': key} cursor shape"""
+    start_key = (cursor or {}).get('k')
+    items, last_key = fetch_page(operation, kwargs, limit, start_key, item_filter)
+    return items, ({'k': last_key} if last_key else None)
@@ -0,0 +1,145 @@
+"""
+Prompt-injection matcher for user messages sent to Bedrock.
+
+The pattern set is compiled once, at import, into an InjectionMatcher that
+checks a message in two stages:
+
+1. Prefilter: the lowercased message is split into \\w+ tokens, and the
+   check stops unless a token is one of the trigger words. ASCII messages
+   are tokenized with str.translate + str.split; others with a \\w+ regex. Trigger words are
+   the words each pattern starts with ("forget", "you", "system", ...), so
+   ordinary questions finish here.
+2. Only then is the message searched with a single combined regex of all
+   patterns.
+
+Pattern syntax:
+- Patterns are regex fragments. A literal space matches one or more
+  whitespace characters, so extra spaces or line breaks between words
+  don't evade it. A leading '^' means "at the start of a line".
+- A pattern may not start or end in the middle of a word, so "forgettable"
+  does not match "forget ..." and "all" does not match inside "allowance".
+- A pattern must start with a word or a (?:word|word) group followed by a
+  space, ':' or the end. Otherwise its trigger words can't be derived, and
+  the prefilter is switched off, which is still correct, just slower.
+
+The defaults only flag instruction-shaped phrases ("forget your
+instructions", "you must now ..."). Ordinary HR questions that share words
+with them, such as "I forgot my password", "forget my password" or "what
+should you do if ...", are not flagged.
+
+PROMPT_INJECTION_PATTERNS (a JSON list) replaces the default pattern set.
+scripts/benchmark-prompt-injection.py compares this matcher with the
+original per-substring loop.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import json
+import os
+import re
+
+WHITESPACE = r'\s+'
+LINE_START = r'(?:^|(?<=\n))[ \t]*'
+WORD = re.compile(r'\w+')
+# Every ASCII non-word character becomes a space, so split() yields exactly the \w+ runs
+ASCII_NON_WORD = str.maketrans({chr(c): ' ' for c in range(128) if not re.match(r'\w', chr(c))})
+LEADING_WORDS = re.compile(r'\(\?:([a-z]+(?:\|[a-z]+)*)\)|([a-z]+)')
+
+DEFAULT_INJECTION_PATTERNS = [
+    # Attempts to drop the system prompt
+    r'(?:forget|ignore|disregard|override) (?:all |any |the |your |my )?(?:previous|prior|above|earlier|initial|system|original) (?:instructions?|prompts?|rules|messages?|context)',
+    r'(?:forget|ignore|disregard|override) (?:all|everything|your (?:instructions?|rules|prompt|role|guidelines|restrictions))',
+    r'ignore the above',
+    r'(?:ignore|disregard) (?:the |all |any |these |those )?instructions?',
+    r'(?:previous|above|earlier) instructions?',
+    r'initial prompt',
+    r'system prompt',
+    # Attempts to install new instructions or a new persona
+    r'new (?:instructions?|role|persona|rules)',
+    r'change your (?:role|instructions?|rules|persona)',
+    r'you are now',
+    r'from now on',
+    r'you (?:must|will|should) now',
+    r'you must (?:ignore|obey|always|never|comply)',
+    r'pretend (?:to be|you|that you)',
+    r'act as (?:if|though|(?:the |an? )?(?:ai|assistant|admin|administrator|different|unrestricted|system|root|superuser))',
+    r'roleplay',
+    r'role play',
+    r'simulate (?:being|a different|an unrestricted)',
+    # Fake conversation turns at the start of a line ("System: ...")
+    r'^(?:system|assistant|human)\s*:',
+]
+
+
+def load_patterns():
+    """Pattern set from PROMPT_INJECTION_PATTERNS (JSON list) or the defaults"""
+    raw = os.environ.get('PROMPT_INJECTION_PATTERNS')
+    if not raw:
+        return list(DEFAULT_INJECTION_PATTERNS)
+    patterns = json.loads(raw)
+    if not isinstance(patterns, list) or not all(isinstance(p, str) and p for p in patterns):
+        raise ValueError("PROMPT_INJECTION_PATTERNS must be a JSON list of non-empty strings")
+    return patterns
+
+
+def trigger_words(pattern):
+    """Words one of which must appear as a token for `pattern` to match (None if unknown)"""
+    body = pattern[1:] if pattern.startswith('^') else pattern
+    match = LEADING_WORDS.match(body)
+    if not match:
+        return None
+    rest = body[match.end():]
+    if rest and not rest.startswith((' ', ':', r'\s*:', r'\s+')):
+        return None
+    return set((match.group(1) or match.group(2)).split('|'))
+
+
+def compile_pattern(patterns):
+    """Combine patterns into one regex that never starts or ends inside a word"""
+    alternatives = '|'.join(
+        '(?:' + (LINE_START + pattern[1:] if pattern.startswith('^') else pattern).replace(' ', WHITESPACE) + ')'
+        for pattern in patterns
+    )
+    # Each edge is fine if the match itself has a non-word character there
+    # (e.g. a trailing ':') or the neighbouring character is not a word character
+    return re.compile(rf"(?:(?<!\w)|(?!\w))(?:{alternatives})(?:(?<!\w)|(?!\w))", re.IGNORECASE)
+
+
+class InjectionMatcher:
+    """Trigger-word prefilter plus one combined regex for a pattern set"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.regex = compile_pattern(self.patterns)
+        triggers = set()
+        for pattern in self.patterns:
+            words = trigger_words(pattern)
+            if words is None:
+                triggers = None
+                break
+            triggers |= words
+        self.triggers = frozenset(triggers) if triggers is not None else None
+
+    @staticmethod
+    def tokens(message):
+        lowered = message.lower()
+        if lowered.isascii():
+            return lowered.translate(ASCII_NON_WORD).split()
+        return WORD.findall(lowered)
+
+    def search(self, message):
+        """Return the first injection-like phrase in `message`, or None"""
+        if not message:
+            return None
+        if self.triggers is not None and self.triggers.isdisjoint(self.tokens(message)):
+            return None
+        match = self.regex.search(message)
+        return match.group(0) if match else None
+
+
+INJECTION_MATCHER = InjectionMatcher(load_patterns())
+
+
+def find_prompt_injection(message, matcher=None):
+    """Return the first injection-like phrase in `message`, or None"""
+    return (matcher or INJECTION_MATCHER).search(message)
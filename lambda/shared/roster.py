@@ -0,0 +1,134 @@
+"""
+Warm per-container employee roster for the public attendance kiosk endpoints.
+
+Every kiosk tap needs the employee's name, department and position. Instead of
+one Employees get_item per tap, EmployeeRoster keeps a module-level snapshot of
+the whole table:
+
+- The first lookup loads it with one projected scan (employeeId, name,
+  department, position). Entries are __slots__ records, so 10k employees take
+  a few MB.
+- Once the snapshot is older than ROSTER_REFRESH_SECONDS, the next lookup
+  starts a background reload and keeps answering from the old snapshot. The
+  new one is swapped in when the scan finishes. The reload thread scans
+  through its own DynamoDB resource, since boto3 resources are not
+  thread-safe and the handler keeps using the shared one meanwhile.
+- An ID that is not in the snapshot (hired since the last load) falls back to
+  get_item, and the result is added to the snapshot. Unknown IDs are not
+  cached, so they reach the table every time.
+
+Changes to an employee's department or position show up after the next
+refresh, as does a deleted employee.
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import os
+import threading
+import time
+
+import boto3
+from pagination import iter_items
+
+ROSTER_REFRESH_SECONDS = float(os.environ.get('ROSTER_REFRESH_SECONDS', '300'))
+
+
+class RosterEntry:
+    """Kiosk view of an Employees record; .get() mirrors dict access"""
+
+    __slots__ = ('employeeId', 'name', 'department', 'position')
+
+    def __init__(self, item):
+        self.employeeId = item['employeeId']
+        self.name = item.get('name')
+        self.department = item.get('department')
+        self.position = item.get('position')
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+
+class EmployeeRoster:
+    """Lazily loaded Employees snapshot with background refresh and get_item fallback"""
+
+    def __init__(self, employees_table, refresh_seconds=ROSTER_REFRESH_SECONDS, clock=time.monotonic):
+        self.table = employees_table
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self.entries = None
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_table = None
+
+    def load(self, table=None):
+        """Replace the snapshot with one projected scan of the Employees table"""
+        entries = {}
+        for item in iter_items((table or self.table).scan, {
+            'ProjectionExpression': 'employeeId, #n, department, #pos',
+            'ExpressionAttributeNames': {'#n': 'name', '#pos': 'position'}
+        }):
+            entries[item['employeeId']] = RosterEntry(item)
+        self.entries = entries
+        self.loaded_at = self.clock()
+        self.loads += 1
+        return len(entries)
+
+    def _refresh(self):
+        try:
+            # Only one refresh runs at a time, so the thread's table can be reused by the next one
+            if self._refresh_table is None:
+                self._refresh_table = boto3.session.Session().resource('dynamodb').Table(self.table.name)
+            self.load(self._refresh_table)
+        except Exception as e:
+            print(f"Roster refresh failed, keeping the previous snapshot: {str(e)}")
+        finally:
+            self._refreshing = False
+
+    def _ensure_loaded(self):
+        if self.entries is None:
+            with self._load_lock:
+                if self.entries is None:
+                    self.load()
+        elif not self._refreshing and self.clock() - self.loaded_at >= self.refresh_seconds:
+            self._refreshing = True
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+    def get(self, employee_id):
+        """Return the RosterEntry for an employeeId, or None if the employee does not exist"""
+        if not employee_id:
+            return None
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            print(f"Roster load failed, falling back to get_item: {str(e)}")
+            if self.entries is None:
+                # Retry the scan in the background after the refresh interval, not on every tap
+                self.entries, self.loaded_at = {}, self.clock()
+
+        entries = self.entries
+        entry = entries.get(employee_id) if entries is not None else None
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        item = self.table.get_item(Key={'employeeId': employee_id}).get('Item')
+        if not item:
+            return None
+        entry = RosterEntry(item)
+        if entries is not None:
+            entries[employee_id] = entry
+        return entry
+
+    def stats(self):
+        return {
+            'size': len(self.entries) if self.entries is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'loads': self.loads
+        }
@@ -0,0 +1,118 @@
+"""
+Debounced auto-scoring trigger shared by the InsightHR Lambda handlers.
+
+Handlers that change score inputs (performance scores, KPI definitions) call
+mark_scoring_inputs_changed(), which bumps a version counter on a single state
+item. Nothing is invoked on reads. The performance handler runs a scheduled
+sweep that calls maybe_trigger_auto_scoring(), which invokes the auto-scoring
+Lambda only when:
+
+- inputsVersion > scoredVersion (inputs changed since the last run), and
+- at least AUTO_SCORING_MIN_INTERVAL_SECONDS have passed since the last trigger.
+
+The trigger is claimed with a conditional write, so concurrent sweeps invoke
+the scoring Lambda at most once per window.
+
+State item (SCORING_STATE_TABLE, PK stateId = 'auto-scoring'):
+    inputsVersion, inputsChangedAt, changedBy, scoredVersion, lastTriggeredAt
+
+This module is packaged next to each handler by the deploy scripts.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+SCORING_STATE_TABLE = os.environ.get('SCORING_STATE_TABLE', 'insighthr-scoring-state-dev')
+AUTO_SCORING_MIN_INTERVAL_SECONDS = int(os.environ.get('AUTO_SCORING_MIN_INTERVAL_SECONDS', '300'))
+STATE_ID = 'auto-scoring'
+
+
+def mark_scoring_inputs_changed(dynamodb, source):
+    """Record that score inputs changed (one UpdateItem; never raises)"""
+    try:
+        dynamodb.Table(SCORING_STATE_TABLE).update_item(
+            Key={'stateId': STATE_ID},
+            UpdateExpression='ADD inputsVersion :one SET inputsChangedAt = :now, changedBy = :source',
+            ExpressionAttributeValues={
+                ':one': 1,
+                ':now': datetime.utcnow().isoformat(),
+                ':source': source
+            }
+        )
+        return True
+    except Exception as e:
+        # Scoring is best-effort; a failed mark must not fail the write that caused it
+        print(f"Failed to mark scoring inputs changed ({source}): {str(e)}")
+        return False
+
+
+def get_scoring_state(dynamodb):
+    """Return the auto-scoring state item (empty dict if it does not exist yet)"""
+    result = dynamodb.Table(SCORING_STATE_TABLE).get_item(
+        Key={'stateId': STATE_ID},
+        ConsistentRead=True
+    )
+    return result.get('Item', {})
+
+
+def maybe_trigger_auto_scoring(dynamodb, lambda_client, function_arn, reason, now=None):
+    """
+    Invoke the auto-scoring Lambda if inputs changed and the debounce window elapsed.
+    Returns a short outcome string: 'disabled', 'clean', 'debounced', 'claimed_elsewhere',
+    'triggered' or 'failed'.
+    """
+    if not function_arn:
+        return 'disabled'
+
+    now = int(now if now is not None else time.time())
+    state = get_scoring_state(dynamodb)
+    inputs_version = int(state.get('inputsVersion', 0))
+    scored_version = int(state.get('scoredVersion', 0))
+    last_triggered = int(state.get('lastTriggeredAt', 0))
+
+    if inputs_version <= scored_version:
+        return 'clean'
+    if now - last_triggered < AUTO_SCORING_MIN_INTERVAL_SECONDS:
+        return 'debounced'
+
+    table = dynamodb.Table(SCORING_STATE_TABLE)
+    try:
+        table.update_item(
+            Key={'stateId': STATE_ID},
+            UpdateExpression='SET lastTriggeredAt = :now, scoredVersion = :version',
+            ConditionExpression='attribute_not_exists(lastTriggeredAt) OR lastTriggeredAt <= :cutoff',
+            ExpressionAttributeValues={
+                ':now': now,
+                ':version': inputs_version,
+                ':cutoff': now - AUTO_SCORING_MIN_INTERVAL_SECONDS
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return 'claimed_elsewhere'
+        raise
+
+    try:
+        lambda_client.invoke(
+            FunctionName=function_arn,
+            InvocationType='Event',  # Async invocation
+            Payload=json.dumps({'trigger': reason, 'inputsVersion': inputs_version})
+        )
+        return 'triggered'
+    except Exception as e:
+        print(f"Auto-scoring Lambda invocation failed: {str(e)}")
+        # Hand the version back so the next sweep retries
+        try:
+            table.update_item(
+                Key={'stateId': STATE_ID},
+                UpdateExpression='SET scoredVersion = :previous',
+                ConditionExpression='scoredVersion = :version',
+                ExpressionAttributeValues={':previous': scored_version, ':version': inputs_version}
+            )
+        except ClientError:
+            pass
+        return 'failed'
@@ -7,8 +7,11 @@ import base64
 import secrets
 from datetime import datetime
 from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Attr
 import jwt
 from jwt import PyJWKClient
+from identity import get_user_by_id, cache_user, invalidate_user
+from pagination import PaginationError, parse_page_params, fetch_key_page, encode_token
 
 # Initialize AWS clients
 cognito_client = boto3.client('cognito-idp')
@@ -54,9 +57,9 @@ def extract_user_from_token(event):
         if not user_id:
             return None, 'Invalid token: missing user ID'
         
-        # Get user from DynamoDB to get role
-        response = users_table.get_item(Key={'userId': user_id})
-        if 'Item' not in response:
+        # Get user from DynamoDB to get role (cached per container)
+        user = get_user_by_id(users_table, user_id)
+        if not user:
             # User not in DynamoDB yet - create with default Employee role
             print(f"User {email} not found in DynamoDB, creating with Employee role")
             now = datetime.utcnow().isoformat()
@@ -71,12 +74,11 @@ def extract_user_from_token(event):
             }
             try:
                 users_table.put_item(Item=user)
+                cache_user(user)
                 print(f"Created user {email} in DynamoDB")
             except Exception as e:
                 print(f"Error creating user in DynamoDB: {e}")
                 # Continue anyway with the user object
-        else:
-            user = response['Item']
         
         return user, None
         
@@ -161,6 +163,7 @@ def handle_update_me(event, current_user):
             ExpressionAttributeValues=expr_attr_values,
             ReturnValues='ALL_NEW'
         )
+        invalidate_user(user_id=current_user['userId'], email=current_user.get('email'))
         
         # Update name in Cognito if provided
         if 'name' in update_data:
@@ -195,25 +198,41 @@ def handle_get_all_users(event, current_user):
         role = params.get('role')
         status = params.get('status')
         
-        # Scan all users (for MVP, no pagination)
-        response = users_table.scan()
-        users = response['Items']
-        
-        # Apply filters
-        if search:
-            users = [u for u in users if search in u.get('name', '').lower() or search in u.get('email', '').lower()]
+        try:
+            limit, cursor = parse_page_params(params)
+        except PaginationError as e:
+            return error_response(400, str(e))
         
+        # Filters applied server-side by DynamoDB
+        conditions = []
         if department:
-            users = [u for u in users if u.get('department') == department]
+            conditions.append(Attr('department').eq(department))
         
         if role:
-            users = [u for u in users if u.get('role') == role]
+            conditions.append(Attr('role').eq(role))
         
         if status and status.lower() != 'all':
-            is_active = status.lower() == 'active'
-            users = [u for u in users if u.get('isActive', True) == is_active]
+            if status.lower() == 'active':
+                # Users without the flag are treated as active
+                conditions.append(Attr('isActive').eq(True) | Attr('isActive').not_exists())
+            else:
+                conditions.append(Attr('isActive').eq(False))
+        
+        scan_kwargs = {}
+        if conditions:
+            filter_condition = conditions[0]
+            for condition in conditions[1:]:
+                filter_condition = filter_condition & condition
+            scan_kwargs['FilterExpression'] = filter_condition
+        
+        # Case-insensitive search cannot be expressed in a FilterExpression
+        item_filter = None
+        if search:
+            item_filter = lambda u: search in u.get('name', '').lower() or search in u.get('email', '').lower()
+        
+        users, next_cursor = fetch_key_page(users_table.scan, scan_kwargs, limit, cursor, item_filter)
         
-        return success_response({'users': users})
+        return success_response({'users': users, 'nextToken': encode_token(next_cursor)})
         
     except Exception as e:
         print(f"Error in get_all_users: {e}")
@@ -365,6 +384,8 @@ def handle_update_user(event, current_user, user_id):
             ExpressionAttributeValues=expr_attr_values,
             ReturnValues='ALL_NEW'
         )
+        # Role/department/employeeId may have changed - drop the cached identity
+        invalidate_user(user_id=user_id, email=existing_user.get('email'))
         
         # Update name in Cognito if provided
         if 'name' in update_data:
@@ -419,6 +440,7 @@ def handle_disable_user(event, current_user, user_id):
             },
             ReturnValues='ALL_NEW'
         )
+        invalidate_user(user_id=user_id, email=existing_user.get('email'))
         
         return success_response({'user': response['Attributes']})
         
@@ -460,6 +482,7 @@ def handle_enable_user(event, current_user, user_id):
             },
             ReturnValues='ALL_NEW'
         )
+        invalidate_user(user_id=user_id, email=existing_user.get('email'))
         
         return success_response({'user': response['Attributes']})
         
@@ -493,6 +516,7 @@ def handle_delete_user(event, current_user, user_id):
         
         # Delete from DynamoDB
         users_table.delete_item(Key={'userId': user_id})
+        invalidate_user(user_id=user_id, email=existing_user.get('email'))
         
         return success_response({'message': 'User deleted successfully'})
         
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the attendance 360 points engine.
+
+Compares the original per-record calculation, which built datetime.time
+objects on every call, with lambda/shared/attendance_points.py. It times:
+- the scalar API (one check-out at a time);
+- score_records (string times, as used by imports and migrations);
+- score_batch on minute offsets, with NumPy when it is installed.
+
+It also counts the records on which the engine and the original disagree,
+split by cause. The rule table fixes two bugs in the original: early-bird
+minutes between 06:00 and 08:00 were paid twice and minutes before 06:00
+not at all, and a check-in after 17:00 was paid overtime from 17:00.
+
+Runs locally with no AWS access:
+    python scripts/benchmark-attendance-points.py [records]
+"""
+
+import os
+import random
+import sys
+import time as clock
+from datetime import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'shared'))
+import attendance_points  # noqa: E402
+from attendance_points import POINTS_ENGINE  # noqa: E402
+
+DEFAULT_RECORDS = 1_000_000
+
+
+def legacy_points(check_in_time, check_out_time):
+    """calculate_final_status_and_points as it was before the rule table"""
+    ci_hour, ci_minute = map(int, check_in_time.split(':'))
+    co_hour, co_minute = map(int, check_out_time.split(':'))
+    check_in = time(ci_hour, ci_minute)
+    check_out = time(co_hour, co_minute)
+    points = 0
+    status = 'work'
+    if check_in < time(6, 0):
+        early_end = min(time(8, 0), check_out)
+        early_minutes = (early_end.hour * 60 + early_end.minute) - (6 * 60)
+        if early_minutes > 0:
+            points += early_minutes / 60.0 * 10 * 1.25
+            status = 'early_bird'
+    regular_start = max(check_in, time(6, 0))
+    regular_end = min(check_out, time(17, 0))
+    if regular_end > regular_start:
+        regular_minutes = (regular_end.hour * 60 + regular_end.minute) - (regular_start.hour * 60 + regular_start.minute)
+        points += regular_minutes / 60.0 * 10
+    if check_out > time(17, 0):
+        points += ((co_hour * 60 + co_minute) - (17 * 60)) / 60.0 * 10 * 1.5
+        status = 'OT'
+    if check_in > time(9, 0) and status == 'work':
+        status = 'late'
+    return status, round(points, 2)
+
+
+def sample_day(rng):
+    """Check-in/check-out minutes shaped like a kiosk day (mostly 07:30-09:30 in, 16:30-19:00 out)"""
+    check_in = int(rng.triangular(5 * 60, 10 * 60, 8 * 60 + 30))
+    check_out = int(rng.triangular(15 * 60, 20 * 60, 17 * 60 + 15))
+    return check_in, check_out
+
+
+def hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def rate(count, seconds):
+    return f"{count / seconds:>14,.0f} records/s"
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RECORDS
+    rng = random.Random(42)
+    minutes = [sample_day(rng) for _ in range(records)]
+    check_ins = [check_in for check_in, _ in minutes]
+    check_outs = [check_out for _, check_out in minutes]
+    times = [(hhmm(check_in), hhmm(check_out)) for check_in, check_out in minutes]
+    scalar_sample = times[:min(records, 200_000)]
+
+    print(f"Attendance 360 points: {records:,} records, NumPy {'on' if attendance_points.np is not None else 'off'}\n")
+
+    start = clock.perf_counter()
+    for check_in, check_out in scalar_sample:
+        legacy_points(check_in, check_out)
+    print(f"{'legacy per record':<28}{rate(len(scalar_sample), clock.perf_counter() - start)}")
+
+    start = clock.perf_counter()
+    for check_in, check_out in scalar_sample:
+        POINTS_ENGINE.score(check_in, check_out)
+    print(f"{'engine.score':<28}{rate(len(scalar_sample), clock.perf_counter() - start)}")
+
+    start = clock.perf_counter()
+    POINTS_ENGINE.score_records(times)
+    print(f"{'engine.score_records':<28}{rate(records, clock.perf_counter() - start)}")
+
+    if attendance_points.np is not None:
+        check_ins = attendance_points.np.asarray(check_ins, dtype=attendance_points.np.int32)
+        check_outs = attendance_points.np.asarray(check_outs, dtype=attendance_points.np.int32)
+    start = clock.perf_counter()
+    codes, points = POINTS_ENGINE.score_batch(check_ins, check_outs)
+    print(f"{'engine.score_batch':<28}{rate(records, clock.perf_counter() - start)}")
+
+    causes = {'early bird (check-in before 06:00)': 0, 'check-in after 17:00': 0, 'other': 0}
+    for (check_in, check_out), code, value in zip(scalar_sample, codes, points):
+        if (POINTS_ENGINE.statuses[int(code)], float(value)) != legacy_points(check_in, check_out):
+            if check_in < '06:00':
+                causes['early bird (check-in before 06:00)'] += 1
+            elif check_in >= '17:00':
+                causes['check-in after 17:00'] += 1
+            else:
+                causes['other'] += 1
+    print(f"\nDifferences from the legacy calculation ({len(scalar_sample):,} records):")
+    for cause, count in causes.items():
+        print(f"  {cause:<36}{count:>8,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Local load test for the attendance kiosk rush.
+
+Runs attendance_handler.lambda_handler in-process against a local DynamoDB
+stand-in and replays a morning of kiosk taps:
+- check-ins for every employee, spread over an arrival curve;
+- a share of double taps (a second check-in a moment later);
+- optionally a check-out phase.
+
+Backends:
+- moto (default): in-memory mock, needs `pip install "moto[dynamodb]"`. Good
+  for call counts and relative timings. moto is not built for concurrent
+  writers, so use DynamoDB Local to judge races.
+- local: DynamoDB Local at --endpoint-url (e.g. `docker run -p 8000:8000
+  amazon/dynamodb-local -inMemory`).
+
+Reported per phase:
+- p50/p95/p99/max handler latency;
+- queue wait (time from scheduled arrival to handler start), which grows when
+  --concurrency is too low for the offered rate;
+- HTTP status counts;
+- DynamoDB calls per request by operation, counted with botocore event hooks
+  on the handler's client;
+- the conditional-write failure rate.
+
+All requests share one handler module, like a single warm Lambda container.
+--max-p99-ms and --max-calls-per-request turn the report into a pass/fail
+check (exit code 1) for use before deploy.
+
+Usage:
+    python scripts/loadtest-attendance.py --employees 500 --concurrency 32 --arrival ramp --duration 20
+    python scripts/loadtest-attendance.py --backend local --endpoint-url http://localhost:8000 --check-out
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEPARTMENTS = ['DEV', 'QA', 'DAT', 'SEC', 'AI']
+POSITIONS = ['Junior', 'Mid', 'Senior', 'Lead', 'Manager']
+ARRIVAL_CURVES = ['burst', 'uniform', 'ramp', 'poisson']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the attendance kiosk endpoints locally")
+    parser.add_argument('--backend', choices=['moto', 'local'], default='moto')
+    parser.add_argument('--endpoint-url', default='http://localhost:8000', help="DynamoDB Local endpoint (--backend local)")
+    parser.add_argument('--employees', type=int, default=300, help="employees that check in")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent in-flight requests")
+    parser.add_argument('--arrival', choices=ARRIVAL_CURVES, default='ramp',
+                        help="burst: all at once; uniform: evenly spaced; ramp: builds to a peak at 80%% "
+                             "of the window; poisson: random arrivals at a constant rate")
+    parser.add_argument('--duration', type=float, default=10.0, help="arrival window in seconds")
+    parser.add_argument('--double-tap-rate', type=float, default=0.05, help="share of employees who tap twice")
+    parser.add_argument('--check-out', action='store_true', help="run a check-out phase after the check-ins")
+    parser.add_argument('--cold', action='store_true', help="don't preload the employee roster")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-p99-ms', type=float, help="fail if any phase's p99 latency exceeds this")
+    parser.add_argument('--max-calls-per-request', type=float, help="fail if DynamoDB calls per request exceed this")
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    parser.add_argument('--verbose', action='store_true', help="keep the handler's own log output")
+    return parser.parse_args()
+
+
+def start_backend(args, suffix):
+    """Point boto3 at the local backend and name the tables; returns the moto mock (or None)"""
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'loadtest')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'loadtest')
+    os.environ['AWS_DEFAULT_REGION'] = os.environ['AWS_REGION'] = 'ap-southeast-1'
+    os.environ['ATTENDANCE_TABLE'] = f"loadtest-attendance-{suffix}"
+    os.environ['EMPLOYEES_TABLE'] = f"loadtest-employees-{suffix}"
+    os.environ['USERS_TABLE'] = f"loadtest-users-{suffix}"
+
+    if args.backend == 'local':
+        os.environ['AWS_ENDPOINT_URL_DYNAMODB'] = args.endpoint_url
+        return None
+
+    try:
+        from moto import mock_aws
+    except ImportError:
+        sys.exit('moto is not installed: pip install "moto[dynamodb]" (or use --backend local)')
+    mock = mock_aws()
+    mock.start()
+    return mock
+
+
+def create_tables(dynamodb):
+    """Create the attendance (with both GSIs), Employees and Users tables"""
+    dynamodb.create_table(
+        TableName=os.environ['ATTENDANCE_TABLE'],
+        AttributeDefinitions=[
+            {'AttributeName': 'employeeId', 'AttributeType': 'S'},
+            {'AttributeName': 'date', 'AttributeType': 'S'},
+            {'AttributeName': 'department', 'AttributeType': 'S'}
+        ],
+        KeySchema=[
+            {'AttributeName': 'employeeId', 'KeyType': 'HASH'},
+            {'AttributeName': 'date', 'KeyType': 'RANGE'}
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': 'date-index',
+                'KeySchema': [{'AttributeName': 'date', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'department-date-index',
+                'KeySchema': [
+                    {'AttributeName': 'department', 'KeyType': 'HASH'},
+                    {'AttributeName': 'date', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    for name, key in ((os.environ['EMPLOYEES_TABLE'], 'employeeId'), (os.environ['USERS_TABLE'], 'userId')):
+        dynamodb.create_table(
+            TableName=name,
+            AttributeDefinitions=[{'AttributeName': key, 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+    for name in (os.environ['ATTENDANCE_TABLE'], os.environ['EMPLOYEES_TABLE'], os.environ['USERS_TABLE']):
+        dynamodb.Table(name).wait_until_exists()
+
+
+def seed_employees(dynamodb, count):
+    employee_ids = []
+    with dynamodb.Table(os.environ['EMPLOYEES_TABLE']).batch_writer() as writer:
+        for index in range(count):
+            department = DEPARTMENTS[index % len(DEPARTMENTS)]
+            employee_id = f"{department}-{index:05d}"
+            writer.put_item(Item={
+                'employeeId': employee_id,
+                'name': f"Load Test {index}",
+                'department': department,
+                'position': POSITIONS[index % len(POSITIONS)],
+                'status': 'active'
+            })
+            employee_ids.append(employee_id)
+    return employee_ids
+
+
+def delete_tables(dynamodb):
+    for name in (os.environ['ATTENDANCE_TABLE'], os.environ['EMPLOYEES_TABLE'], os.environ['USERS_TABLE']):
+        try:
+            dynamodb.Table(name).delete()
+        except Exception as e:
+            print(f"Could not delete {name}: {e}")
+
+
+class CallCounter:
+    """Counts DynamoDB calls and conditional-check failures per request via botocore events"""
+
+    def __init__(self, client):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.background = {}
+        client.meta.events.register('before-call.dynamodb', self._before_call)
+        client.meta.events.register('after-call.dynamodb', self._after_call)
+
+    def begin(self):
+        self._local.calls = {}
+        self._local.condition_failures = 0
+
+    def end(self):
+        calls, failures = self._local.calls, self._local.condition_failures
+        self._local.calls = None
+        return calls, failures
+
+    def _before_call(self, model, **kwargs):
+        calls = getattr(self._local, 'calls', None)
+        if calls is None:
+            # Not inside a timed request, e.g. the roster's background refresh
+            with self._lock:
+                self.background[model.name] = self.background.get(model.name, 0) + 1
+            return
+        calls[model.name] = calls.get(model.name, 0) + 1
+
+    def _after_call(self, parsed, **kwargs):
+        if getattr(self._local, 'calls', None) is None:
+            return
+        if (parsed or {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            self._local.condition_failures += 1
+
+
+def arrival_offsets(curve, count, duration, rng):
+    """Seconds after the start at which each of `count` requests arrives"""
+    if curve == 'burst' or duration <= 0:
+        return [0.0] * count
+    if curve == 'uniform':
+        return [duration * index / count for index in range(count)]
+    if curve == 'ramp':
+        return sorted(rng.triangular(0, duration, duration * 0.8) for _ in range(count))
+    offsets, current = [], 0.0
+    for _ in range(count):
+        current += rng.expovariate(count / duration)
+        offsets.append(current)
+    return offsets
+
+
+def kiosk_taps(path, employee_ids, args, rng):
+    """(offset, event) pairs: one tap per employee plus double taps a moment later"""
+    offsets = arrival_offsets(args.arrival, len(employee_ids), args.duration, rng)
+    taps = []
+    for offset, employee_id in zip(offsets, employee_ids):
+        event = {'httpMethod': 'POST', 'path': path, 'body': json.dumps({'employeeId': employee_id})}
+        taps.append((offset, event))
+        if rng.random() < args.double_tap_rate:
+            taps.append((offset + rng.uniform(0, 1.5), event))
+    taps.sort(key=lambda tap: tap[0])
+    return taps
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def run_phase(name, handler, counter, taps, concurrency):
+    """Replay taps on schedule through a pool of `concurrency` workers"""
+    samples = []
+    sample_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def invoke(scheduled, event):
+        began = time.perf_counter()
+        counter.begin()
+        result = handler.lambda_handler(event, None)
+        latency = time.perf_counter() - began
+        calls, condition_failures = counter.end()
+        with sample_lock:
+            samples.append({
+                'latency': latency,
+                'wait': began - scheduled,
+                'status': result['statusCode'],
+                'calls': calls,
+                'conditionFailures': condition_failures
+            })
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for offset, event in taps:
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(invoke, scheduled, event)
+    elapsed = time.perf_counter() - start
+    return summarize(name, samples, elapsed)
+
+
+def summarize(name, samples, elapsed):
+    latencies = sorted(sample['latency'] * 1000 for sample in samples)
+    waits = sorted(max(sample['wait'], 0) * 1000 for sample in samples)
+    statuses, operations = {}, {}
+    writes = condition_failures = 0
+    for sample in samples:
+        statuses[sample['status']] = statuses.get(sample['status'], 0) + 1
+        for operation, count in sample['calls'].items():
+            operations[operation] = operations.get(operation, 0) + count
+            if operation in ('PutItem', 'UpdateItem'):
+                writes += count
+        condition_failures += sample['conditionFailures']
+    requests = len(samples)
+    return {
+        'phase': name,
+        'requests': requests,
+        'seconds': round(elapsed, 2),
+        'throughput': round(requests / elapsed, 1) if elapsed else None,
+        'latencyMs': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0.0
+        },
+        'waitMs': {'p50': round(percentile(waits, 50), 2), 'p95': round(percentile(waits, 95), 2)},
+        'statusCodes': {str(code): count for code, count in sorted(statuses.items())},
+        'dynamodbCallsPerRequest': {
+            operation: round(count / requests, 3) for operation, count in sorted(operations.items())
+        } if requests else {},
+        'dynamodbCallsPerRequestTotal': round(sum(operations.values()) / requests, 3) if requests else 0.0,
+        'conditionalWrites': writes,
+        'conditionalFailures': condition_failures,
+        'conditionalFailureRate': round(condition_failures / writes, 4) if writes else 0.0
+    }
+
+
+def print_report(results, background):
+    print(f"\n{'phase':<10} {'reqs':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'wait p95':>9}")
+    for result in results:
+        latency = result['latencyMs']
+        print(f"{result['phase']:<10} {result['requests']:>6} {result['throughput']:>8} {latency['p50']:>8} "
+              f"{latency['p95']:>8} {latency['p99']:>8} {latency['max']:>8} {result['waitMs']['p95']:>9}")
+    for result in results:
+        print(f"\n{result['phase']}:")
+        print(f"  status codes: {', '.join(f'{code}={count}' for code, count in result['statusCodes'].items())}")
+        calls = ', '.join(f"{operation} {count}" for operation, count in result['dynamodbCallsPerRequest'].items())
+        print(f"  DynamoDB calls/request: {result['dynamodbCallsPerRequestTotal']} ({calls})")
+        print(f"  conditional failures: {result['conditionalFailures']} of {result['conditionalWrites']} writes "
+              f"({result['conditionalFailureRate']:.1%})")
+    if background:
+        print(f"\nBackground DynamoDB calls (roster refresh): {background}")
+
+
+def check_thresholds(args, results):
+    failures = []
+    for result in results:
+        if args.max_p99_ms is not None and result['latencyMs']['p99'] > args.max_p99_ms:
+            failures.append(f"{result['phase']}: p99 {result['latencyMs']['p99']} ms > {args.max_p99_ms} ms")
+        if args.max_calls_per_request is not None and result['dynamodbCallsPerRequestTotal'] > args.max_calls_per_request:
+            failures.append(f"{result['phase']}: {result['dynamodbCallsPerRequestTotal']} DynamoDB calls/request "
+                            f"> {args.max_calls_per_request}")
+    return failures
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    mock = start_backend(args, f"{int(time.time())}-{os.getpid()}")
+
+    import boto3
+    dynamodb = boto3.resource('dynamodb')
+    print(f"Backend: {args.backend}; creating tables and {args.employees} employees...")
+    create_tables(dynamodb)
+    employee_ids = seed_employees(dynamodb, args.employees)
+
+    sys.path[:0] = [os.path.join(ROOT, 'lambda', 'shared'), os.path.join(ROOT, 'lambda', 'attendance')]
+    import attendance_handler
+
+    counter = CallCounter(attendance_handler.dynamodb.meta.client)
+    if not args.cold:
+        attendance_handler.employee_roster.load()
+
+    phases = [('check-in', '/attendance/check-in')]
+    if args.check_out:
+        phases.append(('check-out', '/attendance/check-out'))
+
+    results = []
+    try:
+        for name, path in phases:
+            taps = kiosk_taps(path, employee_ids, args, rng)
+            print(f"Running {name}: {len(taps)} requests, {args.arrival} arrivals over {args.duration}s, "
+                  f"concurrency {args.concurrency}...")
+            with open(os.devnull, 'w') as devnull, \
+                    (contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)):
+                results.append(run_phase(name, attendance_handler, counter, taps, args.concurrency))
+    finally:
+        if args.backend == 'local':
+            delete_tables(dynamodb)
+        if mock:
+            mock.stop()
+
+    print_report(results, counter.background)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results, 'backgroundCalls': counter.background}, f, indent=2)
+
+    failures = check_thresholds(args, results)
+    for failure in failures:
+        print(f"✗ {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
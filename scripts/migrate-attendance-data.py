@@ -3,59 +3,42 @@ Migrate attendance data from attendence_history to insighthr-attendance-history-
 Maps old field names to new schema and adds missing fields
 """
 
+import os
+import sys
 import boto3
 from datetime import datetime
 from decimal import Decimal
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'shared'))
+from attendance_points import POINTS_ENGINE  # noqa: E402
+
 # Initialize DynamoDB
 dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-1')
 old_table = dynamodb.Table('attendence_history')
 new_table = dynamodb.Table('insighthr-attendance-history-dev')
 
+# Points for a worked day whose times cannot be parsed
+FALLBACK_POINTS = 80.0
+
 def calculate_points_360(check_in, check_out, status):
     """Calculate 360 points based on attendance pattern"""
-    if status == 'absent' or status == 'off':
-        return 0
-    
-    if not check_in or not check_out:
-        return 0
-    
-    try:
-        # Parse times (format: "H:MM" or "HH:MM")
-        check_in_parts = check_in.split(':')
-        check_out_parts = check_out.split(':')
-        
-        check_in_hour = int(check_in_parts[0])
-        check_in_min = int(check_in_parts[1]) if len(check_in_parts) > 1 else 0
-        
-        check_out_hour = int(check_out_parts[0])
-        check_out_min = int(check_out_parts[1]) if len(check_out_parts) > 1 else 0
-        
-        # Calculate total hours worked
-        total_minutes = (check_out_hour * 60 + check_out_min) - (check_in_hour * 60 + check_in_min)
-        total_hours = total_minutes / 60.0
-        
-        # Base points: 10 points/hour
-        base_points = total_hours * 10
-        
-        # Early bird bonus (check-in before 6:00 AM): 1.25x for hours before 8:00 AM
-        if check_in_hour < 6:
-            early_hours = min(8 - check_in_hour, total_hours)
-            base_points += early_hours * 10 * 0.25  # Extra 25%
-        
-        # Overtime bonus (check-out after 17:00): 1.5x for hours after 17:00
-        if check_out_hour >= 17:
-            ot_minutes = (check_out_hour * 60 + check_out_min) - (17 * 60)
-            ot_hours = ot_minutes / 60.0
-            base_points += ot_hours * 10 * 0.5  # Extra 50%
-        
-        return round(base_points, 2)
-    except:
-        # Default to 80 points for normal work day if calculation fails
-        return 80.0
+    return calculate_page_points([(check_in, check_out, status)])[0]
+
+def calculate_page_points(rows):
+    """360 points for (check_in, check_out, status) rows, scored in one batch"""
+    scored = POINTS_ENGINE.score_records((check_in, check_out) for check_in, check_out, _ in rows)
+    points = []
+    for (check_in, check_out, status), result in zip(rows, scored):
+        if status == 'absent' or status == 'off' or not check_in or not check_out:
+            points.append(0)
+        elif result is None:
+            points.append(FALLBACK_POINTS)
+        else:
+            points.append(result[1])
+    return points
 
-def map_old_to_new(old_item):
+def map_old_to_new(old_item, points_360=None):
     """Map old table structure to new table structure"""
     # Extract fields from old table
     employee_id = old_item.get('employee_id', '')
@@ -67,8 +50,9 @@ def map_old_to_new(old_item):
     status = old_item.get('Status', 'work')
     reason = old_item.get('Reason')
     
-    # Calculate 360 points
-    points_360 = calculate_points_360(check_in, check_out, status)
+    # Calculate 360 points unless the page was already scored
+    if points_360 is None:
+        points_360 = calculate_points_360(check_in, check_out, status)
     
     # Create new item with proper field names
     new_item = {
@@ -108,10 +92,13 @@ def migrate_data():
         items = response.get('Items', [])
         
         print(f"Processing batch of {len(items)} items...")
+        page_points = calculate_page_points([
+            (item.get('Check in'), item.get('Check out'), item.get('Status', 'work')) for item in items
+        ])
         
-        for old_item in items:
+        for old_item, points_360 in zip(items, page_points):
             try:
-                new_item = map_old_to_new(old_item)
+                new_item = map_old_to_new(old_item, points_360)
                 batch.append(new_item)
                 
                 # Batch write every 25 items (DynamoDB limit)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Rebuild the department/period performance aggregates table from scratch.
+
+The aggregates are maintained incrementally by the performance-scores handler;
+run this once after creating the table (backfill) or whenever scores were
+written outside the handler (e.g. import-performance-data.py).
+"""
+
+import os
+import sys
+import boto3
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'shared'))
+from aggregates import apply_deltas, empty_aggregate, group_score_changes  # noqa: E402
+
+# AWS Configuration
+AWS_REGION = 'ap-southeast-1'
+PERFORMANCE_SCORES_TABLE = 'insighthr-performance-scores-dev'
+PERFORMANCE_AGGREGATES_TABLE = 'insighthr-performance-aggregates-dev'
+
+dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+performance_table = dynamodb.Table(PERFORMANCE_SCORES_TABLE)
+aggregates_table = dynamodb.Table(PERFORMANCE_AGGREGATES_TABLE)
+
+
+def rebuild_aggregates():
+    """Scan every score, recompute all aggregates and replace the table contents"""
+    print(f"Scanning {PERFORMANCE_SCORES_TABLE}...")
+    scan_kwargs = {
+        'ProjectionExpression': 'department, #p, overallScore',
+        'ExpressionAttributeNames': {'#p': 'period'}
+    }
+    aggregates = {}
+    score_count = 0
+    while True:
+        result = performance_table.scan(**scan_kwargs)
+        items = result.get('Items', [])
+        score_count += len(items)
+        for key, deltas in group_score_changes((None, item) for item in items).items():
+            aggregate = aggregates.setdefault(key, empty_aggregate(*key))
+            apply_deltas(aggregate, deltas)
+        if 'LastEvaluatedKey' not in result:
+            break
+        scan_kwargs['ExclusiveStartKey'] = result['LastEvaluatedKey']
+    print(f"Found {score_count} scores in {len(aggregates)} department/period groups")
+
+    # Drop aggregates for groups that no longer have scores
+    stale = []
+    scan_kwargs = {'ProjectionExpression': 'department, #p', 'ExpressionAttributeNames': {'#p': 'period'}}
+    while True:
+        result = aggregates_table.scan(**scan_kwargs)
+        stale.extend(
+            item for item in result.get('Items', [])
+            if (item['department'], item['period']) not in aggregates
+        )
+        if 'LastEvaluatedKey' not in result:
+            break
+        scan_kwargs['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+    now = datetime.utcnow().isoformat()
+    with aggregates_table.batch_writer() as batch:
+        for aggregate in aggregates.values():
+            aggregate['version'] = 1
+            aggregate['updatedAt'] = now
+            batch.put_item(Item=aggregate)
+        for item in stale:
+            batch.delete_item(Key={'department': item['department'], 'period': item['period']})
+
+    print("\n✓ Rebuild complete!")
+    print(f"  - Aggregates written: {len(aggregates)}")
+    print(f"  - Stale aggregates removed: {len(stale)}")
+
+
+if __name__ == '__main__':
+    rebuild_aggregates()
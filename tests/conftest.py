@@ -0,0 +1,109 @@
+"""
+Shared fixtures for the local handler tests.
+
+Handlers are imported as top-level modules with lambda/shared on the path,
+the same layout the deploy scripts produce. moto is imported before any
+handler so every boto3 client the handlers create at import is routed to
+the in-memory mock while a test's `aws` fixture is active.
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HANDLER_DIRS = ['shared', 'attendance', 'chatbot', 'performance', 'performance-scores']
+
+for directory in HANDLER_DIRS:
+    sys.path.insert(0, os.path.join(ROOT, 'lambda', directory))
+
+os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
+os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+os.environ['AWS_SESSION_TOKEN'] = 'testing'
+os.environ['AWS_DEFAULT_REGION'] = os.environ['AWS_REGION'] = 'ap-southeast-1'
+# Table names the chatbot handler requires at import (the other handlers default to these)
+os.environ.setdefault('EMPLOYEES_TABLE', 'insighthr-employees-dev')
+os.environ.setdefault('USERS_TABLE', 'insighthr-users-dev')
+os.environ.setdefault('PERFORMANCE_SCORES_TABLE', 'insighthr-performance-scores-dev')
+
+from moto import mock_aws  # noqa: E402
+
+
+@pytest.fixture
+def aws():
+    """A fresh in-memory AWS account for one test"""
+    with mock_aws():
+        yield
+
+
+@pytest.fixture
+def identity_caches(monkeypatch):
+    """Empty per-container Users/Employees caches, so no test sees another's callers"""
+    import identity
+    for name in ('user_cache', 'employee_cache'):
+        cache = getattr(identity, name)
+        monkeypatch.setattr(identity, name, identity.TTLCache(cache.max_size, cache.ttl))
+    return identity
+
+
+def load_handler(name):
+    """Import a handler module (once per session) and return it"""
+    return importlib.import_module(name)
+
+
+def create_table(dynamodb, name, hash_key, range_key=None, indexes=()):
+    """Create an on-demand table with string keys.
+
+    indexes is a sequence of (index name, hash key, range key or None).
+    """
+    attributes = {hash_key, range_key} if range_key else {hash_key}
+    for _, index_hash, index_range in indexes:
+        attributes.update(key for key in (index_hash, index_range) if key)
+
+    def key_schema(hash_name, range_name):
+        schema = [{'AttributeName': hash_name, 'KeyType': 'HASH'}]
+        if range_name:
+            schema.append({'AttributeName': range_name, 'KeyType': 'RANGE'})
+        return schema
+
+    kwargs = {
+        'TableName': name,
+        'AttributeDefinitions': [{'AttributeName': attribute, 'AttributeType': 'S'} for attribute in sorted(attributes)],
+        'KeySchema': key_schema(hash_key, range_key),
+        'BillingMode': 'PAY_PER_REQUEST'
+    }
+    if indexes:
+        kwargs['GlobalSecondaryIndexes'] = [
+            {'IndexName': index, 'KeySchema': key_schema(index_hash, index_range), 'Projection': {'ProjectionType': 'ALL'}}
+            for index, index_hash, index_range in indexes
+        ]
+    table = dynamodb.create_table(**kwargs)
+    table.wait_until_exists()
+    return table
+
+
+class CallCounter:
+    """Count API calls made through a boto3 client, by operation and table.
+
+    Use as a context manager so the hook is removed from the handler's
+    long-lived client when the test ends.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def _record(self, params, model, **kwargs):
+        self.calls.append((model.name, params.get('TableName')))
+
+    def __enter__(self):
+        self.client.meta.events.register('before-parameter-build', self._record, unique_id=f"count-{id(self)}")
+        return self
+
+    def __exit__(self, *exc):
+        self.client.meta.events.unregister('before-parameter-build', unique_id=f"count-{id(self)}")
+
+    def count(self, operation, table=None):
+        return sum(1 for name, called_table in self.calls if name == operation and table in (None, called_table))
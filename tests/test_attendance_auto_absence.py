@@ -0,0 +1,134 @@
+"""run_auto_absence against moto: writes are conditional on what the job read"""
+
+import json
+from datetime import datetime
+
+import boto3
+import pytest
+
+from conftest import create_table, load_handler
+
+
+@pytest.fixture
+def attendance(aws, monkeypatch):
+    handler = load_handler('attendance_handler')
+    dynamodb = boto3.resource('dynamodb')
+    create_table(dynamodb, handler.ATTENDANCE_TABLE, 'employeeId', 'date', indexes=[
+        ('date-index', 'date', None),
+        ('department-date-index', 'department', 'date')
+    ])
+    employees = create_table(dynamodb, handler.EMPLOYEES_TABLE, 'employeeId')
+    for employee_id in ('DEV-001', 'DEV-002', 'DEV-003'):
+        employees.put_item(Item={'employeeId': employee_id, 'name': employee_id, 'department': 'DEV',
+                                 'position': 'Mid', 'status': 'active'})
+    monkeypatch.setattr(handler, 'employee_roster', handler.EmployeeRoster(handler.employees_table))
+    monkeypatch.setattr(handler, 'AUTO_ABSENCE_WEEKDAYS', set(range(7)))
+    return handler
+
+
+def today(handler):
+    return datetime.now(handler.APP_TIMEZONE).strftime('%Y-%m-%d')
+
+
+def open_session(handler, employee_id, day):
+    handler.attendance_table.put_item(Item={
+        'employeeId': employee_id, 'date': day, 'checkIn': '00:00', 'department': 'DEV',
+        'position': 'Mid', 'status': 'early_bird', 'paidLeave': False
+    })
+
+
+def kiosk(handler, action, employee_id):
+    result = handler.lambda_handler({
+        'httpMethod': 'POST',
+        'path': f'/attendance/{action}',
+        'body': json.dumps({'employeeId': employee_id})
+    }, None)
+    assert result['statusCode'] == 200, result['body']
+
+
+def run_with_writes_after_read(handler, monkeypatch, day, *taps):
+    """Run the job with kiosk taps landing between its index read and its writes"""
+    list_active_employees = handler.list_active_employees
+
+    def tap_then_list():
+        for action, employee_id in taps:
+            kiosk(handler, action, employee_id)
+        return list_active_employees()
+
+    monkeypatch.setattr(handler, 'list_active_employees', tap_then_list)
+    return handler.run_auto_absence(day)
+
+
+def record(handler, employee_id, day):
+    return handler.attendance_table.get_item(Key={'employeeId': employee_id, 'date': day}).get('Item')
+
+
+def test_closes_open_sessions_and_marks_missing_employees(attendance):
+    day = today(attendance)
+    open_session(attendance, 'DEV-001', day)
+
+    summary = attendance.run_auto_absence(day)
+
+    assert (summary['closed'], summary['markedAbsent'], summary['skipped'], summary['failed']) == (1, 2, 0, 0)
+    closed = record(attendance, 'DEV-001', day)
+    assert closed['status'] == 'absent' and closed['points360'] == 0 and closed['checkIn'] == '00:00'
+    assert record(attendance, 'DEV-002', day)['reason'] == 'Auto-marked absent: no check-in'
+
+
+def test_rerun_writes_nothing(attendance):
+    day = today(attendance)
+    open_session(attendance, 'DEV-001', day)
+    attendance.run_auto_absence(day)
+
+    summary = attendance.run_auto_absence(day)
+
+    assert (summary['closed'], summary['markedAbsent'], summary['skipped']) == (0, 0, 0)
+
+
+def test_concurrent_check_out_survives(attendance, monkeypatch):
+    day = today(attendance)
+    open_session(attendance, 'DEV-001', day)
+
+    summary = run_with_writes_after_read(attendance, monkeypatch, day, ('check-out', 'DEV-001'))
+
+    assert summary['closed'] == 0 and summary['skipped'] == 1
+    checked_out = record(attendance, 'DEV-001', day)
+    assert checked_out.get('checkOut') and checked_out['status'] != 'absent'
+
+
+def test_concurrent_check_in_survives(attendance, monkeypatch):
+    day = today(attendance)
+
+    summary = run_with_writes_after_read(attendance, monkeypatch, day, ('check-in', 'DEV-002'))
+
+    assert summary['markedAbsent'] == 2 and summary['skipped'] == 1
+    checked_in = record(attendance, 'DEV-002', day)
+    assert checked_in.get('checkIn') and checked_in['status'] != 'absent'
+
+
+def test_admin_edit_before_rerun_survives(attendance):
+    day = today(attendance)
+    open_session(attendance, 'DEV-001', day)
+    # Stale index read: the job still sees the open session, but an admin has since approved it as paid leave
+    stale = dict(record(attendance, 'DEV-001', day))
+    attendance.attendance_table.update_item(
+        Key={'employeeId': 'DEV-001', 'date': day},
+        UpdateExpression='SET #status = :status, paidLeave = :paid',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':status': 'work', ':paid': True}
+    )
+
+    assert attendance.close_open_session(stale, '2025-01-01T23:59:00+07:00') == 'skipped'
+    assert record(attendance, 'DEV-001', day)['status'] == 'work'
+
+
+def test_open_session_without_status_is_closed(attendance):
+    day = today(attendance)
+    attendance.attendance_table.put_item(Item={
+        'employeeId': 'DEV-001', 'date': day, 'checkIn': '00:00', 'department': 'DEV', 'position': 'Mid'
+    })
+
+    summary = attendance.run_auto_absence(day)
+
+    assert (summary['closed'], summary['skipped']) == (1, 0)
+    assert record(attendance, 'DEV-001', day)['status'] == 'absent'
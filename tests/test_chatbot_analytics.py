@@ -0,0 +1,49 @@
+"""Rankings and trends are only computed when the retrieved scores are complete"""
+
+from decimal import Decimal
+
+import boto3
+import pytest
+
+from conftest import create_table, load_handler
+
+ADMIN = {'role': 'Admin', 'department': None, 'employee_id': None}
+
+
+@pytest.fixture
+def chatbot(aws, monkeypatch):
+    handler = load_handler('chatbot_handler')
+    scores = create_table(boto3.resource('dynamodb'), handler.PERFORMANCE_SCORES_TABLE, 'employeeId', 'period',
+                          indexes=[('department-period-index', 'department', 'period')])
+    for index in range(5):
+        scores.put_item(Item={'employeeId': f'DEV-00{index}', 'period': '2025-Q1', 'department': 'DEV',
+                              'overallScore': Decimal(70 + index)})
+    monkeypatch.setattr(handler, 'CONTEXT_MAX_RECORDS', 3)
+    return handler
+
+
+def analytics_titles(handler, scores, complete):
+    context = {
+        'user_info': ADMIN, 'hints': handler.parse_entity_hints('top DEV 2025-Q1'), 'department_aggregates': [],
+        'performance_scores': scores, 'capped': [] if complete else ['performance_scores']
+    }
+    return [title for title, _, _ in handler.build_analytics(context)]
+
+
+def test_query_past_the_cap_is_reported(chatbot):
+    hints = chatbot.parse_entity_hints('top DEV 2025-Q1')
+
+    scores, complete = chatbot.get_performance_data('Admin', hints=hints)
+
+    assert len(scores) == 3 and not complete
+    assert not any(title.startswith(('TOP', 'SCORE TREND', 'AVERAGE')) for title in analytics_titles(chatbot, scores, complete))
+
+
+def test_complete_scores_are_ranked(chatbot, monkeypatch):
+    monkeypatch.setattr(chatbot, 'CONTEXT_MAX_RECORDS', 5)
+    hints = chatbot.parse_entity_hints('top DEV 2025-Q1')
+
+    scores, complete = chatbot.get_performance_data('Admin', hints=hints)
+
+    assert len(scores) == 5 and complete
+    assert any(title.startswith('TOP 5 EMPLOYEES') for title in analytics_titles(chatbot, scores, complete))
@@ -0,0 +1,41 @@
+"""Departments recognized in questions come from the aggregates table as well as KNOWN_DEPARTMENTS"""
+
+import aggregates
+import boto3
+import identity
+import pytest
+
+from conftest import CallCounter, create_table, load_handler
+
+
+@pytest.fixture
+def chatbot(aws, monkeypatch):
+    handler = load_handler('chatbot_handler')
+    table = create_table(boto3.resource('dynamodb'), aggregates.PERFORMANCE_AGGREGATES_TABLE, 'department', 'period')
+    for department, period in (('DEV', '2025-Q1'), ('OPS', '2025-Q1'), ('OPS', '2025-Q2')):
+        table.put_item(Item={'department': department, 'period': period, 'scoreCount': 1})
+    monkeypatch.setattr(handler, 'department_cache', identity.TTLCache(1, handler.DEPARTMENT_CACHE_TTL_SECONDS))
+    return handler
+
+
+def test_unlisted_department_is_recognized(chatbot):
+    assert 'OPS' not in chatbot.KNOWN_DEPARTMENTS
+
+    hints = chatbot.parse_entity_hints('Average score in OPS for 2025-Q2?')
+
+    assert hints['departments'] == ['OPS']
+    assert chatbot.known_departments().count('OPS') == 1
+
+
+def test_department_list_is_cached(chatbot):
+    chatbot.known_departments()
+
+    with CallCounter(chatbot.thread_dynamodb().meta.client) as counter:
+        chatbot.parse_entity_hints('How is QA doing?')
+    assert counter.count('Scan') == 0
+
+
+def test_employee_ids_with_any_prefix_are_kept(chatbot):
+    hints = chatbot.parse_entity_hints('Compare HR-00012 with DEV-01013')
+
+    assert hints['employee_ids'] == ['HR-00012', 'DEV-01013']
@@ -0,0 +1,71 @@
+"""Profile reads per chat message: one Users query and one Employees read per cache TTL"""
+
+import json
+
+import boto3
+import identity
+import pytest
+
+from conftest import CallCounter, create_table, load_handler
+
+EMAIL = 'dev001@insighthr.test'
+MESSAGES = 5
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def chatbot(aws, monkeypatch):
+    handler = load_handler('chatbot_handler')
+    dynamodb = boto3.resource('dynamodb')
+    users = create_table(dynamodb, handler.USERS_TABLE, 'userId', indexes=[('email-index', 'email', None)])
+    employees = create_table(dynamodb, handler.EMPLOYEES_TABLE, 'employeeId', indexes=[('department-index', 'department', None)])
+    create_table(dynamodb, handler.PERFORMANCE_SCORES_TABLE, 'employeeId', 'period')
+    users.put_item(Item={'userId': 'u-1', 'email': EMAIL, 'name': 'Dev One', 'role': 'Employee', 'employeeId': 'DEV-001'})
+    employees.put_item(Item={'employeeId': 'DEV-001', 'name': 'Dev One', 'department': 'DEV', 'position': 'Mid'})
+
+    clock = FakeClock()
+    for module, name in ((handler, 'profile_cache'), (identity, 'user_cache'), (identity, 'employee_cache')):
+        cache = getattr(module, name)
+        monkeypatch.setattr(module, name, identity.TTLCache(cache.max_size, cache.ttl, clock=clock))
+    monkeypatch.setattr(handler, 'RESPONSE_CACHE_ENABLED', False)
+    monkeypatch.setattr(handler, 'invoke_bedrock', lambda prompt, max_tokens=2000: 'ok')
+    monkeypatch.setattr(handler, 'clock', clock, raising=False)
+    return handler
+
+
+def send(handler, message):
+    result = handler.lambda_handler({
+        'httpMethod': 'POST',
+        'body': json.dumps({'message': message}),
+        'requestContext': {'authorizer': {'claims': {'email': EMAIL}}}
+    }, None)
+    assert result['statusCode'] == 200, result['body']
+
+
+def test_profile_reads_are_constant_per_ttl(chatbot):
+    with CallCounter(chatbot.dynamodb.meta.client) as counter:
+        for index in range(MESSAGES):
+            send(chatbot, f"What was my score in 2025-Q{index % 4 + 1}?")
+        assert counter.count('Query', chatbot.USERS_TABLE) == 1
+        assert counter.count('GetItem', chatbot.EMPLOYEES_TABLE) == 1
+
+        chatbot.clock.now += chatbot.profile_cache.ttl + 1
+        for index in range(MESSAGES):
+            send(chatbot, f"How is my attendance in week {index}?")
+        assert counter.count('Query', chatbot.USERS_TABLE) == 2
+        assert counter.count('GetItem', chatbot.EMPLOYEES_TABLE) == 2
+
+
+def test_unknown_employee_is_not_cached(chatbot):
+    chatbot.employees_table.delete_item(Key={'employeeId': 'DEV-001'})
+    with CallCounter(chatbot.dynamodb.meta.client) as counter:
+        for _ in range(2):
+            send(chatbot, "What was my score?")
+        assert counter.count('GetItem', chatbot.EMPLOYEES_TABLE) == 2
@@ -0,0 +1,192 @@
+"""Streaming chat replies against moto with a fake Bedrock streaming client"""
+
+import json
+
+import boto3
+import pytest
+from botocore.exceptions import ReadTimeoutError
+
+from conftest import CallCounter, create_table, load_handler
+
+EMAIL = 'manager@insighthr.test'
+
+
+def delta_event(text):
+    return {'chunk': {'bytes': json.dumps({'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text}}).encode()}}
+
+
+def control_event(event_type):
+    return {'chunk': {'bytes': json.dumps({'type': event_type}).encode()}}
+
+
+class FakeBedrock:
+    """invoke_model_with_response_stream returning scripted events.
+
+    Each script entry is an event dict, or an exception to raise at that point
+    in the stream. on_event(index) runs before each event is yielded.
+    """
+
+    def __init__(self, script, fail_on_invoke=None, on_event=None):
+        self.script = script
+        self.fail_on_invoke = fail_on_invoke
+        self.on_event = on_event
+        self.requests = []
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        self.requests.append(json.loads(body))
+        if self.fail_on_invoke:
+            raise self.fail_on_invoke
+        return {'body': self._events()}
+
+    def _events(self):
+        for index, entry in enumerate(self.script):
+            if self.on_event:
+                self.on_event(index)
+            if isinstance(entry, Exception):
+                raise entry
+            yield entry
+
+
+@pytest.fixture
+def chatbot(aws, monkeypatch):
+    handler = load_handler('chatbot_handler')
+    create_table(boto3.resource('dynamodb'), handler.CHAT_STREAMS_TABLE, 'streamId')
+    # Flush on every delta unless a test says otherwise
+    monkeypatch.setattr(handler, 'CHAT_STREAM_FLUSH_MS', 0)
+    return handler
+
+
+def use_bedrock(handler, monkeypatch, fake):
+    monkeypatch.setattr(handler, 'bedrock_runtime', fake)
+    return fake
+
+
+def stored(handler, stream_id):
+    return handler.chat_streams_table.get_item(Key={'streamId': stream_id}, ConsistentRead=True)['Item']
+
+
+def test_chunks_are_persisted_in_order(chatbot, monkeypatch):
+    deltas = ['The ', 'top ', 'performer ', 'is ', 'DEV-001.']
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    seen = []
+    script = [control_event('message_start')] + [delta_event(text) for text in deltas] + [control_event('message_stop')]
+    # Before each event, record what a poller would see
+    use_bedrock(chatbot, monkeypatch, FakeBedrock(script, on_event=lambda index: seen.append(stored(chatbot, stream_id)['text'])))
+
+    assert chatbot.run_chat_stream(stream_id) == ''.join(deltas)
+
+    expected = [''.join(deltas[:count]) for count in range(len(deltas) + 1)]
+    assert [text for index, text in enumerate(seen) if index == 0 or seen[index - 1] != text] == expected
+    item = stored(chatbot, stream_id)
+    assert item['status'] == 'complete' and item['text'] == ''.join(deltas) and item['prompt'] == ''
+    assert item['firstTokenMs'] is not None
+
+
+def test_polling_returns_deltas_after_offset(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    polls = []
+
+    def poll(index):
+        offset = polls[-1]['offset'] if polls else 0
+        polls.append(chatbot.get_chat_stream(stream_id, EMAIL, offset))
+
+    use_bedrock(chatbot, monkeypatch, FakeBedrock([delta_event('Hello'), delta_event(', '), delta_event('world')], on_event=poll))
+    chatbot.run_chat_stream(stream_id)
+    final = chatbot.get_chat_stream(stream_id, EMAIL, polls[-1]['offset'])
+
+    assert ''.join(poll['delta'] for poll in polls) + final['delta'] == 'Hello, world'
+    assert final['status'] == 'complete' and final['reply'] == 'Hello, world'
+    assert chatbot.get_chat_stream(stream_id, 'someone-else@insighthr.test') is None
+
+
+def test_flushes_are_throttled(chatbot, monkeypatch):
+    monkeypatch.setattr(chatbot, 'CHAT_STREAM_FLUSH_MS', 60_000)
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    use_bedrock(chatbot, monkeypatch, FakeBedrock([delta_event(str(index)) for index in range(50)]))
+
+    with CallCounter(chatbot.dynamodb.meta.client) as counter:
+        chatbot.run_chat_stream(stream_id)
+
+    # 'streaming' status, the first token, and the completed reply
+    assert counter.count('UpdateItem', chatbot.CHAT_STREAMS_TABLE) == 3
+    assert stored(chatbot, stream_id)['text'] == ''.join(str(index) for index in range(50))
+
+
+def test_error_mid_stream_keeps_partial_text(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    use_bedrock(chatbot, monkeypatch, FakeBedrock([delta_event('Partial '), delta_event('answer'), RuntimeError('stream reset')]))
+
+    assert chatbot.run_chat_stream(stream_id) is None
+
+    item = stored(chatbot, stream_id)
+    assert item['status'] == 'error' and item['text'] == 'Partial answer' and item['prompt'] == ''
+    poll = chatbot.get_chat_stream(stream_id, EMAIL, 0)
+    assert poll['error'] == chatbot.ERROR_REPLY and poll['delta'] == 'Partial answer' and 'reply' not in poll
+
+
+def test_read_timeout_marks_stream_failed(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    timeout = ReadTimeoutError(endpoint_url='https://bedrock-runtime.ap-southeast-1.amazonaws.com')
+    use_bedrock(chatbot, monkeypatch, FakeBedrock([delta_event('Slow '), timeout]))
+
+    chatbot.run_chat_stream(stream_id)
+
+    item = stored(chatbot, stream_id)
+    assert item['status'] == 'error' and item['text'] == 'Slow '
+
+
+def test_timeout_before_first_token(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    timeout = ReadTimeoutError(endpoint_url='https://bedrock-runtime.ap-southeast-1.amazonaws.com')
+    use_bedrock(chatbot, monkeypatch, FakeBedrock([], fail_on_invoke=timeout))
+
+    chatbot.run_chat_stream(stream_id)
+
+    poll = chatbot.get_chat_stream(stream_id, EMAIL, 0)
+    assert poll['status'] == 'error' and poll['delta'] == ''
+
+
+def test_redelivered_worker_does_not_restart_a_stream(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    fake = use_bedrock(chatbot, monkeypatch, FakeBedrock([delta_event('once')]))
+    chatbot.run_chat_stream(stream_id)
+
+    assert chatbot.lambda_handler({'chatStream': {'streamId': stream_id}}, None)['statusCode'] == 200
+    assert len(fake.requests) == 1
+    assert stored(chatbot, stream_id)['text'] == 'once'
+
+
+def test_cached_reply_stream_is_complete_on_first_poll(chatbot):
+    stream_id = chatbot.create_chat_stream('', EMAIL, reply='From cache')
+
+    poll = chatbot.lambda_handler({
+        'httpMethod': 'GET',
+        'pathParameters': {'streamId': stream_id},
+        'queryStringParameters': {'offset': '0'},
+        'requestContext': {'authorizer': {'claims': {'email': EMAIL}}}
+    }, None)
+
+    data = json.loads(poll['body'])['data']
+    assert poll['statusCode'] == 200 and data['status'] == 'complete' and data['reply'] == 'From cache'
+
+
+def test_concurrent_worker_loses_the_claim(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    # A redelivered invoke claims the item while the first worker is between its read and its write
+    chatbot.update_chat_stream(stream_id, {'status': 'streaming'})
+    fake = use_bedrock(chatbot, monkeypatch, FakeBedrock([delta_event('twice')]))
+
+    assert chatbot.run_chat_stream(stream_id) is None
+    assert fake.requests == []
+
+
+def test_stalled_stream_is_reported_as_failed(chatbot, monkeypatch):
+    stream_id = chatbot.create_chat_stream('prompt', EMAIL)
+    # The worker timed out after its last flush
+    chatbot.update_chat_stream(stream_id, {'status': 'streaming', 'text': 'Half an ', 'updatedAt': '2000-01-01T00:00:00'})
+
+    poll = chatbot.get_chat_stream(stream_id, EMAIL, 0)
+
+    assert poll['status'] == 'error' and poll['error'] == chatbot.ERROR_REPLY and poll['delta'] == 'Half an '
+    fresh = chatbot.get_chat_stream(chatbot.create_chat_stream('prompt', EMAIL), EMAIL, 0)
+    assert fresh['status'] == 'pending'
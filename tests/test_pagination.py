@@ -0,0 +1,36 @@
+"""Page sizes for list requests with and without pagination parameters"""
+
+import pagination
+from pagination import encode_token, fetch_key_page, parse_page_params
+
+
+def scan_of(rows, page_size=3):
+    """A scan callable over `rows` returning at most page_size items per call"""
+    def scan(**request):
+        start = request.get('ExclusiveStartKey', {}).get('i', 0)
+        page = rows[start:start + min(request['Limit'], page_size)]
+        result = {'Items': page}
+        if start + len(page) < len(rows):
+            result['LastEvaluatedKey'] = {'i': start + len(page)}
+        return result
+    return scan
+
+
+def test_request_without_parameters_is_capped_at_max_page_size():
+    assert parse_page_params({}) == (pagination.MAX_PAGE_SIZE, None)
+    assert parse_page_params(None) == (pagination.MAX_PAGE_SIZE, None)
+
+
+def test_explicit_parameters():
+    cursor = {'k': {'i': 3}}
+    assert parse_page_params({'nextToken': encode_token(cursor)}) == (pagination.DEFAULT_PAGE_SIZE, cursor)
+    assert parse_page_params({'limit': '5'}) == (5, None)
+    assert parse_page_params({'limit': str(pagination.MAX_PAGE_SIZE + 1)})[0] == pagination.MAX_PAGE_SIZE
+
+
+def test_capped_read_returns_next_token():
+    rows = list(range(10))
+    items, cursor = fetch_key_page(scan_of(rows), {}, 7)
+    assert items == rows[:7] and cursor == {'k': {'i': 7}}
+    items, cursor = fetch_key_page(scan_of(rows), {}, 7, cursor)
+    assert items == rows[7:] and cursor is None
@@ -0,0 +1,169 @@
+"""CSV export: inline vs S3 delivery, multipart part sizes, abort and presigned URL (moto)"""
+
+import csv
+import io
+import json
+import time
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+import requests
+
+from conftest import create_table, load_handler
+
+MIB = 1024 * 1024
+ADMIN_EMAIL = 'admin@insighthr.test'
+
+
+@pytest.fixture
+def performance(aws, identity_caches, monkeypatch):
+    handler = load_handler('performance_handler')
+    dynamodb = boto3.resource('dynamodb')
+    create_table(dynamodb, handler.PERFORMANCE_SCORES_TABLE, 'employeeId', 'period',
+                 indexes=[('department-period-index', 'department', 'period')])
+    users = create_table(dynamodb, handler.USERS_TABLE, 'userId', indexes=[('email-index', 'email', None)])
+    create_table(dynamodb, handler.EMPLOYEES_TABLE, 'employeeId')
+    users.put_item(Item={'userId': 'admin-1', 'email': ADMIN_EMAIL, 'role': 'Admin'})
+    boto3.client('s3').create_bucket(
+        Bucket=handler.EXPORT_BUCKET,
+        CreateBucketConfiguration={'LocationConstraint': handler.AWS_REGION}
+    )
+    monkeypatch.setattr(handler, 'EXPORT_INLINE_MAX_ROWS', 3)
+    return handler
+
+
+def score(index, padding=0):
+    return {
+        'employeeId': f'DEV-{index:05d}',
+        'employeeName': f'Employee {index}',
+        'department': 'DEV',
+        'position': 'Mid',
+        'period': '2025-Q1',
+        'overallScore': Decimal('81.5'),
+        'kpiScores': {'kpi': Decimal('80'), 'notes': 'x' * padding}
+    }
+
+
+def seed(handler, count):
+    with handler.performance_table.batch_writer() as writer:
+        for index in range(count):
+            writer.put_item(Item=score(index))
+
+
+def export(handler, **body):
+    return handler.lambda_handler({
+        'httpMethod': 'POST',
+        'path': '/performance/export',
+        'body': json.dumps(body),
+        'requestContext': {'authorizer': {'claims': {'sub': 'admin-1', 'email': ADMIN_EMAIL}}}
+    }, None)
+
+
+def read_object(handler, key):
+    return boto3.client('s3').get_object(Bucket=handler.EXPORT_BUCKET, Key=key)['Body'].read().decode('utf-8')
+
+
+def expected_csv(handler, scores):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(handler.EXPORT_COLUMNS)
+    for item in scores:
+        writer.writerow(handler.export_row(item))
+    return buffer.getvalue()
+
+
+class PartRecorder:
+    """Record the size of every UploadPart body sent by the handler's S3 client"""
+
+    def __init__(self, client):
+        self.client = client
+        self.sizes = []
+
+    def _record(self, params, **kwargs):
+        self.sizes.append(len(params['Body']))
+
+    def __enter__(self):
+        self.client.meta.events.register('before-parameter-build.s3.UploadPart', self._record, unique_id='part-recorder')
+        return self
+
+    def __exit__(self, *exc):
+        self.client.meta.events.unregister('before-parameter-build.s3.UploadPart', unique_id='part-recorder')
+
+
+def test_at_inline_limit_returns_csv_body(performance):
+    seed(performance, 3)
+
+    result = export(performance)
+
+    assert result['statusCode'] == 200
+    assert result['headers']['Content-Type'] == 'text/csv'
+    assert len(list(csv.reader(io.StringIO(result['body'])))) == 4
+    assert 'Contents' not in boto3.client('s3').list_objects_v2(Bucket=performance.EXPORT_BUCKET)
+
+
+def test_over_inline_limit_goes_to_s3(performance):
+    seed(performance, 4)
+
+    result = export(performance)
+
+    body = json.loads(result['body'])
+    assert result['statusCode'] == 200 and body['rowCount'] == 4
+    rows = list(csv.reader(io.StringIO(read_object(performance, body['key']))))
+    assert rows[0] == performance.EXPORT_COLUMNS and len(rows) == 5
+
+
+def test_delivery_url_forces_s3_for_small_exports(performance):
+    seed(performance, 1)
+
+    body = json.loads(export(performance, delivery='url')['body'])
+
+    assert body['rowCount'] == 1 and body['key'].startswith('exports/performance/admin-1/')
+
+
+def test_presigned_url_response(performance):
+    seed(performance, 4)
+
+    body = json.loads(export(performance)['body'])
+
+    assert body['expiresIn'] == performance.EXPORT_URL_EXPIRES_SECONDS
+    url = urlparse(body['downloadUrl'])
+    query = parse_qs(url.query)
+    assert performance.EXPORT_BUCKET in url.netloc + url.path and url.path.endswith(body['key'])
+    if 'X-Amz-Expires' in query:  # SigV4
+        assert query['X-Amz-Expires'] == [str(performance.EXPORT_URL_EXPIRES_SECONDS)]
+    else:  # SigV2 carries the absolute expiry time
+        assert abs(int(query['Expires'][0]) - time.time() - performance.EXPORT_URL_EXPIRES_SECONDS) < 60
+    assert query['response-content-disposition'] == ['attachment; filename="performance_export.csv"']
+    download = requests.get(body['downloadUrl'])
+    assert download.status_code == 200 and download.text == read_object(performance, body['key'])
+
+
+def test_large_export_uploads_parts_of_at_least_five_mib(performance):
+    assert performance.EXPORT_PART_SIZE >= 5 * MIB
+    scores = [score(index, padding=10_000) for index in range(1_400)]
+
+    with PartRecorder(performance.s3_client) as parts:
+        key, row_count, _ = performance.export_csv_to_s3(iter(scores), {'userId': 'admin-1'})
+
+    assert row_count == len(scores)
+    assert len(parts.sizes) >= 2
+    assert all(size >= performance.EXPORT_PART_SIZE for size in parts.sizes[:-1])
+    assert read_object(performance, key) == expected_csv(performance, scores)
+
+
+def test_failed_export_aborts_the_upload(performance):
+    def failing_scores():
+        for index in range(1_000):
+            yield score(index, padding=10_000)
+        raise RuntimeError('DynamoDB page failed')
+
+    s3 = boto3.client('s3')
+    with PartRecorder(performance.s3_client) as parts:
+        with pytest.raises(RuntimeError):
+            performance.export_csv_to_s3(failing_scores(), {'userId': 'admin-1'})
+
+    assert parts.sizes, "a part should have been uploaded before the failure"
+    assert not s3.list_multipart_uploads(Bucket=performance.EXPORT_BUCKET).get('Uploads')
+    assert 'Contents' not in s3.list_objects_v2(Bucket=performance.EXPORT_BUCKET)
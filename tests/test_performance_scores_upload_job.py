@@ -0,0 +1,158 @@
+"""Upload job worker run inline against moto: chunk accounting, redelivery and final status"""
+
+import json
+
+import aggregates
+import boto3
+import pytest
+import scoring_trigger
+
+from conftest import create_table, load_handler
+
+ADMIN_EMAIL = 'admin@insighthr.test'
+EMPLOYEES = [f'DEV-{index:03d}' for index in range(9)]
+
+
+@pytest.fixture
+def scores(aws, identity_caches, monkeypatch):
+    handler = load_handler('performance_scores_handler')
+    dynamodb = boto3.resource('dynamodb')
+    create_table(dynamodb, handler.PERFORMANCE_SCORES_TABLE, 'employeeId', 'period',
+                 indexes=[('department-period-index', 'department', 'period')])
+    employees = create_table(dynamodb, handler.EMPLOYEES_TABLE, 'employeeId')
+    users = create_table(dynamodb, handler.USERS_TABLE, 'userId', indexes=[('email-index', 'email', None)])
+    create_table(dynamodb, handler.UPLOAD_JOBS_TABLE, 'jobId', 'itemId')
+    create_table(dynamodb, aggregates.PERFORMANCE_AGGREGATES_TABLE, 'department', 'period')
+    create_table(dynamodb, scoring_trigger.SCORING_STATE_TABLE, 'stateId')
+
+    users.put_item(Item={'userId': 'admin-1', 'email': ADMIN_EMAIL, 'role': 'Admin'})
+    for employee_id in EMPLOYEES:
+        employees.put_item(Item={'employeeId': employee_id, 'name': employee_id, 'department': 'DEV', 'position': 'Mid'})
+
+    monkeypatch.setattr(handler, 'UPLOAD_SYNC_MAX_ROWS', 5)
+    monkeypatch.setattr(handler, 'UPLOAD_JOB_CHUNK_SIZE', 4)
+    monkeypatch.setattr(handler, 'UPLOAD_JOB_INLINE', True)
+    return handler
+
+
+def upload_csv(handler):
+    """Nine known employees and one unknown: 10 rows, 3 chunks of at most 4"""
+    lines = ['employeeId,name,2025-Q1']
+    lines += [f'{employee_id},"{employee_id}, Dev",{80 + index}' for index, employee_id in enumerate(EMPLOYEES)]
+    lines.append('NOPE-999,Unknown,50')
+    return handler.lambda_handler({
+        'httpMethod': 'POST',
+        'path': '/performance-scores/upload',
+        'body': json.dumps({'csvContent': '\n'.join(lines)}),
+        'requestContext': {'authorizer': {'claims': {'sub': 'admin-1', 'email': ADMIN_EMAIL}}}
+    }, None)
+
+
+def job_status(handler, job_id):
+    result = handler.lambda_handler({
+        'httpMethod': 'GET',
+        'path': f'/performance-scores/upload/{job_id}',
+        'pathParameters': {'jobId': job_id},
+        'requestContext': {'authorizer': {'claims': {'sub': 'admin-1', 'email': ADMIN_EMAIL}}}
+    }, None)
+    assert result['statusCode'] == 200, result['body']
+    return json.loads(result['body'])['job']
+
+
+def meta(handler, job_id):
+    return handler.upload_jobs_table.get_item(Key={'jobId': job_id, 'itemId': 'META'}, ConsistentRead=True)['Item']
+
+
+def remaining_chunks(handler, job_id):
+    return handler.upload_jobs_table.query(
+        KeyConditionExpression='jobId = :job AND begins_with(itemId, :chunk)',
+        ExpressionAttributeValues={':job': job_id, ':chunk': 'CHUNK#'}
+    )['Items']
+
+
+def department_count(handler):
+    item = boto3.resource('dynamodb').Table(aggregates.PERFORMANCE_AGGREGATES_TABLE).get_item(
+        Key={'department': 'DEV', 'period': '2025-Q1'}
+    )['Item']
+    return int(item['scoreCount'])
+
+
+def assert_completed_exactly_once(handler, job_id):
+    job = job_status(handler, job_id)
+    assert job['status'] == 'completed'
+    assert (job['total'], job['processed'], job['succeeded'], job['failed']) == (10, 10, 9, 1)
+    assert [error['employeeId'] for error in job['errors']] == ['NOPE-999']
+    assert meta(handler, job_id)['doneChunks'] == {'CHUNK#000000', 'CHUNK#000001', 'CHUNK#000002'}
+    assert remaining_chunks(handler, job_id) == []
+    assert handler.performance_table.scan(Select='COUNT')['Count'] == 9
+    assert department_count(handler) == 9
+
+
+def test_multi_chunk_job_runs_to_completion(scores):
+    accepted = upload_csv(scores)
+
+    body = json.loads(accepted['body'])
+    assert accepted['statusCode'] == 202 and body['total'] == 10
+    assert_completed_exactly_once(scores, body['jobId'])
+
+
+def test_redelivered_chunk_is_not_counted_twice(scores, monkeypatch):
+    # The first worker dies after counting chunk 0 but before deleting it
+    record_chunk_progress = scores.record_chunk_progress
+
+    def count_then_crash(job_id, chunk_id, *args):
+        record_chunk_progress(job_id, chunk_id, *args)
+        raise RuntimeError('worker timed out')
+
+    monkeypatch.setattr(scores, 'record_chunk_progress', count_then_crash)
+    assert upload_csv(scores)['statusCode'] == 500
+    job_id = scores.upload_jobs_table.scan()['Items'][0]['jobId']
+    assert meta(scores, job_id)['processed'] == 4
+    assert len(remaining_chunks(scores, job_id)) == 3
+
+    # Lambda redelivers the async invocation; chunk 0 runs again
+    monkeypatch.setattr(scores, 'record_chunk_progress', record_chunk_progress)
+    scores.lambda_handler({'uploadJob': {'jobId': job_id}}, None)
+
+    assert_completed_exactly_once(scores, job_id)
+
+
+def test_repeated_progress_for_a_chunk_is_ignored(scores):
+    job = scores.create_upload_job([{'employeeId': EMPLOYEES[0], 'period': '2025-Q1', 'KPI': 80}], {'role': 'Admin'})
+
+    for _ in range(2):
+        scores.record_chunk_progress(job['jobId'], 'CHUNK#000000', 1, 0, [])
+
+    item = meta(scores, job['jobId'])
+    assert (item['processed'], item['succeeded'], item['doneChunks']) == (1, 1, {'CHUNK#000000'})
+
+
+class ShortLivedContext:
+    """Lambda context that runs out of time after `budget` chunk checks"""
+
+    invoked_function_arn = 'arn:aws:lambda:ap-southeast-1:123456789012:function:performance-scores'
+
+    def __init__(self, budget):
+        self.budget = budget
+
+    def get_remaining_time_in_millis(self):
+        self.budget -= 1
+        return 60_000 if self.budget >= 0 else 0
+
+
+def test_worker_continues_after_timeout(scores, monkeypatch):
+    # Capture the continuation instead of running it, to see the state in between
+    dispatched = []
+    monkeypatch.setattr(scores, 'dispatch_upload_job', lambda job_id, context=None: dispatched.append(job_id))
+    job = scores.create_upload_job(
+        [{'employeeId': employee_id, 'period': '2025-Q2', 'KPI': 70} for employee_id in EMPLOYEES], {'role': 'Admin'}
+    )
+
+    scores.run_upload_job(job['jobId'], ShortLivedContext(budget=1))
+    assert dispatched == [job['jobId']]
+    partial = meta(scores, job['jobId'])
+    assert partial['status'] == 'running' and partial['processed'] == 4
+
+    scores.run_upload_job(job['jobId'])
+    done = meta(scores, job['jobId'])
+    assert done['status'] == 'completed' and (done['processed'], done['succeeded']) == (9, 9)
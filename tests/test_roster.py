@@ -0,0 +1,47 @@
+"""EmployeeRoster against moto: snapshot lookups and the background refresh"""
+
+import time
+
+import boto3
+import pytest
+from roster import EmployeeRoster
+
+from conftest import CallCounter, create_table
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def employees(aws):
+    table = create_table(boto3.resource('dynamodb'), 'insighthr-employees-dev', 'employeeId')
+    table.put_item(Item={'employeeId': 'DEV-001', 'name': 'Ann', 'department': 'DEV', 'position': 'Mid'})
+    return table
+
+
+def wait_for_refresh(roster):
+    deadline = time.monotonic() + 10
+    while roster._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not roster._refreshing
+
+
+def test_refresh_scans_through_its_own_table(employees):
+    clock = FakeClock()
+    roster = EmployeeRoster(employees, refresh_seconds=60, clock=clock)
+    assert roster.get('DEV-001').get('name') == 'Ann'
+    employees.put_item(Item={'employeeId': 'DEV-002', 'name': 'Bo', 'department': 'DEV', 'position': 'Junior'})
+
+    clock.now = 61
+    with CallCounter(employees.meta.client) as counter:
+        roster.get('DEV-001')
+        wait_for_refresh(roster)
+
+    assert counter.count('Scan') == 0
+    assert roster.loads == 2 and roster._refresh_table is not employees
+    assert roster.get('DEV-002').get('position') == 'Junior' and roster.misses == 0